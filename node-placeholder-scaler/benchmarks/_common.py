@@ -0,0 +1,106 @@
+"""
+Helpers shared by the benchmark scripts: timing, memory measurement and
+reading/writing/comparing JSON result files.
+"""
+
+import datetime
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# Metrics where a larger value is a regression.  Anything not listed here is
+# reported but never fails a comparison.
+COMPARED_METRICS = ("wall_seconds", "api_calls", "bytes_decoded", "peak_memory_bytes")
+
+
+def time_call(fn, repeat=1):
+    """Run fn() `repeat` times and return (best wall seconds, last result)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory(fn):
+    """Run fn() once under tracemalloc and return the peak traced bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def environment():
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def write_results(suite, cases, output=None):
+    """Write benchmark results as JSON and return the path written."""
+    if output is None:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = RESULTS_DIR / f"{suite}-{stamp}.json"
+    output = Path(output)
+    with open(output, "w") as f:
+        json.dump(
+            {"suite": suite, "environment": environment(), "cases": cases},
+            f,
+            indent=2,
+            sort_keys=True,
+        )
+        f.write("\n")
+    return output
+
+
+def compare_results(cases, baseline_path, tolerance):
+    """Compare cases against a baseline results file.
+
+    Returns a list of human-readable regression descriptions for every
+    compared metric that grew by more than `tolerance` (a fraction, e.g. 0.2
+    for 20%).  Cases missing from the baseline are skipped.
+    """
+    with open(baseline_path) as f:
+        baseline = {c["name"]: c for c in json.load(f)["cases"]}
+
+    regressions = []
+    for case in cases:
+        base = baseline.get(case["name"])
+        if base is None:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in case or metric not in base:
+                continue
+            old, new = base[metric], case[metric]
+            if old and new > old * (1 + tolerance):
+                regressions.append(
+                    f"{case['name']}: {metric} {old} -> {new} "
+                    f"(+{(new / old - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def print_table(cases, columns):
+    widths = [
+        max(len(c), *(len(str(case.get(c, ""))) for case in cases)) for c in columns
+    ]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    for case in cases:
+        print("  ".join(str(case.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
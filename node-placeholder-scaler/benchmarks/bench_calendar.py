@@ -0,0 +1,227 @@
+"""
+Benchmark calendar parsing and event lookup on large synthetic calendars.
+
+Generated calendars mix one-off events, weekly RRULE lecture series with
+EXDATEs (holidays) and events in several VTIMEZONEs, spread over a
+configurable number of years.
+
+Execute from node-placeholder-scaler/:
+    python benchmarks/bench_calendar.py
+    python benchmarks/bench_calendar.py --events 1000 --years 2 --write-ics /tmp/big.ics
+"""
+
+import argparse
+import datetime
+import logging
+import random
+import sys
+import zoneinfo
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks._common import (  # noqa: E402
+    compare_results,
+    peak_memory,
+    print_table,
+    time_call,
+    write_results,
+)
+from ical.calendar_stream import IcsCalendarStream  # noqa: E402
+from scaler.calendar_parser import get_events  # noqa: E402
+
+TIMEZONES = {
+    "America/Los_Angeles": ("-0800", "-0700", "PST", "PDT"),
+    "America/New_York": ("-0500", "-0400", "EST", "EDT"),
+    "America/Chicago": ("-0600", "-0500", "CST", "CDT"),
+}
+START_YEAR = 2024
+
+
+def _vtimezone(tz_id, std_offset, dst_offset, std_name, dst_name):
+    return (
+        "BEGIN:VTIMEZONE\n"
+        f"TZID:{tz_id}\n"
+        "BEGIN:DAYLIGHT\n"
+        f"TZOFFSETFROM:{std_offset}\n"
+        f"TZOFFSETTO:{dst_offset}\n"
+        f"TZNAME:{dst_name}\n"
+        "DTSTART:19700308T020000\n"
+        "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=2SU\n"
+        "END:DAYLIGHT\n"
+        "BEGIN:STANDARD\n"
+        f"TZOFFSETFROM:{dst_offset}\n"
+        f"TZOFFSETTO:{std_offset}\n"
+        f"TZNAME:{std_name}\n"
+        "DTSTART:19701101T020000\n"
+        "RRULE:FREQ=YEARLY;BYMONTH=11;BYDAY=1SU\n"
+        "END:STANDARD\n"
+        "END:VTIMEZONE"
+    )
+
+
+def _fmt(dt):
+    return dt.strftime("%Y%m%dT%H%M%S")
+
+
+def make_ics(events, recurring, years, seed=0):
+    """Return ICS text with `events` one-off and `recurring` weekly events."""
+    rng = random.Random(seed)
+    tz_ids = list(TIMEZONES)
+    span_days = 365 * years
+    blocks = [_vtimezone(tz_id, *TIMEZONES[tz_id]) for tz_id in tz_ids]
+
+    for i in range(events):
+        tz_id = tz_ids[i % len(tz_ids)]
+        day = datetime.datetime(START_YEAR, 1, 1) + datetime.timedelta(
+            days=rng.randrange(span_days)
+        )
+        start = day.replace(hour=rng.randrange(7, 20), minute=rng.choice((0, 30)))
+        end = start + datetime.timedelta(minutes=rng.choice((20, 30, 60)))
+        blocks.append(
+            "BEGIN:VEVENT\n"
+            f"UID:single-{i}@bench\n"
+            f"DTSTAMP:{START_YEAR}0101T000000Z\n"
+            f"DTSTART;TZID={tz_id}:{_fmt(start)}\n"
+            f"DTEND;TZID={tz_id}:{_fmt(end)}\n"
+            f"SUMMARY:Exam {i}\n"
+            f"DESCRIPTION:pool-{i % 4}: {rng.randrange(1, 5)}\n"
+            "END:VEVENT"
+        )
+
+    for i in range(recurring):
+        tz_id = tz_ids[i % len(tz_ids)]
+        start = datetime.datetime(START_YEAR, 1, 8 + i % 5, 8 + i % 10, 50)
+        end = start + datetime.timedelta(minutes=20)
+        weeks = 52 * years
+        exdates = ",".join(
+            _fmt(start + datetime.timedelta(weeks=w))
+            for w in sorted(rng.sample(range(1, weeks), k=min(6 * years, weeks - 1)))
+        )
+        blocks.append(
+            "BEGIN:VEVENT\n"
+            f"UID:lecture-{i}@bench\n"
+            f"DTSTAMP:{START_YEAR}0101T000000Z\n"
+            f"DTSTART;TZID={tz_id}:{_fmt(start)}\n"
+            f"DTEND;TZID={tz_id}:{_fmt(end)}\n"
+            f"RRULE:FREQ=WEEKLY;COUNT={weeks}\n"
+            f"EXDATE;TZID={tz_id}:{exdates}\n"
+            f"SUMMARY:Lecture {i}\n"
+            f"DESCRIPTION:pool-{i % 4}: 1\n"
+            "END:VEVENT"
+        )
+
+    return (
+        "BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:-//node-placeholder//bench//EN\n"
+        + "\n".join(blocks)
+        + "\nEND:VCALENDAR\n"
+    )
+
+
+def lookup_instants(years):
+    """Instants near the start, middle and end of the calendar's range."""
+    tz = zoneinfo.ZoneInfo("America/Los_Angeles")
+    first = datetime.datetime(START_YEAR, 1, 10, 9, 0, tzinfo=tz)
+    return {
+        "start": first,
+        "middle": first + datetime.timedelta(days=365 * years // 2),
+        "end": first + datetime.timedelta(days=365 * years - 30),
+    }
+
+
+def bench_calendar(events, recurring, years, args):
+    ics = make_ics(events, recurring, years, seed=args.seed)
+    label = f"events={events},recurring={recurring},years={years}"
+    parse_wall, calendar = time_call(
+        lambda: IcsCalendarStream.calendar_from_ics(ics), repeat=args.repeat
+    )
+    case = {
+        "name": f"parse[{label}]",
+        "ics_bytes": len(ics.encode()),
+        "wall_seconds": round(parse_wall, 4),
+    }
+    if not args.no_memory:
+        case["peak_memory_bytes"] = peak_memory(
+            lambda: IcsCalendarStream.calendar_from_ics(ics)
+        )
+    cases = [case]
+
+    for where, instant in lookup_instants(years).items():
+        wall, found = time_call(
+            lambda: get_events(calendar, time=instant), repeat=args.repeat
+        )
+        case = {
+            "name": f"get_events[{label},at={where}]",
+            "wall_seconds": round(wall, 4),
+            "events_found": len(found),
+        }
+        if not args.no_memory:
+            case["peak_memory_bytes"] = peak_memory(
+                lambda: get_events(calendar, time=instant)
+            )
+        cases.append(case)
+    return cases, ics
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument(
+        "--events", default="100,1000,5000", help="One-off event counts to test."
+    )
+    argparser.add_argument(
+        "--recurring",
+        type=int,
+        default=50,
+        help="Weekly recurring lecture series per calendar.",
+    )
+    argparser.add_argument("--years", default="1,4")
+    argparser.add_argument("--seed", type=int, default=0)
+    argparser.add_argument("--repeat", type=int, default=1)
+    argparser.add_argument("--no-memory", action="store_true")
+    argparser.add_argument(
+        "--write-ics", help="Also write the largest generated calendar to this path."
+    )
+    argparser.add_argument(
+        "--output", help="Results file (default: benchmarks/results/)"
+    )
+    argparser.add_argument(
+        "--compare", help="Baseline results file to compare against."
+    )
+    argparser.add_argument("--tolerance", type=float, default=0.2)
+    args = argparser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    cases = []
+    largest = ""
+    for years in (int(y) for y in args.years.split(",")):
+        for events in (int(e) for e in args.events.split(",")):
+            print(
+                f"Benchmarking {events} events, {args.recurring} series, {years}y ...",
+                file=sys.stderr,
+            )
+            new_cases, ics = bench_calendar(events, args.recurring, years, args)
+            cases.extend(new_cases)
+            if len(ics) > len(largest):
+                largest = ics
+
+    if args.write_ics:
+        Path(args.write_ics).write_text(largest)
+
+    print_table(
+        cases,
+        ["name", "ics_bytes", "wall_seconds", "events_found", "peak_memory_bytes"],
+    )
+    output = write_results("calendar", cases, args.output)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare_results(cases, args.compare, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
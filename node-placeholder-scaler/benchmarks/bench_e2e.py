@@ -0,0 +1,126 @@
+"""
+End-to-end throughput and latency benchmark: the real scaler code talking
+HTTP to the in-process fake apiserver.
+
+Execute from node-placeholder-scaler/:
+    python benchmarks/bench_e2e.py
+    python benchmarks/bench_e2e.py --sizes 100 --cycles 10 --latency 0.005
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks._common import compare_results, print_table, write_results  # noqa: E402
+from benchmarks.bench_reconcile import _pool_configs, run_cycle  # noqa: E402
+from benchmarks.fake_apiserver import FakeApiServer  # noqa: E402
+from benchmarks.fake_cluster import ClusterSpec, make_cluster  # noqa: E402
+from kubernetes.config import kube_config  # noqa: E402
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def bench_size(nodes, args, kubeconfig_dir):
+    cluster = make_cluster(
+        ClusterSpec(nodes=nodes, pods_per_node=args.pods_per_node, pools=args.pools)
+    )
+    with FakeApiServer(cluster, latency=args.latency) as server:
+        kubeconfig = server.write_kubeconfig(
+            Path(kubeconfig_dir) / f"kubeconfig-{nodes}"
+        )
+        kube_config.KUBE_CONFIG_DEFAULT_LOCATION = str(kubeconfig)
+        pool_configs = _pool_configs(args.pools)
+        node_first_seen, node_last_above_threshold = {}, {}
+
+        run_cycle(pool_configs, node_first_seen, node_last_above_threshold)
+        server.request_log.clear()
+
+        cycle_seconds = []
+        for _ in range(args.cycles):
+            start = time.perf_counter()
+            run_cycle(pool_configs, node_first_seen, node_last_above_threshold)
+            cycle_seconds.append(time.perf_counter() - start)
+        requests = list(server.request_log)
+
+    latencies = sorted(r[3] for r in requests)
+    errors = sum(1 for r in requests if r[2] >= 400)
+    return {
+        "name": f"e2e_cycle[nodes={nodes}]",
+        "nodes": nodes,
+        "cycles": args.cycles,
+        "wall_seconds": round(statistics.median(cycle_seconds), 4),
+        "cycles_per_second": round(args.cycles / sum(cycle_seconds), 3),
+        "api_calls": len(requests) // args.cycles,
+        "api_errors": errors,
+        "request_p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "request_p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "request_p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument("--sizes", default="10,100,1000")
+    argparser.add_argument("--cycles", type=int, default=5)
+    argparser.add_argument("--pods-per-node", type=int, default=10)
+    argparser.add_argument("--pools", type=int, default=4)
+    argparser.add_argument(
+        "--latency", type=float, default=0.0, help="Added per-request server latency."
+    )
+    argparser.add_argument(
+        "--output", help="Results file (default: benchmarks/results/)"
+    )
+    argparser.add_argument(
+        "--compare", help="Baseline results file to compare against."
+    )
+    argparser.add_argument("--tolerance", type=float, default=0.2)
+    args = argparser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    os.environ.pop("KUBERNETES_SERVICE_HOST", None)
+
+    cases = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(s) for s in args.sizes.split(",")):
+            print(f"Benchmarking {size} nodes ...", file=sys.stderr)
+            cases.append(bench_size(size, args, tmp))
+
+    print_table(
+        cases,
+        [
+            "name",
+            "wall_seconds",
+            "cycles_per_second",
+            "api_calls",
+            "api_errors",
+            "request_p50_ms",
+            "request_p95_ms",
+            "request_p99_ms",
+        ],
+    )
+    output = write_results("e2e", cases, args.output)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare_results(cases, args.compare, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
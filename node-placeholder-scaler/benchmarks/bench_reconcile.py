@@ -0,0 +1,216 @@
+"""
+Benchmark get_usable_resources() and a full reconcile cycle against a
+synthetic cluster.
+
+Execute from node-placeholder-scaler/:
+    python benchmarks/bench_reconcile.py
+    python benchmarks/bench_reconcile.py --sizes 10,100 --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks._common import (  # noqa: E402
+    compare_results,
+    peak_memory,
+    print_table,
+    time_call,
+    write_results,
+)
+from benchmarks.fake_cluster import (  # noqa: E402
+    PLACEHOLDER_LABELS,
+    PLACEHOLDER_NAMESPACE,
+    POOL_LABEL_KEY,
+    ClusterSpec,
+    FakeCoreV1Api,
+    make_cluster,
+    pool_name,
+)
+from scaler import scaler  # noqa: E402
+
+LABEL_SELECTOR = ",".join(f"{k}={v}" for k, v in PLACEHOLDER_LABELS.items())
+
+PLACEHOLDER_TEMPLATE = {
+    "apiVersion": "apps/v1",
+    "kind": "Deployment",
+    "metadata": {"labels": dict(PLACEHOLDER_LABELS)},
+    "spec": {
+        "replicas": 0,
+        "selector": {"matchLabels": dict(PLACEHOLDER_LABELS)},
+        "template": {
+            "metadata": {"labels": dict(PLACEHOLDER_LABELS)},
+            "spec": {
+                "nodeSelector": {},
+                "containers": [
+                    {"name": "pause", "image": "registry.k8s.io/pause:3.10"}
+                ],
+            },
+        },
+    },
+}
+
+
+def _pool_configs(pools):
+    return {
+        pool_name(i): {
+            "nodeSelector": {POOL_LABEL_KEY: pool_name(i)},
+            "resources": {"requests": {"memory": "50Gi"}},
+            "replicas": 1,
+        }
+        for i in range(pools)
+    }
+
+
+def run_cycle(pool_configs, node_first_seen, node_last_above_threshold):
+    """One iteration of the body of scaler._run_cluster(), minus config/calendar I/O.
+
+    Like the scaler, it lists placeholder pods once for all pools and takes
+    cordons from the node list, rather than reading them node by node.
+    """
+    placeholder_pods = scaler.get_placeholder_pods(
+        PLACEHOLDER_NAMESPACE, LABEL_SELECTOR
+    )
+    usable_resources_result = scaler.get_usable_resources()
+    unschedulable_nodes = {
+        node
+        for pool_nodes in usable_resources_result.values()
+        for node, resources in pool_nodes.items()
+        if resources["unschedulable"]
+    }
+    for name, pool_config in pool_configs.items():
+        scaler._process_pool(
+            pool_name=name,
+            pool_config=pool_config,
+            pool_usable_resources=usable_resources_result.get(
+                pool_config["nodeSelector"][POOL_LABEL_KEY], {}
+            ),
+            replica_count_overrides={},
+            calendar_override_enabled=False,
+            placeholder_template=PLACEHOLDER_TEMPLATE,
+            namespace=PLACEHOLDER_NAMESPACE,
+            label_selector=LABEL_SELECTOR,
+            strategy="balanced",
+            cpu_threshold=0.2,
+            memory_threshold=0.2,
+            node_grace_period=0,
+            node_first_seen=node_first_seen,
+            node_last_above_threshold=node_last_above_threshold,
+            placeholder_pods=placeholder_pods,
+            unschedulable_nodes=unschedulable_nodes,
+        )
+
+
+def bench_size(nodes, args):
+    spec = ClusterSpec(
+        nodes=nodes,
+        pods_per_node=args.pods_per_node,
+        pools=args.pools,
+        placeholders_per_pool=args.placeholders_per_pool,
+        pending_placeholders_per_pool=args.pending_placeholders_per_pool,
+        seed=args.seed,
+    )
+    cluster = make_cluster(spec)
+    api = FakeCoreV1Api(cluster)
+    pool_configs = _pool_configs(args.pools)
+    cases = []
+
+    def cycle():
+        run_cycle(pool_configs, {}, {})
+
+    with patch.object(scaler, "_get_v1_client", return_value=api), patch.object(
+        scaler, "apply_deployment", return_value=None
+    ):
+        for name, fn in (
+            ("get_usable_resources", scaler.get_usable_resources),
+            ("reconcile_cycle", cycle),
+        ):
+            # Warm-up: lets the fake API encode and cache its responses so
+            # the timed run only pays the scaler's own costs.
+            fn()
+            api.reset_counters()
+            wall, _ = time_call(fn)
+            case = {
+                "name": f"{name}[nodes={nodes}]",
+                "nodes": nodes,
+                "pods": len(cluster["pods"]),
+                "wall_seconds": round(wall, 4),
+                "api_calls": sum(api.calls.values()),
+                "api_calls_by_method": dict(api.calls),
+                "bytes_decoded": api.bytes_decoded,
+            }
+            if args.repeat > 1:
+                best, _ = time_call(fn, repeat=args.repeat - 1)
+                case["wall_seconds"] = round(min(wall, best), 4)
+            if not args.no_memory:
+                case["peak_memory_bytes"] = peak_memory(fn)
+            cases.append(case)
+    return cases
+
+
+def main():
+    argparser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    argparser.add_argument("--sizes", default="10,100,1000,5000")
+    argparser.add_argument("--pods-per-node", type=int, default=10)
+    argparser.add_argument("--pools", type=int, default=4)
+    argparser.add_argument("--placeholders-per-pool", type=int, default=1)
+    argparser.add_argument("--pending-placeholders-per-pool", type=int, default=0)
+    argparser.add_argument("--seed", type=int, default=0)
+    argparser.add_argument(
+        "--repeat", type=int, default=1, help="Report the best of N timed runs."
+    )
+    argparser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Skip the (slower) tracemalloc pass that measures peak memory.",
+    )
+    argparser.add_argument(
+        "--output", help="Results file (default: benchmarks/results/)"
+    )
+    argparser.add_argument(
+        "--compare", help="Baseline results file to compare against."
+    )
+    argparser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed fractional growth of a metric before --compare fails.",
+    )
+    args = argparser.parse_args()
+
+    # The scaler logs several lines per node; keep that out of the timings.
+    logging.basicConfig(level=logging.WARNING)
+
+    cases = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"Benchmarking {size} nodes ...", file=sys.stderr)
+        cases.extend(bench_size(size, args))
+
+    print_table(
+        cases,
+        [
+            "name",
+            "pods",
+            "wall_seconds",
+            "api_calls",
+            "bytes_decoded",
+            "peak_memory_bytes",
+        ],
+    )
+    output = write_results("reconcile", cases, args.output)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        regressions = compare_results(cases, args.compare, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
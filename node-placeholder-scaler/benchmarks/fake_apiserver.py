@@ -0,0 +1,660 @@
+"""
+In-process fake Kubernetes API server for offline end-to-end tests.
+
+Serves Nodes, Pods, Deployments and Leases over real HTTP so the scaler can be pointed
+at it with a kubeconfig and exercise the generated client end to end.
+Supported:
+
+- list with label/field selectors and limit/continue pagination
+- watch streams (?watch=true) with resourceVersion resume
+- get/create/replace/delete, with resourceVersion conflicts (409) on replace
+- server-side apply (application/apply-patch+yaml), JSON merge patch and
+  strategic merge patch (treated as a merge patch) on Deployments
+- the Deployment /scale subresource
+
+A tiny "controller" keeps one Pod per Deployment replica and, if enabled,
+binds new Pods to a matching node so placeholder positions can be observed.
+
+Run standalone to point a real scaler at it:
+    python -m benchmarks.fake_apiserver --nodes 100 --kubeconfig /tmp/kubeconfig
+"""
+
+import argparse
+import base64
+import copy
+import datetime
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from ruamel.yaml import YAML
+
+from .fake_cluster import (
+    ClusterSpec,
+    make_cluster,
+    matches_field_selector,
+    matches_label_selector,
+    parse_label_selector,
+)
+
+yaml = YAML(typ="safe")
+
+# (api prefix, plural) -> (kind, namespaced)
+RESOURCES = {
+    ("api/v1", "nodes"): ("Node", False),
+    ("api/v1", "pods"): ("Pod", True),
+    ("apis/apps/v1", "deployments"): ("Deployment", True),
+    ("apis/coordination.k8s.io/v1", "leases"): ("Lease", True),
+}
+
+_PATH_RE = re.compile(
+    r"^/(?P<prefix>api/v1|apis/[^/]+/[^/]+)"
+    r"(?:/namespaces/(?P<namespace>[^/]+))?"
+    r"/(?P<plural>[a-z]+)"
+    r"(?:/(?P<name>[^/]+))?"
+    r"(?:/(?P<subresource>scale))?$"
+)
+
+
+class StatusError(Exception):
+    def __init__(self, code, reason, message):
+        super().__init__(message)
+        self.code = code
+        self.reason = reason
+        self.message = message
+
+    def to_status(self):
+        return {
+            "apiVersion": "v1",
+            "kind": "Status",
+            "status": "Failure",
+            "message": self.message,
+            "reason": self.reason,
+            "code": self.code,
+        }
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def merge_patch(target, patch):
+    """RFC 7386 JSON merge patch."""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = copy.deepcopy(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+class ObjectStore:
+    """Versioned object storage with an event log for watches."""
+
+    def __init__(self, max_events=100000):
+        self._objects = {}
+        self._events = []
+        self._max_events = max_events
+        self._rv = 0
+        self._cond = threading.Condition()
+        self.closed = False
+
+    @property
+    def resource_version(self):
+        return self._rv
+
+    def _record(self, event_type, plural, obj):
+        self._rv += 1
+        obj["metadata"]["resourceVersion"] = str(self._rv)
+        self._events.append((self._rv, event_type, plural, copy.deepcopy(obj)))
+        if len(self._events) > self._max_events:
+            del self._events[: len(self._events) - self._max_events]
+        self._cond.notify_all()
+
+    def get(self, plural, namespace, name):
+        with self._cond:
+            obj = self._objects.get((plural, namespace, name))
+            return copy.deepcopy(obj) if obj is not None else None
+
+    def list(self, plural, namespace=None):
+        with self._cond:
+            items = [
+                copy.deepcopy(obj)
+                for (p, ns, _), obj in sorted(self._objects.items())
+                if p == plural and (namespace is None or ns == namespace)
+            ]
+            return items, self._rv
+
+    def put(self, plural, obj):
+        """Create or replace an object; returns the stored copy.
+
+        If obj carries a resourceVersion that no longer matches the stored
+        object, the write is rejected with 409 Conflict, as a real apiserver
+        does for updates.
+        """
+        obj = copy.deepcopy(obj)
+        meta = obj.setdefault("metadata", {})
+        key = (plural, meta.get("namespace"), meta["name"])
+        with self._cond:
+            existing = self._objects.get(key)
+            expected_rv = meta.get("resourceVersion")
+            if (
+                existing is not None
+                and expected_rv
+                and expected_rv != existing["metadata"]["resourceVersion"]
+            ):
+                raise StatusError(
+                    409,
+                    "Conflict",
+                    f'Operation cannot be fulfilled on {plural} "{meta["name"]}": '
+                    "the object has been modified",
+                )
+            if existing is None:
+                meta.setdefault(
+                    "uid", f"uid-{plural}-{meta.get('namespace')}-{meta['name']}"
+                )
+                meta.setdefault("creationTimestamp", _now())
+                meta.setdefault("generation", 1)
+                event_type = "ADDED"
+            else:
+                meta["uid"] = existing["metadata"]["uid"]
+                meta["creationTimestamp"] = existing["metadata"]["creationTimestamp"]
+                generation = existing["metadata"].get("generation", 1)
+                if obj.get("spec") != existing.get("spec"):
+                    generation += 1
+                meta["generation"] = generation
+                event_type = "MODIFIED"
+            self._objects[key] = obj
+            self._record(event_type, plural, obj)
+            return copy.deepcopy(obj)
+
+    def delete(self, plural, namespace, name):
+        with self._cond:
+            obj = self._objects.pop((plural, namespace, name), None)
+            if obj is not None:
+                self._record("DELETED", plural, obj)
+            return obj
+
+    def events_since(self, rv, timeout):
+        """Return events newer than rv, waiting up to `timeout` seconds for one."""
+        with self._cond:
+            if self._events and rv < self._events[0][0] - 1:
+                raise StatusError(410, "Expired", f"too old resource version: {rv}")
+            if not any(e[0] > rv for e in self._events[-1:]):
+                self._cond.wait(timeout)
+            return [e for e in self._events if e[0] > rv]
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class FakeApiServer:
+    """A fake apiserver listening on 127.0.0.1 on an ephemeral port."""
+
+    def __init__(
+        self, cluster=None, latency=0.0, schedule_pods=True, max_watch_seconds=300
+    ):
+        self.store = ObjectStore()
+        self.latency = latency
+        self.schedule_pods = schedule_pods
+        self.max_watch_seconds = max_watch_seconds
+        self.request_log = []
+        self._log_lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+        if cluster:
+            for node in cluster["nodes"]:
+                self.store.put("nodes", node)
+            for pod in cluster["pods"]:
+                self.store.put("pods", pod)
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self):
+        server = self
+
+        class Handler(_Handler):
+            api = server
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.store.close()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def kubeconfig(self, namespace="default"):
+        return {
+            "apiVersion": "v1",
+            "kind": "Config",
+            "clusters": [{"name": "fake", "cluster": {"server": self.url}}],
+            "users": [{"name": "fake", "user": {"token": "fake-token"}}],
+            "contexts": [
+                {
+                    "name": "fake",
+                    "context": {
+                        "cluster": "fake",
+                        "user": "fake",
+                        "namespace": namespace,
+                    },
+                }
+            ],
+            "current-context": "fake",
+        }
+
+    def write_kubeconfig(self, path, namespace="default"):
+        with open(path, "w") as f:
+            yaml.dump(self.kubeconfig(namespace), f)
+        return path
+
+    def log_request(self, method, path, status, seconds):
+        with self._log_lock:
+            self.request_log.append((method, path, status, seconds))
+
+    # -- fixtures ----------------------------------------------------------
+
+    def add_node(self, node):
+        return self.store.put("nodes", node)
+
+    def add_pod(self, pod):
+        return self.store.put("pods", pod)
+
+    def delete_pod(self, namespace, name):
+        return self.store.delete("pods", namespace, name)
+
+    def set_pod_phase(self, namespace, name, phase, node_name=None):
+        pod = self.store.get("pods", namespace, name)
+        pod.setdefault("status", {})["phase"] = phase
+        pod["spec"]["nodeName"] = node_name
+        return self.store.put("pods", pod)
+
+    # -- deployment controller ---------------------------------------------
+
+    def _sync_deployment_pods(self, deployment):
+        """Keep one pod per replica, named <deployment>-<index>."""
+        meta = deployment["metadata"]
+        namespace, name = meta["namespace"], meta["name"]
+        replicas = deployment.get("spec", {}).get("replicas", 1) or 0
+        template = deployment.get("spec", {}).get("template", {})
+        pods, _ = self.store.list("pods", namespace)
+        owned = [p for p in pods if p["metadata"]["name"].startswith(f"{name}-")]
+        for pod in owned[replicas:]:
+            self.store.delete("pods", namespace, pod["metadata"]["name"])
+        existing = {p["metadata"]["name"] for p in owned}
+        for i in range(replicas):
+            pod_name = f"{name}-{i}"
+            if pod_name in existing:
+                continue
+            spec = copy.deepcopy(template.get("spec", {}))
+            spec["nodeName"] = self._pick_node(namespace, template, spec)
+            self.store.put(
+                "pods",
+                {
+                    "apiVersion": "v1",
+                    "kind": "Pod",
+                    "metadata": {
+                        "name": pod_name,
+                        "namespace": namespace,
+                        "labels": copy.deepcopy(
+                            template.get("metadata", {}).get("labels", {})
+                        ),
+                    },
+                    "spec": spec,
+                    "status": {"phase": "Running" if spec["nodeName"] else "Pending"},
+                },
+            )
+        status = {"replicas": replicas, "readyReplicas": replicas}
+        stored = self.store.get("deployments", namespace, name)
+        if stored is not None and stored.get("status") != status:
+            stored["status"] = status
+            self.store.put("deployments", stored)
+
+    def _pick_node(self, namespace, template, spec):
+        """Bind to the first schedulable matching node without a sibling pod."""
+        if not self.schedule_pods:
+            return None
+        selector = spec.get("nodeSelector") or {}
+        labels = template.get("metadata", {}).get("labels", {})
+        requirements = [(k, "=", v) for k, v in labels.items()]
+        pods, _ = self.store.list("pods", namespace)
+        occupied = {
+            p["spec"].get("nodeName")
+            for p in pods
+            if matches_label_selector(p, requirements)
+        }
+        nodes, _ = self.store.list("nodes")
+        for node in nodes:
+            node_labels = node["metadata"].get("labels") or {}
+            if node.get("spec", {}).get("unschedulable"):
+                continue
+            if node["metadata"]["name"] in occupied:
+                continue
+            if all(node_labels.get(k) == v for k, v in selector.items()):
+                return node["metadata"]["name"]
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    api = None  # set by FakeApiServer.start()
+
+    def log_message(self, format, *args):
+        pass
+
+    # -- plumbing ----------------------------------------------------------
+
+    def _send_json(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return code
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0]
+        if not raw:
+            return content_type, None
+        if content_type == "application/apply-patch+yaml":
+            return content_type, yaml.load(raw.decode())
+        return content_type, json.loads(raw)
+
+    def _dispatch(self, method):
+        start = time.perf_counter()
+        parsed = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        if self.api.latency:
+            time.sleep(self.api.latency)
+        try:
+            match = _PATH_RE.match(parsed.path)
+            if not match or (match["prefix"], match["plural"]) not in RESOURCES:
+                raise StatusError(404, "NotFound", f"no route for {parsed.path}")
+            code = self._handle(method, match.groupdict(), query)
+        except StatusError as e:
+            code = self._send_json(e.code, e.to_status())
+        except (BrokenPipeError, ConnectionResetError):
+            code = 499
+        self.api.log_request(method, parsed.path, code, time.perf_counter() - start)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    # -- handlers ----------------------------------------------------------
+
+    def _handle(self, method, route, query):
+        kind, namespaced = RESOURCES[(route["prefix"], route["plural"])]
+        plural, namespace, name = route["plural"], route["namespace"], route["name"]
+        if namespaced is False:
+            namespace = None
+        store = self.api.store
+
+        if name is None:
+            if method == "GET" and query.get("watch", "").lower() in ("true", "1"):
+                return self._watch(plural, namespace, query)
+            if method == "GET":
+                return self._list(route, kind, plural, namespace, query)
+            if method == "POST":
+                _, body = self._read_body()
+                body.setdefault("metadata", {})["namespace"] = namespace
+                if store.get(plural, namespace, body["metadata"]["name"]):
+                    raise StatusError(409, "AlreadyExists", "object already exists")
+                return self._write(201, plural, body)
+            raise StatusError(405, "MethodNotAllowed", method)
+
+        existing = store.get(plural, namespace, name)
+        if route["subresource"] == "scale":
+            return self._scale(method, namespace, name, existing)
+        if method == "GET":
+            if existing is None:
+                raise StatusError(404, "NotFound", f'{plural} "{name}" not found')
+            return self._send_json(200, existing)
+        if method == "DELETE":
+            if store.delete(plural, namespace, name) is None:
+                raise StatusError(404, "NotFound", f'{plural} "{name}" not found')
+            if plural == "deployments":
+                self.api._sync_deployment_pods(
+                    {
+                        "metadata": {"namespace": namespace, "name": name},
+                        "spec": {"replicas": 0},
+                    }
+                )
+            return self._send_json(200, {"kind": "Status", "status": "Success"})
+        if method == "PUT":
+            _, body = self._read_body()
+            if existing is None:
+                raise StatusError(404, "NotFound", f'{plural} "{name}" not found')
+            body["metadata"]["namespace"] = namespace
+            return self._write(200, plural, body)
+        if method == "PATCH":
+            content_type, body = self._read_body()
+            if content_type == "application/apply-patch+yaml":
+                if "fieldManager" not in query:
+                    raise StatusError(
+                        422, "Invalid", "fieldManager is required for apply requests"
+                    )
+                if existing is None:
+                    body.setdefault("metadata", {})["namespace"] = namespace
+                    return self._write(201, plural, body)
+            elif content_type not in (
+                "application/merge-patch+json",
+                "application/strategic-merge-patch+json",
+            ):
+                raise StatusError(
+                    415,
+                    "UnsupportedMediaType",
+                    f"unsupported patch type {content_type}",
+                )
+            if existing is None:
+                raise StatusError(404, "NotFound", f'{plural} "{name}" not found')
+            return self._write(200, plural, merge_patch(existing, body))
+        raise StatusError(405, "MethodNotAllowed", method)
+
+    def _store(self, plural, obj):
+        if plural == "deployments":
+            spec = obj.get("spec") or {}
+            for field in ("selector", "template"):
+                if not spec.get(field):
+                    raise StatusError(422, "Invalid", f"spec.{field}: Required value")
+        stored = self.api.store.put(plural, obj)
+        if plural == "deployments":
+            self.api._sync_deployment_pods(stored)
+            meta = stored["metadata"]
+            stored = self.api.store.get(plural, meta["namespace"], meta["name"])
+        return stored
+
+    def _write(self, code, plural, obj):
+        return self._send_json(code, self._store(plural, obj))
+
+    def _scale(self, method, namespace, name, deployment):
+        if deployment is None:
+            raise StatusError(404, "NotFound", f'deployments.apps "{name}" not found')
+        if method in ("PATCH", "PUT"):
+            _, body = self._read_body()
+            replicas = (body or {}).get("spec", {}).get("replicas")
+            if replicas is not None:
+                deployment["spec"]["replicas"] = replicas
+                deployment = self._store("deployments", deployment)
+        elif method != "GET":
+            raise StatusError(405, "MethodNotAllowed", method)
+        replicas = deployment["spec"].get("replicas", 1)
+        return self._send_json(
+            200,
+            {
+                "apiVersion": "autoscaling/v1",
+                "kind": "Scale",
+                "metadata": {
+                    "name": name,
+                    "namespace": namespace,
+                    "resourceVersion": deployment["metadata"]["resourceVersion"],
+                },
+                "spec": {"replicas": replicas},
+                "status": {"replicas": deployment.get("status", {}).get("replicas", 0)},
+            },
+        )
+
+    @staticmethod
+    def _filter(items, query):
+        requirements = parse_label_selector(query.get("labelSelector"))
+        field_selector = query.get("fieldSelector")
+        return [
+            o
+            for o in items
+            if matches_label_selector(o, requirements)
+            and matches_field_selector(o, field_selector)
+        ]
+
+    def _list(self, route, kind, plural, namespace, query):
+        items, rv = self.api.store.list(plural, namespace)
+        items = self._filter(items, query)
+        offset = 0
+        if query.get("continue"):
+            token = json.loads(base64.urlsafe_b64decode(query["continue"]))
+            offset, rv = token["offset"], token["rv"]
+        metadata = {"resourceVersion": str(rv)}
+        limit = int(query.get("limit") or 0)
+        if limit:
+            page = items[offset : offset + limit]
+            if offset + limit < len(items):
+                metadata["continue"] = base64.urlsafe_b64encode(
+                    json.dumps({"offset": offset + limit, "rv": rv}).encode()
+                ).decode()
+                metadata["remainingItemCount"] = len(items) - offset - limit
+            items = page
+        api_version = (
+            route["prefix"].split("/", 1)[1]
+            if route["prefix"].startswith("apis/")
+            else "v1"
+        )
+        return self._send_json(
+            200,
+            {
+                "apiVersion": api_version,
+                "kind": f"{kind}List",
+                "metadata": metadata,
+                "items": items,
+            },
+        )
+
+    def _watch(self, plural, namespace, query):
+        store = self.api.store
+        timeout = min(
+            float(query.get("timeoutSeconds") or self.api.max_watch_seconds),
+            self.api.max_watch_seconds,
+        )
+        deadline = time.monotonic() + timeout
+        requirements = parse_label_selector(query.get("labelSelector"))
+        field_selector = query.get("fieldSelector")
+
+        def wanted(obj):
+            return (
+                (namespace is None or obj["metadata"].get("namespace") == namespace)
+                and matches_label_selector(obj, requirements)
+                and matches_field_selector(obj, field_selector)
+            )
+
+        rv_param = query.get("resourceVersion")
+        initial = []
+        if rv_param in (None, "", "0"):
+            items, rv = store.list(plural, namespace)
+            initial = [("ADDED", o) for o in items if wanted(o)]
+        else:
+            rv = int(rv_param)
+            store.events_since(rv, 0)  # raises 410 if expired
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def send(event_type, obj):
+            line = json.dumps({"type": event_type, "object": obj}).encode() + b"\n"
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+
+        for event_type, obj in initial:
+            send(event_type, obj)
+        while not store.closed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            for event_rv, event_type, event_plural, obj in store.events_since(
+                rv, min(remaining, 0.5)
+            ):
+                rv = event_rv
+                if event_plural == plural and wanted(obj):
+                    send(event_type, obj)
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+        return 200
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Run a fake Kubernetes API server.")
+    argparser.add_argument("--nodes", type=int, default=100)
+    argparser.add_argument("--pods-per-node", type=int, default=10)
+    argparser.add_argument("--pools", type=int, default=4)
+    argparser.add_argument("--latency", type=float, default=0.0)
+    argparser.add_argument("--kubeconfig", default="fake-kubeconfig.yaml")
+    argparser.add_argument("--namespace", default="node-placeholder")
+    args = argparser.parse_args()
+
+    cluster = make_cluster(
+        ClusterSpec(
+            nodes=args.nodes, pods_per_node=args.pods_per_node, pools=args.pools
+        )
+    )
+    server = FakeApiServer(cluster, latency=args.latency).start()
+    server.write_kubeconfig(args.kubeconfig, args.namespace)
+    print(f"Serving {args.nodes} nodes at {server.url}")
+    print(
+        f"Wrote kubeconfig to {args.kubeconfig}; run the scaler with KUBECONFIG={args.kubeconfig}"
+    )
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
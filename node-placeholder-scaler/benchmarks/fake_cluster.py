@@ -0,0 +1,383 @@
+"""
+Synthetic cluster generator and an in-memory stand-in for CoreV1Api.
+
+The fake API returns real kubernetes client model objects, decoded from JSON
+bytes the same way the generated client does, so benchmarks pay a realistic
+deserialization cost and can report how many bytes were decoded per call.
+"""
+
+import datetime
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass
+
+from kubernetes.client import ApiClient
+from kubernetes.client.exceptions import ApiException
+
+POOL_LABEL_KEY = "hub.jupyter.org/pool-name"
+PLACEHOLDER_NAMESPACE = "node-placeholder"
+PLACEHOLDER_LABELS = {"app": "node-placeholder-scaler", "component": "placeholder"}
+ZONES = ["us-central1-a", "us-central1-b", "us-central1-c"]
+
+_EPOCH = datetime.datetime(2025, 1, 6, 8, 0, tzinfo=datetime.timezone.utc)
+
+
+@dataclass
+class ClusterSpec:
+    """Shape of a synthetic cluster."""
+
+    nodes: int = 100
+    pods_per_node: int = 10
+    pools: int = 4
+    # Running placeholder pods per pool, each on its own node.
+    placeholders_per_pool: int = 1
+    # Pending (unscheduled) placeholder pods per pool.
+    pending_placeholders_per_pool: int = 0
+    # Fraction of nodes that are cordoned.
+    unschedulable_fraction: float = 0.02
+    node_cpu: str = "7910m"
+    node_memory: str = "60055524Ki"
+    instance_type: str = "n2-highmem-8"
+    seed: int = 0
+
+
+def pool_name(index):
+    return f"pool-{index}"
+
+
+def _timestamp(offset_seconds):
+    ts = _EPOCH + datetime.timedelta(seconds=offset_seconds)
+    return ts.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _node(name, pool, zone, spec, unschedulable, created_offset):
+    return {
+        "apiVersion": "v1",
+        "kind": "Node",
+        "metadata": {
+            "name": name,
+            "uid": f"uid-{name}",
+            "resourceVersion": "1",
+            "creationTimestamp": _timestamp(created_offset),
+            "labels": {
+                POOL_LABEL_KEY: pool,
+                "kubernetes.io/hostname": name,
+                "node.kubernetes.io/instance-type": spec.instance_type,
+                "topology.kubernetes.io/zone": zone,
+            },
+        },
+        "spec": {"unschedulable": unschedulable},
+        "status": {
+            "allocatable": {
+                "cpu": spec.node_cpu,
+                "memory": spec.node_memory,
+                "pods": "110",
+            },
+            "capacity": {"cpu": "8", "memory": "65842404Ki", "pods": "110"},
+            "conditions": [
+                {
+                    "type": "Ready",
+                    "status": "True",
+                    "lastTransitionTime": _timestamp(created_offset + 60),
+                }
+            ],
+        },
+    }
+
+
+def _pod(
+    name,
+    namespace,
+    node_name,
+    labels,
+    requests,
+    phase="Running",
+    node_selector=None,
+    container_name="notebook",
+    created_offset=0,
+    owner_kind=None,
+):
+    pod = {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": f"uid-{namespace}-{name}",
+            "resourceVersion": "1",
+            "creationTimestamp": _timestamp(created_offset),
+            "labels": labels,
+        },
+        "spec": {
+            "nodeName": node_name,
+            "nodeSelector": node_selector,
+            "containers": [
+                {
+                    "name": container_name,
+                    "image": "registry.example/image:latest",
+                    "resources": {"requests": requests},
+                }
+            ],
+        },
+        "status": {"phase": phase},
+    }
+    if owner_kind:
+        pod["metadata"]["ownerReferences"] = [
+            {
+                "apiVersion": "apps/v1",
+                "kind": owner_kind,
+                "name": labels["k8s-app"],
+                "uid": f"uid-{owner_kind}-{labels['k8s-app']}",
+            }
+        ]
+    return pod
+
+
+def make_cluster(spec: ClusterSpec):
+    """Build a synthetic cluster.
+
+    Returns a dict with "nodes" and "pods", each a list of Kubernetes objects
+    in their JSON (camelCase) form.  Nodes are spread round-robin across pools
+    and zones; every node runs a couple of DaemonSet-style system pods plus
+    user pods that fill it to a random utilization.
+    """
+    rng = random.Random(spec.seed)
+    nodes = []
+    pods = []
+    nodes_by_pool = {pool_name(i): [] for i in range(spec.pools)}
+
+    for i in range(spec.nodes):
+        pool = pool_name(i % spec.pools)
+        name = f"node-{i:05d}"
+        zone = ZONES[i % len(ZONES)]
+        unschedulable = rng.random() < spec.unschedulable_fraction
+        nodes.append(_node(name, pool, zone, spec, unschedulable, i))
+        nodes_by_pool[pool].append(name)
+
+        pods.append(
+            _pod(
+                f"kube-proxy-{name}",
+                "kube-system",
+                name,
+                {"k8s-app": "kube-proxy"},
+                {"cpu": "100m", "memory": "128Mi"},
+                container_name="kube-proxy",
+                owner_kind="DaemonSet",
+            )
+        )
+        pods.append(
+            _pod(
+                f"fluentbit-{name}",
+                "kube-system",
+                name,
+                {"k8s-app": "fluentbit"},
+                {"cpu": "100m", "memory": "200Mi"},
+                container_name="fluentbit",
+                owner_kind="DaemonSet",
+            )
+        )
+
+        # Fill the node to a random utilization with user pods.
+        utilization = rng.random()
+        user_pods = int(round(spec.pods_per_node * utilization))
+        for j in range(user_pods):
+            pods.append(
+                _pod(
+                    f"jupyter-user-{i}-{j}",
+                    "jupyterhub",
+                    name,
+                    {"component": "singleuser-server"},
+                    {"cpu": "500m", "memory": "4Gi"},
+                    node_selector={POOL_LABEL_KEY: pool},
+                    created_offset=i * 10 + j,
+                )
+            )
+
+    for pool, pool_nodes in nodes_by_pool.items():
+        node_selector = {POOL_LABEL_KEY: pool}
+        hosts = pool_nodes[: spec.placeholders_per_pool]
+        for k, host in enumerate(hosts):
+            pods.append(
+                _pod(
+                    f"{pool}-placeholder-{k}",
+                    PLACEHOLDER_NAMESPACE,
+                    host,
+                    dict(PLACEHOLDER_LABELS),
+                    {"memory": "50Gi"},
+                    node_selector=node_selector,
+                    container_name="pause",
+                )
+            )
+        for k in range(spec.pending_placeholders_per_pool):
+            pods.append(
+                _pod(
+                    f"{pool}-placeholder-pending-{k}",
+                    PLACEHOLDER_NAMESPACE,
+                    None,
+                    dict(PLACEHOLDER_LABELS),
+                    {"memory": "50Gi"},
+                    phase="Pending",
+                    node_selector=node_selector,
+                    container_name="pause",
+                )
+            )
+
+    return {"nodes": nodes, "pods": pods}
+
+
+def parse_label_selector(selector):
+    """Parse an equality-based label selector ("a=b,c!=d") into (key, op, value) tuples."""
+    if not selector:
+        return []
+    requirements = []
+    for term in selector.split(","):
+        term = term.strip()
+        if "!=" in term:
+            key, value = term.split("!=", 1)
+            requirements.append((key.strip(), "!=", value.strip()))
+        elif "==" in term:
+            key, value = term.split("==", 1)
+            requirements.append((key.strip(), "=", value.strip()))
+        elif "=" in term:
+            key, value = term.split("=", 1)
+            requirements.append((key.strip(), "=", value.strip()))
+        else:
+            requirements.append((term, "exists", None))
+    return requirements
+
+
+def matches_label_selector(obj, requirements):
+    labels = obj["metadata"].get("labels") or {}
+    for key, op, value in requirements:
+        if op == "=" and labels.get(key) != value:
+            return False
+        if op == "!=" and labels.get(key) == value:
+            return False
+        if op == "exists" and key not in labels:
+            return False
+    return True
+
+
+def matches_field_selector(obj, selector):
+    """Support the handful of field selectors the scaler and tools use."""
+    if not selector:
+        return True
+    for term in selector.split(","):
+        negate = "!=" in term
+        field, value = term.split("!=" if negate else "=", 1)
+        if field == "spec.nodeName":
+            actual = obj["spec"].get("nodeName") or ""
+        elif field == "metadata.name":
+            actual = obj["metadata"]["name"]
+        elif field == "metadata.namespace":
+            actual = obj["metadata"].get("namespace") or ""
+        elif field == "status.phase":
+            actual = (obj.get("status") or {}).get("phase") or ""
+        else:
+            raise ValueError(f"Unsupported field selector: {field}")
+        if (actual == value) == negate:
+            return False
+    return True
+
+
+class _Response:
+    """Just enough of a RESTResponse for ApiClient.deserialize()."""
+
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeCoreV1Api:
+    """In-memory CoreV1Api covering the calls the scaler makes.
+
+    Records the number of calls per method in `calls` and the total size of
+    the JSON payloads it decoded in `bytes_decoded`.
+    """
+
+    def __init__(self, cluster):
+        self.cluster = cluster
+        self.calls = Counter()
+        self.bytes_decoded = 0
+        self._api_client = ApiClient()
+        self._encoded = {}
+
+    def reset_counters(self):
+        self.calls.clear()
+        self.bytes_decoded = 0
+
+    def _respond(self, method, cache_key, build, response_type):
+        self.calls[method] += 1
+        data = self._encoded.get(cache_key)
+        if data is None:
+            # Encoding is the apiserver's cost, not the scaler's, so it is
+            # done once per distinct request and cached.
+            data = json.dumps(build()).encode()
+            self._encoded[cache_key] = data
+        self.bytes_decoded += len(data)
+        return self._api_client.deserialize(_Response(data), response_type)
+
+    @staticmethod
+    def _list(kind, items):
+        return {
+            "apiVersion": "v1",
+            "kind": kind,
+            "metadata": {"resourceVersion": "1"},
+            "items": items,
+        }
+
+    def _select_pods(self, namespace, label_selector, field_selector):
+        requirements = parse_label_selector(label_selector)
+        return [
+            p
+            for p in self.cluster["pods"]
+            if (namespace is None or p["metadata"]["namespace"] == namespace)
+            and matches_label_selector(p, requirements)
+            and matches_field_selector(p, field_selector)
+        ]
+
+    def list_node(self, label_selector=None, field_selector=None, **kwargs):
+        def build():
+            requirements = parse_label_selector(label_selector)
+            items = [
+                n
+                for n in self.cluster["nodes"]
+                if matches_label_selector(n, requirements)
+                and matches_field_selector(n, field_selector)
+            ]
+            return self._list("NodeList", items)
+
+        key = ("list_node", label_selector, field_selector)
+        return self._respond("list_node", key, build, "V1NodeList")
+
+    def read_node(self, name, **kwargs):
+        def build():
+            for n in self.cluster["nodes"]:
+                if n["metadata"]["name"] == name:
+                    return n
+            raise ApiException(status=404, reason="Not Found")
+
+        return self._respond("read_node", ("read_node", name), build, "V1Node")
+
+    def list_pod_for_all_namespaces(
+        self, label_selector=None, field_selector=None, **kwargs
+    ):
+        def build():
+            return self._list(
+                "PodList", self._select_pods(None, label_selector, field_selector)
+            )
+
+        key = ("list_pod_for_all_namespaces", label_selector, field_selector)
+        return self._respond("list_pod_for_all_namespaces", key, build, "V1PodList")
+
+    def list_namespaced_pod(
+        self, namespace, label_selector=None, field_selector=None, **kwargs
+    ):
+        def build():
+            return self._list(
+                "PodList",
+                self._select_pods(namespace, label_selector, field_selector),
+            )
+
+        key = ("list_namespaced_pod", namespace, label_selector, field_selector)
+        return self._respond("list_namespaced_pod", key, build, "V1PodList")
@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
+import concurrent.futures
 import datetime
 import logging
+import multiprocessing
 import re
+import threading
+import time
 import zoneinfo
+from typing import NamedTuple
 
 import niquests as requests
 from ical.calendar_stream import IcsCalendarStream
+from ruamel.yaml import YAML
 
+yaml = YAML(typ="safe")
 log = logging.getLogger(__name__)
 
 
@@ -41,28 +48,40 @@ def _get_cal_tz(calendar):
         return zoneinfo.ZoneInfo("UTC")
 
 
-def get_calendar(url: str):
+def read_calendar(url: str, timeout=None):
     """
-    Get a calendar from local file or URL.
+    Read the ICS text of a calendar from local file or URL.
 
-    Returns an ical.Calendar object.
+    timeout is in seconds, for HTTP URLs.  Returns None on an intermittent
+    500 error from the server.
     """
     if url.startswith("file://"):
         path = url.split("://", 1)[1]
         with open(path) as f:
-            calendar = IcsCalendarStream.calendar_from_ics(f.read())
+            return f.read()
     elif "://" not in url:
-        path = url
-        with open(path) as f:
-            calendar = IcsCalendarStream.calendar_from_ics(f.read())
-    else:
-        r = requests.get(url)
-        if r.status_code == 500:
-            logging.info(f"Received intermittent 500 error from: {url}")
-            return None
-        else:
-            r.raise_for_status()
-        calendar = IcsCalendarStream.calendar_from_ics(r.text)
+        with open(url) as f:
+            return f.read()
+    r = requests.get(url, timeout=timeout)
+    if r.status_code == 500:
+        logging.info(f"Received intermittent 500 error from: {url}")
+        return None
+    r.raise_for_status()
+    return r.text
+
+
+def get_calendar(url: str, timeout=None):
+    """
+    Get a calendar from local file or URL.
+
+    timeout is in seconds, for HTTP URLs.
+
+    Returns an ical.Calendar object.
+    """
+    ics = read_calendar(url, timeout=timeout)
+    if ics is None:
+        return None
+    calendar = IcsCalendarStream.calendar_from_ics(ics)
 
     if calendar:
         return calendar
@@ -71,6 +90,277 @@ def get_calendar(url: str):
         return None
 
 
+def event_replica_counts(event):
+    """
+    Parse the {pool: count} in a calendar event's description.
+
+    Counts that aren't non-negative integers are logged and left out.
+    """
+    if not event.description:
+        log.error(f"Event has no description: {_event_repr(event)}")
+        return {}
+    pools_replica_config = None
+    try:
+        pools_replica_config = yaml.load(event.description)
+    except Exception as e:
+        log.error(f"Caught unhandled exception parsing event description:\n{e}")
+        log.error(f"Error in parsing description of {_event_repr(event)}")
+        log.error(f"{event.description=}")
+    if pools_replica_config is None:
+        log.error(f"No description in event {_event_repr(event)}")
+        return {}
+    elif isinstance(pools_replica_config, str):
+        log.error("Event description not parsed as dictionary.")
+        log.error(f"{event.description=}")
+        return {}
+    counts = {}
+    for pool_name, count in pools_replica_config.items():
+        if not isinstance(count, int):
+            log.info(f"Count {count} for pool {pool_name} not an integer.")
+            continue
+        if count < 0:
+            log.error(f"Count {count} for pool {pool_name} is negative; skipping.")
+            continue
+        counts[pool_name] = count
+    return counts
+
+
+class Occurrence(NamedTuple):
+    """One occurrence of a calendar event, small enough to pass between processes."""
+
+    start: float  # epoch seconds
+    end: float
+    label: str  # _event_repr() of the event, for logging
+    counts: dict  # {pool: count} from the description
+
+
+class OccurrenceCalendar(NamedTuple):
+    """The occurrences of a calendar's events between two instants."""
+
+    occurrences: list
+    start: float
+    end: float
+
+    def at(self, time=None):
+        """The occurrences happening at a datetime (default now)."""
+        instant = (time or datetime.datetime.now(datetime.timezone.utc)).timestamp()
+        if not self.start <= instant < self.end:
+            log.warning("Looking up calendar events outside the range expanded")
+        return [o for o in self.occurrences if o.start <= instant < o.end]
+
+
+def parse_occurrences(ics, start, end):
+    """
+    Parse ICS text and expand its events that overlap [start, end).
+
+    start and end are aware datetimes.  Runs in a worker process (see
+    OccurrenceReader), so everything returned can be pickled.
+    """
+    calendar = IcsCalendarStream.calendar_from_ics(ics)
+    occurrences = []
+    for event in calendar.timeline.overlapping(start, end):
+        if event.description:
+            event.description = re.sub("<[^<]+?>", "", event.description)
+        occurrences.append(
+            Occurrence(
+                event.start_datetime.timestamp(),
+                event.end_datetime.timestamp(),
+                _event_repr(event),
+                event_replica_counts(event),
+            )
+        )
+    return OccurrenceCalendar(occurrences, start.timestamp(), end.timestamp())
+
+
+class OccurrenceReader:
+    """Fetch a calendar and expand its occurrences in a worker process.
+
+    Parsing and expanding a multi-megabyte ICS file takes seconds of CPU
+    while holding the GIL, which would stall the Kubernetes calls and
+    health checks in the scaler's other threads.  Only the download happens
+    in the calling thread; the parsing runs in a worker process, and only
+    the compact occurrences, for `days` days from now, come back.  Workers
+    are spawned rather than forked, since forking a process with running
+    threads can copy a lock another thread holds, and are replaced if one
+    dies.
+    """
+
+    def __init__(self, timeout=None, days=7, max_workers=1):
+        self.timeout = timeout
+        self.days = days
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _parse(self, ics, start, end):
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            executor = self._executor
+        try:
+            return executor.submit(parse_occurrences, ics, start, end).result()
+        except concurrent.futures.process.BrokenProcessPool:
+            log.error("Calendar parsing process died; starting a new one")
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise
+
+    def __call__(self, url):
+        ics = read_calendar(url, timeout=self.timeout)
+        if ics is None:
+            return None
+        start = datetime.datetime.now(datetime.timezone.utc)
+        end = start + datetime.timedelta(days=self.days)
+        return self._parse(ics, start, end)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+
+
+def _label(value):
+    """Escape a Prometheus label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CalendarCache:
+    """Keep the latest good copy of each calendar, refreshed in the background.
+
+    get() returns the copy it has straight away, however old, and starts a
+    refresh in a background thread once it is `ttl` seconds old; only the
+    very first get() of a URL waits for a fetch.  A calendar server that
+    hangs or fails therefore never holds up the reconcile loop, which keeps
+    using the last calendar it parsed.  start() also refreshes calendars on
+    their own schedule, between get()s.
+
+    The cache is shared by all clusters in the process, so each calendar is
+    fetched and parsed once per `ttl` however many use it.  URLs that
+    haven't been asked for in `forget_after` seconds are dropped.
+    """
+
+    def __init__(
+        self, ttl=60, fetch=get_calendar, clock=time.monotonic, forget_after=3600
+    ):
+        self.ttl = ttl
+        self.forget_after = forget_after
+        self._fetch = fetch
+        self._clock = clock
+        self._lock = threading.Lock()
+        # url -> (time fetched, calendar) of the last good fetch.
+        self._entries = {}
+        # url -> Event set when the running refresh finishes.
+        self._refreshing = {}
+        # url -> time of the last get().
+        self._wanted = {}
+        self._failures = {}
+        self._stop = threading.Event()
+
+    def _refresh(self, url, done):
+        try:
+            calendar = self._fetch(url)
+        except Exception:
+            log.exception(f"Could not refresh calendar {url}")
+            calendar = None
+        with self._lock:
+            if calendar is not None:
+                self._entries[url] = (self._clock(), calendar)
+            else:
+                self._failures[url] = self._failures.get(url, 0) + 1
+            del self._refreshing[url]
+        done.set()
+
+    def _start_refresh(self, url):
+        """Start refreshing url unless already underway; call with the lock held."""
+        done = self._refreshing.get(url)
+        if done is None:
+            done = self._refreshing[url] = threading.Event()
+            threading.Thread(
+                target=self._refresh,
+                args=(url, done),
+                name="calendar-refresh",
+                daemon=True,
+            ).start()
+        return done
+
+    def get(self, url):
+        """The latest good calendar at url, or None if it has never been fetched."""
+        with self._lock:
+            now = self._clock()
+            self._wanted[url] = now
+            entry = self._entries.get(url)
+            if entry is None or now - entry[0] >= self.ttl:
+                done = self._start_refresh(url)
+        if entry is not None:
+            return entry[1]
+        done.wait()
+        with self._lock:
+            entry = self._entries.get(url)
+        return entry[1] if entry is not None else None
+
+    def refresh_stale(self):
+        """Start refreshing every wanted calendar that is `ttl` seconds old."""
+        with self._lock:
+            now = self._clock()
+            for url, wanted_at in list(self._wanted.items()):
+                if now - wanted_at > self.forget_after:
+                    del self._wanted[url]
+                    self._entries.pop(url, None)
+                    self._failures.pop(url, None)
+                    continue
+                entry = self._entries.get(url)
+                if entry is None or now - entry[0] >= self.ttl:
+                    self._start_refresh(url)
+
+    def ages(self):
+        """Returns {url: seconds since its last good fetch} for fetched calendars."""
+        with self._lock:
+            now = self._clock()
+            return {url: now - fetched for url, (fetched, _) in self._entries.items()}
+
+    def metrics(self):
+        """Calendar ages and refresh failures in the Prometheus text format."""
+        ages = self.ages()
+        with self._lock:
+            failures = dict(self._failures)
+        lines = [
+            "# HELP node_placeholder_calendar_age_seconds Seconds since the calendar was last fetched and parsed.",
+            "# TYPE node_placeholder_calendar_age_seconds gauge",
+        ]
+        lines += [
+            f'node_placeholder_calendar_age_seconds{{url="{_label(url)}"}} {age:.1f}'
+            for url, age in sorted(ages.items())
+        ]
+        lines += [
+            "# HELP node_placeholder_calendar_refresh_failures_total Calendar fetches that failed.",
+            "# TYPE node_placeholder_calendar_refresh_failures_total counter",
+        ]
+        lines += [
+            f'node_placeholder_calendar_refresh_failures_total{{url="{_label(url)}"}} {count}'
+            for url, count in sorted(failures.items())
+        ]
+        return "\n".join(lines) + "\n"
+
+    def run(self, period=None):
+        while not self._stop.wait(period or self.ttl / 4):
+            self.refresh_stale()
+
+    def start(self):
+        threading.Thread(
+            target=self.run, name="calendar-refresher", daemon=True
+        ).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
 def get_events(calendar, time=None):
     """
     Get events from a calendar.  If no time is passed, assume now.
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Read replica counts from several calendars at once.
+
+Exams, labs and course events often live in calendars owned by different
+teams.  The config can list them all:
+
+    calendars:
+      - url: https://example.com/exams.ics
+        priority: 10
+      - url: https://example.com/labs.ics
+        pools: [gpu]
+        timeout: 5
+
+A source's counts only apply to the pools it lists in `pools` (all pools if
+unset).  For each pool the counts from the highest-priority sources that set
+it win, and the largest of those is used; with the default priority of 0
+everywhere that is simply the largest count.  The legacy `calendarUrl` is a
+source with default settings.
+
+Sources are read concurrently.  One that hasn't answered within its
+`timeout` (10 seconds by default) is left out of this cycle.  Its read
+carries on in the background, so the calendar is in the CalendarCache for
+a later cycle, and is not started again while it is still running.
+"""
+
+import concurrent.futures
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10
+
+
+def calendar_sources(cfg):
+    """The calendar sources in a config, validated.
+
+    Raises ValueError if `calendars` is malformed.
+    """
+    sources = []
+    if "calendarUrl" in cfg:
+        sources.append({"url": cfg["calendarUrl"]})
+    calendars = cfg.get("calendars") or []
+    if not isinstance(calendars, list):
+        raise ValueError(f"calendars must be a list, got {calendars!r}")
+    for source in calendars:
+        if not isinstance(source, dict) or not isinstance(source.get("url"), str):
+            raise ValueError(f"Each calendars entry needs a url, got {source!r}")
+        pools = source.get("pools")
+        if pools is not None and (
+            not isinstance(pools, list) or not all(isinstance(p, str) for p in pools)
+        ):
+            raise ValueError(
+                f"calendars pools for {source['url']} must be a list of pool names, got {pools!r}"
+            )
+        priority = source.get("priority", 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise ValueError(
+                f"calendars priority for {source['url']} must be an integer, got {priority!r}"
+            )
+        timeout = source.get("timeout", DEFAULT_TIMEOUT)
+        if (
+            not isinstance(timeout, (int, float))
+            or isinstance(timeout, bool)
+            or timeout <= 0
+        ):
+            raise ValueError(
+                f"calendars timeout for {source['url']} must be a positive number, got {timeout!r}"
+            )
+        sources.append(source)
+    return sources
+
+
+def merge_replica_counts(results):
+    """Merge [(source, {pool: count})] into one {pool: count}.
+
+    Counts for pools outside a source's `pools` are dropped; of the rest,
+    the highest priority wins and ties take the largest count.
+    """
+    best = {}
+    for source, counts in results:
+        scope = source.get("pools")
+        priority = source.get("priority", 0)
+        for pool, count in counts.items():
+            if scope is not None and pool not in scope:
+                continue
+            if pool not in best or (priority, count) > best[pool]:
+                best[pool] = (priority, count)
+    return {pool: count for pool, (_, count) in best.items()}
+
+
+class CalendarFetcher:
+    """Read every source's replica counts concurrently, within their timeouts.
+
+    get_counts(url) returns a source's {pool: count}, or None if the
+    calendar is unavailable.
+    """
+
+    def __init__(self, get_counts, max_workers=8, clock=time.monotonic):
+        self._get_counts = get_counts
+        self._clock = clock
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="calendar"
+        )
+        # url -> future of a read that may still be running.
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def _submit(self, url):
+        with self._lock:
+            future = self._running.get(url)
+            if future is None or future.done():
+                future = self._executor.submit(self._get_counts, url)
+                self._running[url] = future
+            return future
+
+    def replica_counts(self, sources):
+        """Returns the merged {pool: count} of the sources that answered."""
+        started = self._clock()
+        futures = [(source, self._submit(source["url"])) for source in sources]
+        results = []
+        for source, future in futures:
+            url = source["url"]
+            deadline = started + source.get("timeout", DEFAULT_TIMEOUT)
+            try:
+                counts = future.result(timeout=max(deadline - self._clock(), 0))
+            except concurrent.futures.TimeoutError:
+                log.warning(f"Calendar {url} did not answer in time; skipping it")
+                continue
+            except Exception:
+                log.exception(f"Could not read calendar {url}; skipping it")
+                continue
+            if counts is None:
+                log.info(f"No calendar available at {url}")
+                continue
+            log.info(f"Overrides from {url}: {counts}")
+            results.append((source, counts))
+        return merge_replica_counts(results)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Bin-packing model of how much user headroom free node capacity provides.
+
+Without it, the scaler counts every node above the free threshold as one
+placeholder's worth of headroom, so a node with 21% free counts the same as
+an empty one.  With `userPodProfiles` configured for a pool, the free CPU and
+memory of those nodes are instead packed with the pool's typical user pods,
+and the number that fit is converted into placeholder-node units: how many
+placeholders' worth of users the free space could take.
+
+    nodePools:
+      user-pool:
+        userPodProfiles:
+          - {cpu: 500m, memory: 2Gi, weight: 3}
+          - {cpu: "1", memory: 8Gi, weight: 1}
+"""
+
+import functools
+import logging
+from itertools import cycle
+
+from .utils import cpu_millicores, memory_mib
+
+log = logging.getLogger(__name__)
+
+
+def validate_user_pod_profiles(pool_name, pool_config):
+    """Raise ValueError if a pool's userPodProfiles or their unit are malformed."""
+    profiles = pool_config.get("userPodProfiles")
+    if not profiles:
+        return
+    if not isinstance(profiles, list) or not all(isinstance(p, dict) for p in profiles):
+        raise ValueError(
+            f"userPodProfiles for pool {pool_name} must be a list of mappings, got {profiles!r}"
+        )
+    try:
+        parse_profiles(profiles)
+        placeholder_capacity(pool_config, {})
+    except ValueError as e:
+        raise ValueError(f"userPodProfiles for pool {pool_name}: {e}") from e
+
+
+def parse_profiles(profiles):
+    """Returns a tuple of (cpu_m, mem_mi, weight) from a userPodProfiles list."""
+    parsed = []
+    for profile in profiles:
+        weight = profile.get("weight", 1)
+        if not isinstance(weight, int) or weight < 1:
+            raise ValueError(f"Profile weight must be a positive integer: {profile}")
+        cpu_m = cpu_millicores(profile.get("cpu", "0"))
+        mem_mi = memory_mib(profile.get("memory", "0"))
+        if cpu_m <= 0 and mem_mi <= 0:
+            raise ValueError(f"Profile requests no CPU or memory: {profile}")
+        parsed.append((cpu_m, mem_mi, weight))
+    return tuple(parsed)
+
+
+@functools.lru_cache(maxsize=32)
+def _demand_sequence(profiles):
+    """One round of profiles in proportion to their weights, interleaved.
+
+    For weights 3 and 1 this is [a, a, b, a] rather than [a, a, a, b], so the
+    mix stays close to the configured proportions at any point.
+    """
+    total = sum(weight for _, _, weight in profiles)
+    sequence = []
+    credit = [0] * len(profiles)
+    for _ in range(total):
+        for i, (_, _, weight) in enumerate(profiles):
+            credit[i] += weight
+        best = max(range(len(profiles)), key=lambda i: credit[i])
+        credit[best] -= total
+        sequence.append(profiles[best][:2])
+    return tuple(sequence)
+
+
+def pods_that_fit(free_cpu_m, free_mem_mi, profiles):
+    """How many user pods of the profile mix fit in the given free capacity.
+
+    Pods arrive in the weighted mix; once a profile no longer fits it is
+    dropped and the remaining (smaller) profiles keep filling the space.
+    """
+    sequence = _demand_sequence(profiles)
+    fitting = {p for p in sequence if p[0] <= free_cpu_m and p[1] <= free_mem_mi}
+    count = 0
+    for cpu_m, mem_mi in cycle(sequence):
+        if not fitting:
+            break
+        if (cpu_m, mem_mi) not in fitting:
+            continue
+        if cpu_m <= free_cpu_m and mem_mi <= free_mem_mi:
+            free_cpu_m -= cpu_m
+            free_mem_mi -= mem_mi
+            count += 1
+        else:
+            fitting.discard((cpu_m, mem_mi))
+    return count
+
+
+def placeholder_units(free_capacities, profiles, unit_cpu_m, unit_mem_mi):
+    """Convert free node capacity into placeholder-node units.
+
+    free_capacities is a list of (free_cpu_m, free_mem_mi), one per node;
+    pods can't span nodes, so each is packed separately.  A unit is the
+    capacity one placeholder pod reserves (unit_cpu_m, unit_mem_mi).
+    Returns a float; the caller decides how to round.
+    """
+    per_unit = pods_that_fit(unit_cpu_m, unit_mem_mi, profiles)
+    if per_unit == 0:
+        log.warning("No user pod profile fits in a placeholder's capacity")
+        return 0.0
+    fit = sum(
+        pods_that_fit(cpu_m, mem_mi, profiles) for cpu_m, mem_mi in free_capacities
+    )
+    return fit / per_unit
+
+
+def placeholder_capacity(pool_config, pool_usable_resources):
+    """Returns the (cpu_m, mem_mi) one placeholder pod of the pool reserves.
+
+    Placeholders are sized to fill a node, so a dimension they don't request
+    is taken to be a whole node's allocatable.
+    """
+    requests = pool_config.get("resources", {}).get("requests", {})
+    nodes = pool_usable_resources.values()
+    cpu_m = (
+        cpu_millicores(requests["cpu"])
+        if "cpu" in requests
+        else max((n["cpu_alloc_m"] for n in nodes), default=0)
+    )
+    mem_mi = (
+        memory_mib(requests["memory"])
+        if "memory" in requests
+        else max((n["mem_alloc_mi"] for n in nodes), default=0)
+    )
+    return cpu_m, mem_mi
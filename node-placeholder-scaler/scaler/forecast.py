@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Predict placeholder demand from the history of user pod arrivals.
+
+The week is divided into fixed buckets (15 minutes by default).  For every
+pool, the number of user pods created in each bucket is folded into an
+exponentially weighted average for that bucket's slot of the week, so a lab
+that starts every Monday at 10:00 builds up a high average at that slot.
+The forecast for the next `horizon` seconds is the sum of those averages,
+and divided by a pool's `usersPerNode` it gives a floor for the placeholder
+replica count.
+
+The history is persisted to a JSON file after every bucket, so it survives
+restarts of the scaler.
+"""
+
+import json
+import logging
+import math
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+WEEK_SECONDS = 7 * 24 * 3600
+
+
+def validate_forecast(pool_name, pool_config):
+    """Raise ValueError if a pool's forecast section is malformed."""
+    forecast = pool_config.get("forecast")
+    if forecast is None:
+        return
+    if not isinstance(forecast, dict):
+        raise ValueError(
+            f"forecast for pool {pool_name} must be a mapping, got {forecast!r}"
+        )
+    for key in ("usersPerNode", "maxReplicas"):
+        if key == "maxReplicas" and key not in forecast:
+            continue
+        value = forecast.get(key)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(
+                f"forecast.{key} for pool {pool_name} must be a positive integer, got {value!r}"
+            )
+
+
+class ArrivalForecaster:
+    """Per-pool, time-of-week seasonal average of user pod arrivals.
+
+    alpha is the weight of the most recent week in each slot's average, and
+    min_observations is how many weeks a slot must have been observed
+    before it is used for forecasting.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        bucket_minutes=15,
+        horizon=1200,
+        alpha=0.3,
+        min_observations=2,
+        localtime=time.localtime,
+    ):
+        if (24 * 60) % bucket_minutes:
+            raise ValueError("bucket_minutes must divide a day evenly")
+        self.path = path
+        self.bucket_seconds = bucket_minutes * 60
+        self.slots = WEEK_SECONDS // self.bucket_seconds
+        self.horizon = horizon
+        self.alpha = alpha
+        self.min_observations = min_observations
+        self._localtime = localtime
+        # pool -> {"mean": [float] * slots, "weeks": [int] * slots}
+        self.history = {}
+        self._slot = None
+        self._counts = {}
+        self._partial = True
+        self._last_poll = None
+        if path and os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.error(f"Could not read forecast history {self.path}: {e}")
+            return
+        if data.get("bucket_seconds") != self.bucket_seconds:
+            log.warning(
+                f"Forecast history {self.path} uses a different bucket size; ignoring it."
+            )
+            return
+        self.history = data["pools"]
+        log.info(f"Loaded forecast history for pools {sorted(self.history)}")
+
+    def save(self):
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(
+                    {"bucket_seconds": self.bucket_seconds, "pools": self.history}, f
+                )
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.error(f"Could not save forecast history {self.path}: {e}")
+
+    def _seconds_of_week(self, now):
+        """Seconds since Monday 00:00 local time."""
+        t = self._localtime(now)
+        return (t.tm_wday * 24 + t.tm_hour) * 3600 + t.tm_min * 60 + t.tm_sec
+
+    def slot_of(self, now):
+        """Slot of the week (Monday 00:00 local time is 0) for a timestamp."""
+        return self._seconds_of_week(now) // self.bucket_seconds
+
+    def _pool_history(self, pool):
+        if pool not in self.history:
+            self.history[pool] = {
+                "mean": [0.0] * self.slots,
+                "weeks": [0] * self.slots,
+            }
+        return self.history[pool]
+
+    def _close_bucket(self):
+        for pool in set(self.history) | set(self._counts):
+            history = self._pool_history(pool)
+            count = self._counts.get(pool, 0)
+            if history["weeks"][self._slot] == 0:
+                history["mean"][self._slot] = float(count)
+            else:
+                history["mean"][self._slot] += self.alpha * (
+                    count - history["mean"][self._slot]
+                )
+            history["weeks"][self._slot] += 1
+        self.save()
+
+    def observe(self, arrivals, now):
+        """Add {pool: count} arrivals seen since the previous call at time now.
+
+        The first bucket after start-up (or after a gap in polling) is only
+        partly observed, so it is not folded into the history.
+        """
+        slot = self.slot_of(now)
+        if slot != self._slot:
+            # Buckets are only complete if polling didn't stop across their
+            # start or end, e.g. while the scaler was down.
+            contiguous = (
+                self._last_poll is not None
+                and now - self._last_poll <= self.bucket_seconds
+            )
+            if contiguous and not self._partial:
+                self._close_bucket()
+            self._partial = not contiguous
+            self._slot = slot
+            self._counts = {}
+        for pool, count in arrivals.items():
+            self._counts[pool] = self._counts.get(pool, 0) + count
+        self._last_poll = now
+
+    def expected_arrivals(self, pool, now):
+        """Expected user pod arrivals in pool over the next `horizon` seconds."""
+        history = self.history.get(pool)
+        if history is None:
+            return 0.0
+        expected = 0.0
+        start = now
+        end = now + self.horizon
+        while start < end:
+            slot = self.slot_of(start)
+            into_slot = self._seconds_of_week(start) % self.bucket_seconds
+            step = min(self.bucket_seconds - into_slot, end - start)
+            if history["weeks"][slot] >= self.min_observations:
+                expected += history["mean"][slot] * step / self.bucket_seconds
+            start += step
+        return expected
+
+    def replica_floors(self, pool_configs, node_selector_key, now):
+        """Forecast replica floor for each configured pool with a `forecast` section."""
+        floors = {}
+        for pool_name, pool_config in pool_configs.items():
+            forecast_config = pool_config.get("forecast")
+            if not forecast_config:
+                continue
+            pool = pool_config["nodeSelector"][node_selector_key]
+            expected = self.expected_arrivals(pool, now)
+            floor = math.floor(expected / forecast_config["usersPerNode"] + 0.5)
+            if "maxReplicas" in forecast_config:
+                floor = min(floor, forecast_config["maxReplicas"])
+            log.info(
+                f"Forecast for pool {pool_name}: {expected:.1f} user pods in the next "
+                f"{self.horizon}s, replica floor {floor}"
+            )
+            floors[pool_name] = floor
+        return floors
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Keep the grace-period state across scaler restarts.
+
+node_first_seen and node_last_above_threshold hold perf_counter times, which
+mean nothing to another process, so without this every node looks new after
+a restart and no placeholder is reduced for a whole grace period.  The state
+is saved to a JSON file as wall-clock times and converted back on load.
+"""
+
+import json
+import logging
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+
+class GraceStateFile:
+    """Load and save node_first_seen and node_last_above_threshold.
+
+    clock is the clock the in-memory state uses, wall_clock the one saved.
+    """
+
+    def __init__(self, path, clock=time.perf_counter, wall_clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._saved = None
+
+    def load(self):
+        """Returns (node_first_seen, node_last_above_threshold), empty if unsaved."""
+        if not os.path.exists(self.path):
+            return {}, {}
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.error(f"Could not read grace-period state {self.path}: {e}")
+            return {}, {}
+        offset = self._clock() - self._wall_clock()
+        first_seen = {n: t + offset for n, t in data["node_first_seen"].items()}
+        last_above = {
+            n: t + offset for n, t in data["node_last_above_threshold"].items()
+        }
+        log.info(f"Loaded grace-period state for {len(first_seen)} nodes")
+        return first_seen, last_above
+
+    def save(self, node_first_seen, node_last_above_threshold):
+        """Write the state if it changed since the last save.
+
+        Times are rounded to whole seconds; grace periods are minutes long.
+        """
+        offset = self._wall_clock() - self._clock()
+        data = {
+            "node_first_seen": {
+                n: round(t + offset) for n, t in sorted(node_first_seen.items())
+            },
+            "node_last_above_threshold": {
+                n: round(t + offset)
+                for n, t in sorted(node_last_above_threshold.items())
+            },
+        }
+        if data == self._saved:
+            return
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.error(f"Could not save grace-period state {self.path}: {e}")
+            return
+        self._saved = data
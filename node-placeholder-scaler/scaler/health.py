@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Liveness, readiness and a watchdog for the reconcile loop.
+
+A calendar server that never answers or an API call that never returns
+leaves the loop stuck with the pod still Running.  The loop reports to a
+Health object as it goes; /healthz fails once a cycle has run longer than
+`stall_after` seconds or no cycle has finished for longer than a full
+interval plus that, and /readyz fails until the cluster state has been read
+recently.  The Watchdog goes further and, once a cycle is stuck, logs every
+thread's stack and exits so Kubernetes restarts the container even without
+a liveness probe.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger(__name__)
+
+
+class Health:
+    """Timestamps of the reconcile loop's progress, on a monotonic clock.
+
+    max_sleep is the longest wait between cycles, so that a loop which is
+    merely sleeping isn't mistaken for a stuck one.
+    """
+
+    def __init__(self, stall_after, max_sleep, clock=time.monotonic):
+        self.stall_after = stall_after
+        self.max_sleep = max_sleep
+        self._clock = clock
+        self._started = clock()
+        self._cycle_started = None
+        self._last_cycle = None
+        self._last_sync = None
+        self._last_error = None
+
+    def cycle_started(self):
+        self._cycle_started = self._clock()
+
+    def cluster_synced(self):
+        self._last_sync = self._clock()
+
+    def cycle_finished(self):
+        self._cycle_started = None
+        self._last_cycle = self._clock()
+        self._last_error = None
+
+    def cycle_failed(self, reason):
+        """The loop is alive but the cycle raised; /readyz fails until one succeeds."""
+        self._cycle_started = None
+        self._last_cycle = self._clock()
+        self._last_error = reason
+
+    def stalled_for(self):
+        """Seconds the current cycle has been running past stall_after, or 0."""
+        if self._cycle_started is None:
+            return 0
+        return max(self._clock() - self._cycle_started - self.stall_after, 0)
+
+    def live(self):
+        """Returns (ok, reason)."""
+        now = self._clock()
+        if self.stalled_for() > 0:
+            return False, f"cycle running for {now - self._cycle_started:.0f}s"
+        last = self._last_cycle if self._last_cycle is not None else self._started
+        if now - last > self.max_sleep + self.stall_after:
+            return False, f"no cycle finished for {now - last:.0f}s"
+        return True, "ok"
+
+    def ready(self):
+        """Returns (ok, reason)."""
+        if self._last_error is not None:
+            return False, f"last cycle failed: {self._last_error}"
+        if self._last_sync is None:
+            return False, "cluster state not read yet"
+        age = self._clock() - self._last_sync
+        if age > self.max_sleep + self.stall_after:
+            return False, f"cluster state last read {age:.0f}s ago"
+        return True, "ok"
+
+
+class HealthGroup:
+    """The Health of several clusters' loops, served and watched as one.
+
+    Healthy only while every cluster is; reasons name the failing cluster.
+    """
+
+    def __init__(self, healths):
+        self.healths = healths
+
+    @property
+    def stall_after(self):
+        return max(h.stall_after for h in self.healths.values())
+
+    def stalled_for(self):
+        return max(h.stalled_for() for h in self.healths.values())
+
+    def _check(self, method):
+        for name, health in self.healths.items():
+            ok, reason = getattr(health, method)()
+            if not ok:
+                return False, f"{name}: {reason}" if name else reason
+        return True, "ok"
+
+    def live(self):
+        """Returns (ok, reason)."""
+        return self._check("live")
+
+    def ready(self):
+        """Returns (ok, reason)."""
+        return self._check("ready")
+
+
+def _handler(health, metrics=None):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            checks = {"/healthz": health.live, "/readyz": health.ready}
+            if self.path == "/metrics" and metrics is not None:
+                ok, body = True, metrics().encode()
+            elif self.path in checks:
+                ok, reason = checks[self.path]()
+                body = f"{reason}\n".encode()
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200 if ok else 503)
+            self.send_header("Content-Type", "text/plain")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            log.debug(format % args)
+
+    return Handler
+
+
+def serve_health(health, port, host="", metrics=None):
+    """Serve /healthz and /readyz on a background thread; returns the server.
+
+    metrics, if given, returns the Prometheus text served at /metrics.
+    """
+    server = ThreadingHTTPServer((host, port), _handler(health, metrics))
+    threading.Thread(
+        target=server.serve_forever, name="health-server", daemon=True
+    ).start()
+    log.info(f"Serving /healthz and /readyz on port {server.server_address[1]}")
+    return server
+
+
+def dump_stacks():
+    """Log the current stack of every thread."""
+    names = {t.ident: t.name for t in threading.enumerate()}
+    for ident, frame in sys._current_frames().items():
+        stack = "".join(traceback.format_stack(frame))
+        log.error(f"Thread {names.get(ident, ident)}:\n{stack}")
+
+
+class Watchdog:
+    """Exit the process once the reconcile loop has been stuck in a cycle."""
+
+    def __init__(self, health, check_period=5, exit_process=os._exit):
+        self.health = health
+        self.check_period = check_period
+        self._exit = exit_process
+        self._stop = threading.Event()
+
+    def check(self):
+        if self.health.stalled_for() > 0:
+            log.error(
+                f"Reconcile cycle has run for more than {self.health.stall_after}s; "
+                "dumping stacks and exiting"
+            )
+            dump_stacks()
+            for handler in logging.getLogger().handlers:
+                handler.flush()
+            self._exit(1)
+
+    def run(self):
+        while not self._stop.wait(self.check_period):
+            self.check()
+
+    def start(self):
+        threading.Thread(target=self.run, name="watchdog", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+import logging
+import random
+
+log = logging.getLogger(__name__)
+
+
+class AdaptiveInterval:
+    """Choose how long to sleep between reconcile cycles.
+
+    While the cluster is busy (a calendar event or forecast surge, pending
+    placeholders or unschedulable user pods) cycles run every
+    `min_interval` seconds.  Once it is quiet they run every `base` seconds,
+    and every further quiet cycle multiplies that by `backoff`, up to
+    `max_interval`.  Each interval is spread by up to +/- `jitter` of itself,
+    so scalers started together in several clusters drift apart instead of
+    hitting shared endpoints such as the calendar server at the same moment.
+    """
+
+    def __init__(
+        self,
+        base=60,
+        min_interval=15,
+        max_interval=300,
+        backoff=2.0,
+        jitter=0.1,
+        rand=random.random,
+    ):
+        if not 0 < min_interval <= base <= max_interval:
+            raise ValueError("Intervals must satisfy 0 < min <= base <= max")
+        self.base = base
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self._random = rand
+        self._quiet_interval = None
+        self._failures = 0
+
+    def next(self, busy):
+        """Seconds to wait before the next cycle."""
+        self._failures = 0
+        if busy:
+            self._quiet_interval = None
+            interval = self.min_interval
+        elif self._quiet_interval is None:
+            self._quiet_interval = interval = self.base
+        else:
+            self._quiet_interval = interval = min(
+                self._quiet_interval * self.backoff, self.max_interval
+            )
+        return self._jittered(interval)
+
+    def after_failure(self):
+        """Seconds to wait after a failed cycle.
+
+        `min_interval`, doubling with every failure in a row, up to
+        `max_interval`.
+        """
+        self._failures += 1
+        interval = min(
+            self.min_interval * 2 ** min(self._failures - 1, 30), self.max_interval
+        )
+        return self._jittered(interval)
+
+    def _jittered(self, interval):
+        return interval * (1 + self.jitter * (2 * self._random() - 1))
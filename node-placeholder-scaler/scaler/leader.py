@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+import datetime
+import logging
+import threading
+import time
+
+from kubernetes import client
+
+log = logging.getLogger(__name__)
+
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class LeaderElector:
+    """Lease-based leader election, modelled on client-go's leaderelection.
+
+    Every replica runs an elector against the same coordination.k8s.io Lease.
+    The holder renews the lease every `retry_period` seconds; the others
+    watch it and take over once it has not been renewed for
+    `lease_duration` seconds.  Expiry is judged from when *this* replica
+    last saw the lease change (on the monotonic clock), not from the
+    holder's renewTime, so clock skew between nodes doesn't matter.
+
+    A leader that cannot renew for `renew_deadline` seconds steps down so two
+    replicas never both believe they lead for long.
+    """
+
+    def __init__(
+        self,
+        api: client.CoordinationV1Api,
+        name,
+        namespace,
+        identity,
+        lease_duration=15,
+        renew_deadline=10,
+        retry_period=2,
+        on_started_leading=None,
+        on_stopped_leading=None,
+        clock=time.monotonic,
+    ):
+        if not lease_duration > renew_deadline > retry_period:
+            raise ValueError(
+                "Leader election requires lease_duration > renew_deadline > retry_period"
+            )
+        self.api = api
+        self.name = name
+        self.namespace = namespace
+        self.identity = identity
+        self.lease_duration = lease_duration
+        self.renew_deadline = renew_deadline
+        self.retry_period = retry_period
+        self.on_started_leading = on_started_leading
+        self.on_stopped_leading = on_stopped_leading
+        self._clock = clock
+        self._is_leader = False
+        self._last_renew = None
+        self._observed_record = None
+        self._observed_at = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self):
+        return self._is_leader
+
+    def _new_lease_spec(self, now, transitions):
+        return client.V1LeaseSpec(
+            holder_identity=self.identity,
+            lease_duration_seconds=self.lease_duration,
+            acquire_time=now,
+            renew_time=now,
+            lease_transitions=transitions,
+        )
+
+    def _observe(self, lease):
+        """Track the lease record and when it last changed, locally."""
+        spec = lease.spec
+        record = (spec.holder_identity, spec.renew_time)
+        if record != self._observed_record:
+            self._observed_record = record
+            self._observed_at = self._clock()
+
+    def try_acquire_or_renew(self):
+        """Make one attempt to acquire or renew the lease.
+
+        Returns True if this replica holds the lease afterwards.
+        """
+        now = _utcnow()
+        try:
+            lease = self.api.read_namespaced_lease(self.name, self.namespace)
+        except client.exceptions.ApiException as e:
+            if e.status != 404:
+                log.error(f"Error reading lease {self.namespace}/{self.name}: {e}")
+                return False
+            lease = client.V1Lease(
+                metadata=client.V1ObjectMeta(name=self.name, namespace=self.namespace),
+                spec=self._new_lease_spec(now, 0),
+            )
+            try:
+                self.api.create_namespaced_lease(self.namespace, lease)
+            except client.exceptions.ApiException as e:
+                log.info(f"Could not create lease {self.namespace}/{self.name}: {e}")
+                return False
+            self._observe(lease)
+            return True
+
+        self._observe(lease)
+        spec = lease.spec
+        holder = spec.holder_identity
+        if holder and holder != self.identity:
+            duration = spec.lease_duration_seconds or self.lease_duration
+            if self._clock() - self._observed_at < duration:
+                return False
+            log.info(f"Lease held by {holder} has expired; taking over.")
+
+        if holder == self.identity:
+            spec.renew_time = now
+            spec.lease_duration_seconds = self.lease_duration
+        else:
+            lease.spec = self._new_lease_spec(now, (spec.lease_transitions or 0) + 1)
+
+        try:
+            # replace carries the resourceVersion we read, so a concurrent
+            # update by another replica fails with 409 instead of both winning.
+            self.api.replace_namespaced_lease(self.name, self.namespace, lease)
+        except client.exceptions.ApiException as e:
+            if e.status != 409:
+                log.error(f"Error updating lease {self.namespace}/{self.name}: {e}")
+            return False
+        self._observe(lease)
+        return True
+
+    def step(self):
+        """Run one election round and fire leadership-change callbacks."""
+        acquired = self.try_acquire_or_renew()
+        now = self._clock()
+        if acquired:
+            self._last_renew = now
+            if not self._is_leader:
+                log.info(
+                    f"{self.identity} became leader ({self.namespace}/{self.name})"
+                )
+                self._is_leader = True
+                if self.on_started_leading:
+                    self.on_started_leading()
+        elif self._is_leader and now - self._last_renew >= self.renew_deadline:
+            log.warning(
+                f"{self.identity} failed to renew lease for {self.renew_deadline}s; stepping down"
+            )
+            self._is_leader = False
+            if self.on_stopped_leading:
+                self.on_stopped_leading()
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except Exception:
+                log.exception("Unexpected error in leader election")
+            self._stop.wait(self.retry_period)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.run, name="leader-election", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, release=True):
+        """Stop campaigning and, if leading, release the lease for a fast handover."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.retry_period + 1)
+        if release and self._is_leader:
+            self.release()
+
+    def release(self):
+        try:
+            lease = self.api.read_namespaced_lease(self.name, self.namespace)
+            if lease.spec.holder_identity != self.identity:
+                return
+            lease.spec.holder_identity = None
+            lease.spec.lease_duration_seconds = 1
+            self.api.replace_namespaced_lease(self.name, self.namespace, lease)
+            log.info(f"{self.identity} released lease {self.namespace}/{self.name}")
+        except client.exceptions.ApiException as e:
+            log.error(f"Error releasing lease {self.namespace}/{self.name}: {e}")
+        finally:
+            self._is_leader = False
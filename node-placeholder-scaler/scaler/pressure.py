@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Add placeholders when user pods are stuck Pending for lack of capacity.
+
+Placeholders are meant to make room for users before they need it; a user
+pod that the scheduler couldn't place means the headroom ran out.  Pools
+with a `pendingBoost` section get extra placeholder replicas, one per
+`usersPerNode` such pods (rounded up, at most `maxReplicas`), so new nodes
+for the rest of the surge start coming up alongside the ones the cluster
+autoscaler adds for the stuck pods.  The boost goes up straight away but
+only comes down after `cooldown` seconds, so it isn't dropped the moment the
+stuck pods land on the new nodes.
+
+    nodePools:
+      user-pool:
+        pendingBoost:
+          usersPerNode: 30
+          maxReplicas: 3
+          cooldown: 600
+"""
+
+import logging
+import math
+
+log = logging.getLogger(__name__)
+
+
+def is_unschedulable(pod):
+    """Whether the scheduler has reported a Pending pod as unschedulable."""
+    if pod.status.phase != "Pending" or pod.spec.node_name:
+        return False
+    return any(
+        c.type == "PodScheduled" and c.status == "False" and c.reason == "Unschedulable"
+        for c in pod.status.conditions or []
+    )
+
+
+def pod_pools(pod, node_selector_key):
+    """The pools a pod asks for, by nodeSelector or required node affinity."""
+    pool = (pod.spec.node_selector or {}).get(node_selector_key)
+    if pool is not None:
+        return {pool}
+    pools = set()
+    affinity = pod.spec.affinity
+    node_affinity = affinity.node_affinity if affinity else None
+    required = (
+        node_affinity.required_during_scheduling_ignored_during_execution
+        if node_affinity
+        else None
+    )
+    for term in required.node_selector_terms if required else []:
+        for expression in term.match_expressions or []:
+            if expression.key == node_selector_key and expression.operator == "In":
+                pools.update(expression.values or [])
+    return pools
+
+
+def pending_by_pool(pods, node_selector_key):
+    """Returns {pool: count} of unschedulable pods.
+
+    A pod whose affinity allows several pools counts toward each of them.
+    """
+    counts = {}
+    for pod in pods:
+        if not is_unschedulable(pod):
+            continue
+        for pool in pod_pools(pod, node_selector_key):
+            counts[pool] = counts.get(pool, 0) + 1
+    return counts
+
+
+def validate_pending_boost(pool_name, pool_config):
+    """Raise ValueError if a pool's pendingBoost is malformed."""
+    boost = pool_config.get("pendingBoost")
+    if boost is None:
+        return
+    for key in ("usersPerNode", "maxReplicas"):
+        value = boost.get(key)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(
+                f"pendingBoost.{key} for pool {pool_name} must be a positive integer, got {value!r}"
+            )
+    cooldown = boost.get("cooldown", 0)
+    if (
+        not isinstance(cooldown, (int, float))
+        or isinstance(cooldown, bool)
+        or cooldown < 0
+    ):
+        raise ValueError(
+            f"pendingBoost.cooldown for pool {pool_name} must be a non-negative number, got {cooldown!r}"
+        )
+
+
+def update_pending_boost(pool_name, boost_config, pending, boost_state, now):
+    """Return the extra placeholder replicas for a pool with `pending` stuck pods.
+
+    boost_state maps pool names to (boost, time it was last raised or
+    renewed); it is updated in place.  now is a monotonic time in seconds.
+    """
+    wanted = min(
+        math.ceil(pending / boost_config["usersPerNode"]), boost_config["maxReplicas"]
+    )
+    boost, raised_at = boost_state.get(pool_name, (0, now))
+    if wanted >= boost:
+        if wanted > 0:
+            boost_state[pool_name] = (wanted, now)
+        if wanted > boost:
+            log.info(
+                f"{pending} user pods unschedulable in pool {pool_name}; "
+                f"adding {wanted} placeholder replicas"
+            )
+        return wanted
+    if now - raised_at < boost_config.get("cooldown", 0):
+        return boost
+    log.info(f"Pending user pod boost for pool {pool_name} lowered to {wanted}")
+    if wanted > 0:
+        boost_state[pool_name] = (wanted, now)
+    else:
+        boost_state.pop(pool_name, None)
+    return wanted
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Track which node pools need reprocessing.
+
+Processing a pool reads every one of its nodes and placeholder pods from the
+API and re-applies its deployment, which on a large cluster with many pools
+is most of the scaler's work even when nothing has changed.  Each cycle the
+scaler instead fingerprints what a pool's decision depends on -- its nodes
+and their requests, cordons, placeholder pods, config, calendar override and
+forecast floor -- and only processes the pools whose fingerprint changed.
+
+A pool is also due when one of its grace periods runs out (the decision can
+change then with no change in the cluster) and, as a safety net against
+anything the fingerprint misses, every `resync_interval` seconds.
+"""
+
+import hashlib
+import json
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+def fingerprint(*parts):
+    """A stable digest of JSON-like parts; sets are treated as sorted lists."""
+    data = json.dumps(parts, sort_keys=True, default=sorted)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+class DirtyPools:
+    """Remembers each pool's last fingerprint, result and grace deadline.
+
+    Times are on the same clock as the grace-period state (perf_counter in
+    the scaler, snapshot time in tests).
+    """
+
+    def __init__(self, resync_interval=600, clock=time.perf_counter):
+        self.resync_interval = resync_interval
+        self._clock = clock
+        # pool -> {"fingerprint", "result", "expires", "above"}
+        self._pools = {}
+        self._last_resync = None
+
+    def invalidate(self):
+        """Mark every pool dirty, e.g. after becoming leader."""
+        self._pools.clear()
+
+    def forget(self, pool_name):
+        """Mark one pool dirty, e.g. after a write to it failed."""
+        self._pools.pop(pool_name, None)
+
+    def start_cycle(self):
+        """Returns this cycle's time, forgetting all pools if a resync is due."""
+        now = self._clock()
+        last = self._last_resync
+        if last is None or now - last >= self.resync_interval:
+            if last is not None:
+                log.info("Periodic full resync of all pools")
+            self._pools.clear()
+            self._last_resync = now
+        return now
+
+    def is_dirty(self, pool_name, pool_fingerprint, now):
+        state = self._pools.get(pool_name)
+        if state is None:
+            return True
+        if state["fingerprint"] != pool_fingerprint:
+            return True
+        return state["expires"] is not None and now >= state["expires"]
+
+    def processed(
+        self,
+        pool_name,
+        pool_fingerprint,
+        result,
+        now,
+        pool_nodes,
+        node_first_seen,
+        node_last_above_threshold,
+        grace,
+    ):
+        """Record that a pool was processed at now with the given result.
+
+        Nodes whose node_last_above_threshold is now were busy or hosting a
+        placeholder; any other node still in a grace period may become
+        reducible when it ends, which makes the pool due again.
+        """
+        above = {n for n in pool_nodes if node_last_above_threshold.get(n) == now}
+        deadlines = [
+            t + grace
+            for node in pool_nodes
+            if node not in above
+            for t in (node_first_seen.get(node), node_last_above_threshold.get(node))
+            if t is not None and t + grace > now
+        ]
+        self._pools[pool_name] = {
+            "fingerprint": pool_fingerprint,
+            "result": result,
+            "expires": min(deadlines, default=None),
+            "above": above,
+        }
+
+    def skip(self, pool_name, now, node_last_above_threshold):
+        """Returns the pool's last result, carrying its state forward to now.
+
+        Nothing in the pool changed, so nodes that were above the threshold
+        then still are; their timestamps are refreshed as processing would,
+        so the recently-freed grace period starts when they actually free up.
+        """
+        state = self._pools[pool_name]
+        for node in state["above"]:
+            node_last_above_threshold[node] = now
+        return state["result"]
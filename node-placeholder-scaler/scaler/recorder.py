@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Compact on-disk recording of what the scaler saw and decided each cycle.
+
+A recording is a directory of segment files.  Each segment is a sequence of
+chunks, and each chunk holds a few cycles stored column by column: every
+integer column is delta-encoded (per node, consecutive cycles rarely differ,
+so most deltas are zero) and the chunk is zlib-compressed.  Next to every
+segment an .idx file lists each chunk's time range and offset, so a time
+window can be loaded without decompressing the whole recording.  Segments
+rotate by size and the oldest are deleted past a limit.
+
+Load a recording for analysis with load_columns() (one list per column,
+e.g. for pandas.DataFrame) or iter_cycles() (one snapshot dict per cycle, in
+the format scaler/simulate.py replays).
+"""
+
+import json
+import logging
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+CHUNK_MAGIC = b"NPR1"
+_CHUNK_HEADER = struct.Struct(">4sI")
+# start ms, end ms, offset of the chunk in the segment, chunk length.
+_INDEX_ENTRY = struct.Struct(">qqQI")
+
+FLAG_UNSCHEDULABLE = 1
+FLAG_PLACEHOLDER = 2
+
+NODE_COLUMNS = (
+    "node",
+    "cycle",
+    "pool",
+    "cpu_alloc_m",
+    "cpu_requested_m",
+    "mem_alloc_mi",
+    "mem_requested_mi",
+    "flags",
+)
+POOL_COLUMNS = ("cycle", "pool", "override", "replicas")
+
+
+def _delta_encode(values):
+    out = array("q")
+    previous = 0
+    for v in values:
+        out.append(v - previous)
+        previous = v
+    if sys.byteorder == "big":
+        out.byteswap()
+    return out.tobytes()
+
+
+def _delta_decode(data):
+    deltas = array("q")
+    deltas.frombytes(data)
+    if sys.byteorder == "big":
+        deltas.byteswap()
+    out = []
+    total = 0
+    for d in deltas:
+        total += d
+        out.append(total)
+    return out
+
+
+def encode_chunk(cycles):
+    """Encode a list of cycle dicts (see Recorder.record) as chunk bytes."""
+    names = {}
+    pools = {}
+
+    def _id(table, key):
+        return table.setdefault(key, len(table))
+
+    times = [c["time_ms"] for c in cycles]
+    node_rows = []
+    pool_rows = []
+    for i, cycle in enumerate(cycles):
+        for node, info in cycle["nodes"].items():
+            flags = (FLAG_UNSCHEDULABLE if info["unschedulable"] else 0) | (
+                FLAG_PLACEHOLDER if info["placeholder"] else 0
+            )
+            node_rows.append(
+                (
+                    _id(names, node),
+                    i,
+                    _id(pools, info["pool"]),
+                    info["cpu_alloc_m"],
+                    info["cpu_requested_m"],
+                    info["mem_alloc_mi"],
+                    info["mem_requested_mi"],
+                    flags,
+                )
+            )
+        for pool, info in cycle["pools"].items():
+            override = info["override"]
+            pool_rows.append(
+                (
+                    i,
+                    _id(pools, pool),
+                    -1 if override is None else override,
+                    info["replicas"],
+                )
+            )
+    # Node-major order puts each node's consecutive cycles next to each
+    # other, so the deltas are mostly zero.
+    node_rows.sort(key=lambda r: (r[0], r[1]))
+
+    columns = [_delta_encode(times)]
+    columns += [_delta_encode(col) for col in zip(*node_rows)] or [
+        b"" for _ in NODE_COLUMNS
+    ]
+    columns += [_delta_encode(col) for col in zip(*pool_rows)] or [
+        b"" for _ in POOL_COLUMNS
+    ]
+    header = json.dumps(
+        {
+            "nodes": list(names),
+            "pools": list(pools),
+            "lengths": [len(c) for c in columns],
+        }
+    ).encode()
+    payload = zlib.compress(
+        struct.pack(">I", len(header)) + header + b"".join(columns), 6
+    )
+    return _CHUNK_HEADER.pack(CHUNK_MAGIC, len(payload)) + payload
+
+
+def decode_chunk(data):
+    """Decode chunk bytes into (times, node_columns, pool_columns).
+
+    node_columns and pool_columns map column names to lists, with node and
+    pool ids resolved to names.
+    """
+    magic, length = _CHUNK_HEADER.unpack_from(data)
+    if magic != CHUNK_MAGIC:
+        raise ValueError("Not a recording chunk")
+    raw = zlib.decompress(data[_CHUNK_HEADER.size : _CHUNK_HEADER.size + length])
+    (header_length,) = struct.unpack_from(">I", raw)
+    header = json.loads(raw[4 : 4 + header_length])
+    offset = 4 + header_length
+    columns = []
+    for n in header["lengths"]:
+        columns.append(_delta_decode(raw[offset : offset + n]))
+        offset += n
+
+    times = columns[0]
+    node_columns = dict(zip(NODE_COLUMNS, columns[1 : 1 + len(NODE_COLUMNS)]))
+    pool_columns = dict(zip(POOL_COLUMNS, columns[1 + len(NODE_COLUMNS) :]))
+    node_columns["node"] = [header["nodes"][i] for i in node_columns["node"]]
+    node_columns["pool"] = [header["pools"][i] for i in node_columns["pool"]]
+    pool_columns["pool"] = [header["pools"][i] for i in pool_columns["pool"]]
+    return times, node_columns, pool_columns
+
+
+class Recorder:
+    """Append per-cycle scaler state to a size-rotated recording directory.
+
+    Cycles are buffered and written as one chunk every `chunk_cycles`
+    cycles (and on flush()/close()), so a crash loses at most that many.
+    """
+
+    def __init__(
+        self,
+        directory,
+        max_segment_bytes=16 * 1024 * 1024,
+        max_segments=8,
+        chunk_cycles=10,
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segments = max_segments
+        self.chunk_cycles = chunk_cycles
+        self._buffer = []
+        self._segment = None
+
+    def record(self, time, usable_resources, pool_results, replica_count_overrides):
+        """Buffer one cycle.
+
+        time is wall-clock seconds; usable_resources is the result of
+        get_usable_resources(); pool_results maps configured pool names to
+        the dicts returned by _process_pool.
+        """
+        placeholder_nodes = set()
+        unschedulable_nodes = set()
+        for result in pool_results.values():
+            placeholder_nodes |= result["placeholder_nodes"]
+            unschedulable_nodes |= result["unschedulable_nodes"]
+
+        nodes = {}
+        for pool, pool_nodes in usable_resources.items():
+            for node, info in pool_nodes.items():
+                nodes[node] = {
+                    "pool": pool,
+                    "cpu_alloc_m": info["cpu_alloc_m"],
+                    "cpu_requested_m": info["cpu_requested_m"],
+                    "mem_alloc_mi": info["mem_alloc_mi"],
+                    "mem_requested_mi": info["mem_requested_mi"],
+                    "unschedulable": node in unschedulable_nodes,
+                    "placeholder": node in placeholder_nodes,
+                }
+        self._buffer.append(
+            {
+                "time_ms": int(time * 1000),
+                "nodes": nodes,
+                "pools": {
+                    name: {
+                        "override": replica_count_overrides.get(name),
+                        "replicas": result["replicas"],
+                    }
+                    for name, result in pool_results.items()
+                },
+            }
+        )
+        if len(self._buffer) >= self.chunk_cycles:
+            self.flush()
+
+    def _segments(self):
+        return sorted(self.directory.glob("*.rec"), key=lambda p: int(p.stem))
+
+    def _open_segment(self, start_ms):
+        if self._segment is not None:
+            self._segment[0].close()
+            self._segment[1].close()
+        path = self.directory / f"{start_ms}.rec"
+        self._segment = (open(path, "ab"), open(path.with_suffix(".idx"), "ab"))
+        for old in self._segments()[: -self.max_segments]:
+            log.info(f"Removing old recording segment {old}")
+            old.unlink()
+            old.with_suffix(".idx").unlink(missing_ok=True)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        chunk = encode_chunk(self._buffer)
+        start_ms = self._buffer[0]["time_ms"]
+        end_ms = self._buffer[-1]["time_ms"]
+        self._buffer = []
+
+        if self._segment is None or self._segment[0].tell() >= self.max_segment_bytes:
+            self._open_segment(start_ms)
+        data, index = self._segment
+        offset = data.tell()
+        data.write(chunk)
+        data.flush()
+        # The index entry is only written once the chunk is on disk, so a
+        # reader never follows an entry to a partial chunk.
+        index.write(_INDEX_ENTRY.pack(start_ms, end_ms, offset, len(chunk)))
+        index.flush()
+
+    def close(self):
+        self.flush()
+        if self._segment is not None:
+            self._segment[0].close()
+            self._segment[1].close()
+            self._segment = None
+
+
+def _read_chunks(directory, start=None, end=None):
+    """Yield decoded chunks overlapping [start, end] (wall-clock seconds)."""
+    start_ms = None if start is None else int(start * 1000)
+    end_ms = None if end is None else int(end * 1000)
+    for segment in sorted(Path(directory).glob("*.rec"), key=lambda p: int(p.stem)):
+        index_path = segment.with_suffix(".idx")
+        if not index_path.exists():
+            continue
+        index = index_path.read_bytes()
+        usable = len(index) - len(index) % _INDEX_ENTRY.size
+        with open(segment, "rb") as f:
+            for first_ms, last_ms, offset, length in _INDEX_ENTRY.iter_unpack(
+                index[:usable]
+            ):
+                if start_ms is not None and last_ms < start_ms:
+                    continue
+                if end_ms is not None and first_ms > end_ms:
+                    continue
+                f.seek(offset)
+                data = f.read(length)
+                if len(data) < length:
+                    log.warning(f"Truncated chunk at {segment}:{offset}")
+                    break
+                yield decode_chunk(data)
+
+
+def _in_range(time_ms, start, end):
+    return (start is None or time_ms >= start * 1000) and (
+        end is None or time_ms <= end * 1000
+    )
+
+
+def load_columns(directory, start=None, end=None):
+    """Load a recording as (node_columns, pool_columns) dicts of lists.
+
+    Both have a "time" column in wall-clock seconds instead of the internal
+    "cycle" column.
+    """
+    node_out = {c: [] for c in ("time",) + NODE_COLUMNS if c != "cycle"}
+    pool_out = {c: [] for c in ("time",) + POOL_COLUMNS if c != "cycle"}
+    for times, node_columns, pool_columns in _read_chunks(directory, start, end):
+        for out, columns, names in (
+            (node_out, node_columns, NODE_COLUMNS),
+            (pool_out, pool_columns, POOL_COLUMNS),
+        ):
+            for row, cycle in enumerate(columns["cycle"]):
+                time_ms = times[cycle]
+                if not _in_range(time_ms, start, end):
+                    continue
+                out["time"].append(time_ms / 1000)
+                for name in names:
+                    if name != "cycle":
+                        out[name].append(columns[name][row])
+    return node_out, pool_out
+
+
+def iter_cycles(directory, start=None, end=None):
+    """Yield one dict per recorded cycle, oldest first.
+
+    Each has "time" (wall-clock seconds), "nodes" in the snapshot format of
+    scaler/simulate.py and "pools" mapping configured pool names to the
+    calendar override and chosen replica count.
+    """
+    for times, node_columns, pool_columns in _read_chunks(directory, start, end):
+        cycles = [{"time": t / 1000, "nodes": {}, "pools": {}} for t in times]
+        for row, cycle in enumerate(node_columns["cycle"]):
+            flags = node_columns["flags"][row]
+            cycles[cycle]["nodes"][node_columns["node"][row]] = {
+                "pool": node_columns["pool"][row],
+                "cpu_alloc_m": node_columns["cpu_alloc_m"][row],
+                "cpu_requested_m": node_columns["cpu_requested_m"][row],
+                "mem_alloc_mi": node_columns["mem_alloc_mi"][row],
+                "mem_requested_mi": node_columns["mem_requested_mi"][row],
+                "unschedulable": bool(flags & FLAG_UNSCHEDULABLE),
+                "placeholder": bool(flags & FLAG_PLACEHOLDER),
+            }
+        for row, cycle in enumerate(pool_columns["cycle"]):
+            override = pool_columns["override"][row]
+            cycles[cycle]["pools"][pool_columns["pool"][row]] = {
+                "override": None if override < 0 else override,
+                "replicas": pool_columns["replicas"][row],
+            }
+        for cycle in cycles:
+            if _in_range(int(cycle["time"] * 1000), start, end):
+                yield cycle
@@ -1,28 +1,110 @@
 #!/usr/bin/env python3
 import argparse
+import atexit
+import contextlib
 import logging
-import subprocess
-import tempfile
+import os
+import signal
+import socket
+import threading
 import time
 from copy import deepcopy
 
 from kubernetes import client, config
 from ruamel.yaml import YAML
 
-from .calendar_parser import _event_repr, get_calendar, get_events
-from .utils import parse_cpu, parse_memory
+from .calendar_parser import (
+    CalendarCache,
+    OccurrenceReader,
+    _event_repr,
+    event_replica_counts,
+)
+from .calendars import CalendarFetcher, calendar_sources
+from .capacity import (
+    parse_profiles,
+    placeholder_capacity,
+    placeholder_units,
+    validate_user_pod_profiles,
+)
+from .forecast import ArrivalForecaster, validate_forecast
+from .grace_state import GraceStateFile
+from .health import Health, HealthGroup, Watchdog, serve_health
+from .interval import AdaptiveInterval
+from .leader import LeaderElector
+from .pressure import pending_by_pool, update_pending_boost, validate_pending_boost
+from .reconcile import DirtyPools, fingerprint
+from .recorder import Recorder
+from .shapes import POOL_LABEL, SHAPE_LABEL, shape_deployments, validate_shapes
+from .sizing import PlaceholderSizer, validate_auto_size
+from .utils import parse_cpu, parse_memory, parse_quantity
+from .watcher import PlaceholderWatcher
+from .zones import (
+    ZONE_LABEL,
+    nodes_by_zone,
+    validate_zones,
+    zone_deployment_name,
+    zone_pool_config,
+    zone_share,
+)
 
 yaml = YAML(typ="safe")
 log = logging.getLogger(__name__)
 
+# Field manager name used for server-side apply of placeholder deployments.
+FIELD_MANAGER = "node-placeholder-scaler"
 
-def _get_v1_client() -> client.CoreV1Api:
-    """Load kube config and return a CoreV1Api instance."""
+
+def _load_kube_config():
     try:
         config.load_incluster_config()
     except config.ConfigException:
         config.load_kube_config()
-    return client.CoreV1Api()
+
+
+# The cluster the _get_*_client helpers talk to from the current thread; see
+# use_cluster().
+_cluster = threading.local()
+
+
+@contextlib.contextmanager
+def use_cluster(api_client):
+    """Send this thread's API calls through api_client (None: default config)."""
+    previous = getattr(_cluster, "api_client", None)
+    _cluster.api_client = api_client
+    try:
+        yield
+    finally:
+        _cluster.api_client = previous
+
+
+def _cluster_api_client():
+    """This thread's ApiClient, or None once the default config is loaded."""
+    api_client = getattr(_cluster, "api_client", None)
+    if api_client is None:
+        _load_kube_config()
+    return api_client
+
+
+def _get_v1_client() -> client.CoreV1Api:
+    """Load kube config and return a CoreV1Api instance."""
+    api_client = _cluster_api_client()
+    return client.CoreV1Api(api_client) if api_client else client.CoreV1Api()
+
+
+def _get_apps_v1_client() -> client.AppsV1Api:
+    """Load kube config and return an AppsV1Api instance."""
+    api_client = _cluster_api_client()
+    return client.AppsV1Api(api_client) if api_client else client.AppsV1Api()
+
+
+def _get_coordination_v1_client() -> client.CoordinationV1Api:
+    """Load kube config and return a CoordinationV1Api instance."""
+    api_client = _cluster_api_client()
+    return (
+        client.CoordinationV1Api(api_client)
+        if api_client
+        else client.CoordinationV1Api()
+    )
 
 
 def get_node_pool_mapping(label_key="hub.jupyter.org/pool-name"):
@@ -40,8 +122,43 @@ def get_node_pool_mapping(label_key="hub.jupyter.org/pool-name"):
     return node_to_pool
 
 
+def _extended_resources(resources):
+    """Returns {name: float} for the resources in a quantity dict other than cpu and memory."""
+    extended = {}
+    for name, quantity in resources.items():
+        if name in ("cpu", "memory"):
+            continue
+        try:
+            extended[name] = parse_quantity(quantity)
+        except ValueError:
+            extended[name] = 0.0
+    return extended
+
+
+def _node_ready_since(node):
+    """Wall-clock seconds since the epoch at which a node became Ready.
+
+    Taken from the Ready condition's lastTransitionTime, or the node's
+    creationTimestamp if it reports no Ready condition.  None if the node is
+    not Ready or has neither timestamp.
+    """
+    for condition in node.status.conditions or []:
+        if condition.type == "Ready":
+            if condition.status != "True":
+                return None
+            if condition.last_transition_time is not None:
+                return condition.last_transition_time.timestamp()
+    created = node.metadata.creation_timestamp
+    return created.timestamp() if created is not None else None
+
+
 def get_allocatable_resources_by_pool(node_to_pool_dict):
-    """Returns dict: {pool: {node: {'cpu_m': int, 'mem_mi': int}}} with allocatable resources."""
+    """Returns dict: {pool: {node: {'cpu_m': int, 'mem_mi': int, 'extended': dict, 'ready_since': float, 'labels': dict, 'unschedulable': bool}}} with allocatable resources.
+
+    'extended' maps other resource names (e.g. nvidia.com/gpu,
+    ephemeral-storage) to their allocatable amount; 'ready_since' is when
+    the node became Ready (see _node_ready_since).
+    """
     v1 = _get_v1_client()
 
     pool_resources = {}
@@ -72,13 +189,33 @@ def get_allocatable_resources_by_pool(node_to_pool_dict):
         except ValueError:
             mem_mi = 0
 
-        pool_resources[pool][node_name] = {"cpu_m": cpu_m, "mem_mi": mem_mi}
+        pool_resources[pool][node_name] = {
+            "cpu_m": cpu_m,
+            "mem_mi": mem_mi,
+            "extended": _extended_resources(alloc),
+            "ready_since": _node_ready_since(node),
+            "labels": dict(node.metadata.labels or {}),
+            "unschedulable": bool(node.spec.unschedulable),
+        }
 
     return pool_resources
 
 
+def _is_node_overhead(pod):
+    """Whether a pod runs on every node: a DaemonSet pod or a static pod."""
+    if "kubernetes.io/config.mirror" in (pod.metadata.annotations or {}):
+        return True
+    return any(
+        ref.kind in ("DaemonSet", "Node") for ref in pod.metadata.owner_references or []
+    )
+
+
 def get_requested_resources_by_pool(node_to_pool_dict):
-    """Returns dict: {pool: {node: {'cpu_m': int, 'mem_mi': int}}} with requested resources."""
+    """Returns dict: {pool: {node: {'cpu_m': int, 'mem_mi': int, 'extended': dict, 'overhead': dict}}} with requested resources.
+
+    'overhead' holds the 'cpu_m' and 'mem_mi' requested by DaemonSet and
+    static pods alone, which a fresh node has too.
+    """
     v1 = _get_v1_client()
     pods = v1.list_pod_for_all_namespaces().items
 
@@ -95,7 +232,15 @@ def get_requested_resources_by_pool(node_to_pool_dict):
             pool_resources[pool] = {}
 
         if node not in pool_resources[pool]:
-            pool_resources[pool][node] = {"cpu_m": 0, "mem_mi": 0}
+            pool_resources[pool][node] = {
+                "cpu_m": 0,
+                "mem_mi": 0,
+                "extended": {},
+                "overhead": {"cpu_m": 0, "mem_mi": 0},
+            }
+        extended = pool_resources[pool][node]["extended"]
+        overhead = pool_resources[pool][node]["overhead"]
+        is_overhead = _is_node_overhead(pod)
 
         for container in pod.spec.containers:
             resources = container.resources.requests or {}
@@ -114,10 +259,78 @@ def get_requested_resources_by_pool(node_to_pool_dict):
 
             pool_resources[pool][node]["cpu_m"] += cpu_m
             pool_resources[pool][node]["mem_mi"] += mem_mi
+            if is_overhead:
+                overhead["cpu_m"] += cpu_m
+                overhead["mem_mi"] += mem_mi
+            for name, amount in _extended_resources(resources).items():
+                extended[name] = extended.get(name, 0.0) + amount
 
     return pool_resources
 
 
+def _resource_usage(alloc, requested):
+    free = alloc - requested
+    return {
+        "alloc": alloc,
+        "requested": requested,
+        "free": free,
+        "free_ratio": float(free) / alloc if alloc > 0 else 0.0,
+    }
+
+
+def node_usable_resources(
+    pool,
+    cpu_alloc,
+    cpu_requested,
+    mem_alloc,
+    mem_requested,
+    extended_alloc=None,
+    extended_requested=None,
+    ready_since=None,
+    overhead=None,
+    labels=None,
+    unschedulable=False,
+):
+    """Returns the per-node resource summary used by the scaling decision.
+
+    Besides the cpu_*/mem_* fields, "resources" maps every resource name
+    ("cpu", "memory" and any extended resources) to its alloc, requested,
+    free and free_ratio, for pools scaled on scalingResources.  ready_since
+    is the wall-clock time the node became Ready, if known.  "overhead" is
+    the cpu_m and mem_mi of DaemonSet and static pods, for autoSize, and
+    "labels" the node's labels, for shapes, and "unschedulable" whether it
+    is cordoned.
+    """
+    free_cpu = cpu_alloc - cpu_requested
+    free_mem = mem_alloc - mem_requested
+    extended_alloc = extended_alloc or {}
+    extended_requested = extended_requested or {}
+    resources = {
+        "cpu": _resource_usage(cpu_alloc, cpu_requested),
+        "memory": _resource_usage(mem_alloc, mem_requested),
+    }
+    for name in set(extended_alloc) | set(extended_requested):
+        resources[name] = _resource_usage(
+            extended_alloc.get(name, 0.0), extended_requested.get(name, 0.0)
+        )
+    return {
+        "cpu_alloc_m": cpu_alloc,
+        "cpu_requested_m": cpu_requested,
+        "cpu_free_m": free_cpu,
+        "cpu_free_ratio": float(free_cpu) / cpu_alloc if cpu_alloc > 0 else 0.0,
+        "mem_alloc_mi": mem_alloc,
+        "mem_requested_mi": mem_requested,
+        "mem_free_mi": free_mem,
+        "mem_free_ratio": float(free_mem) / mem_alloc if mem_alloc > 0 else 0.0,
+        "node_pool": pool,
+        "resources": resources,
+        "ready_since": ready_since,
+        "overhead": overhead or {"cpu_m": 0, "mem_mi": 0},
+        "labels": labels or {},
+        "unschedulable": unschedulable,
+    }
+
+
 def get_usable_resources():
     node_to_pool_dict = get_node_pool_mapping()
     alloc = get_allocatable_resources_by_pool(node_to_pool_dict)
@@ -129,27 +342,22 @@ def get_usable_resources():
             usable_resources_result[pool] = {}
 
         for node, node_info in pool_info.items():
-            if node not in usable_resources_result[pool]:
-                usable_resources_result[pool][node] = {}
-
             requested = requested_resources.get(pool, {}).get(
                 node, {"cpu_m": 0, "mem_mi": 0}
             )
-            cpu_alloc = node_info["cpu_m"]
-            mem_alloc = node_info["mem_mi"]
-            free_cpu = cpu_alloc - requested["cpu_m"]
-            free_mem = mem_alloc - requested["mem_mi"]
-            usable_resources_result[pool][node] = {
-                "cpu_alloc_m": cpu_alloc,
-                "cpu_requested_m": requested["cpu_m"],
-                "cpu_free_m": free_cpu,
-                "cpu_free_ratio": float(free_cpu) / cpu_alloc if cpu_alloc > 0 else 0.0,
-                "mem_alloc_mi": mem_alloc,
-                "mem_requested_mi": requested["mem_mi"],
-                "mem_free_mi": free_mem,
-                "mem_free_ratio": float(free_mem) / mem_alloc if mem_alloc > 0 else 0.0,
-                "node_pool": pool,
-            }
+            usable_resources_result[pool][node] = node_usable_resources(
+                pool,
+                node_info["cpu_m"],
+                requested["cpu_m"],
+                node_info["mem_mi"],
+                requested["mem_mi"],
+                node_info.get("extended"),
+                requested.get("extended"),
+                node_info.get("ready_since"),
+                requested.get("overhead"),
+                node_info.get("labels"),
+                node_info.get("unschedulable", False),
+            )
 
     return usable_resources_result
 
@@ -176,6 +384,16 @@ def placeholder_pod_running_on_node(node_name, namespace, label_selector):
         return False
 
 
+def _selects_pool(pod_node_selector, node_selector):
+    """Whether a pod's nodeSelector asks for the pool with node_selector.
+
+    A placeholder for one of a pool's shapes (see scaler/shapes.py) adds the
+    shape's label to the pool's nodeSelector.
+    """
+    pod_node_selector = pod_node_selector or {}
+    return all(pod_node_selector.get(k) == v for k, v in node_selector.items())
+
+
 def any_placeholder_pod_pending(namespace, label_selector, node_selector):
     """Returns True if any placeholder pod for the given pool is Pending.
 
@@ -189,9 +407,8 @@ def any_placeholder_pod_pending(namespace, label_selector, node_selector):
         ).items
 
         for pod in pods:
-            if (
-                pod.status.phase == "Pending"
-                and pod.spec.node_selector == node_selector
+            if pod.status.phase == "Pending" and _selects_pool(
+                pod.spec.node_selector, node_selector
             ):
                 return True
 
@@ -202,12 +419,82 @@ def any_placeholder_pod_pending(namespace, label_selector, node_selector):
         return False
 
 
+def get_placeholder_pods(namespace, label_selector):
+    """Returns the node, phase and nodeSelector of every placeholder pod.
+
+    One list call for all pools, used to tell which pools' placeholders
+    changed.  Returns None on API error.
+    """
+    v1 = _get_v1_client()
+
+    try:
+        pods = v1.list_namespaced_pod(
+            namespace=namespace, label_selector=label_selector
+        ).items
+    except client.exceptions.ApiException as e:
+        log.error(f"Kubernetes API error: {e}")
+        return None
+    return [
+        {
+            "node": pod.spec.node_name,
+            "phase": pod.status.phase,
+            "nodeSelector": pod.spec.node_selector,
+        }
+        for pod in pods
+    ]
+
+
+def get_user_pod_arrivals(
+    since, until, label_selector, node_selector_key, node_to_pool
+):
+    """Returns {pool: count} of user pods created in the interval (since, until].
+
+    since and until are wall-clock timestamps.  A pod's pool is taken from
+    its nodeSelector, or failing that from the node it was scheduled to.
+    """
+    v1 = _get_v1_client()
+
+    try:
+        pods = v1.list_pod_for_all_namespaces(label_selector=label_selector).items
+    except client.exceptions.ApiException as e:
+        log.error(f"Kubernetes API error: {e}")
+        return {}
+
+    arrivals = {}
+    for pod in pods:
+        created = pod.metadata.creation_timestamp
+        if created is None or not since < created.timestamp() <= until:
+            continue
+        pool = (pod.spec.node_selector or {}).get(node_selector_key)
+        if pool is None:
+            pool = node_to_pool.get(pod.spec.node_name)
+        if pool is None:
+            continue
+        arrivals[pool] = arrivals.get(pool, 0) + 1
+    return arrivals
+
+
+def get_pending_user_pods(label_selector):
+    """Returns the Pending user pods in all namespaces, or [] on API error."""
+    v1 = _get_v1_client()
+
+    try:
+        return v1.list_pod_for_all_namespaces(
+            label_selector=label_selector, field_selector="status.phase=Pending"
+        ).items
+    except client.exceptions.ApiException as e:
+        log.error(f"Kubernetes API error: {e}")
+        return []
+
+
 def compute_replica_count(
     modified_replica,
     override_replica_count,
     calendar_replica_count,
     calendar_override_enabled,
     has_pending_placeholder=False,
+    forecast_replica_count=None,
+    pending_boost=0,
 ):
     """Return the target placeholder replica count for a pool.
 
@@ -218,13 +505,21 @@ def compute_replica_count(
     so the deployment isn't scaled down during the window before the pod finds
     a new home, and any calendar-provided count is preserved even when calendar
     override isn't enabled.
+
+    Unless the calendar override applies, forecast_replica_count (the
+    predicted demand from scaler/forecast.py) is a floor on the result, and
+    pending_boost (extra replicas for unschedulable user pods, see
+    scaler/pressure.py) is added to it.
     """
     if calendar_replica_count is not None and calendar_override_enabled:
         return calendar_replica_count
     elif has_pending_placeholder:
-        return max(override_replica_count, 0)
+        replica_count = max(override_replica_count, 0)
     else:
-        return max(modified_replica, 0)
+        replica_count = max(modified_replica, 0)
+    if forecast_replica_count is not None:
+        replica_count = max(replica_count, forecast_replica_count)
+    return replica_count + pending_boost
 
 
 def is_unschedulable_node(node_name):
@@ -239,10 +534,14 @@ def is_unschedulable_node(node_name):
         return False
 
 
-def make_deployment(pool_name, template, node_selector, resources, replicas):
+def make_deployment(
+    pool_name, template, node_selector, resources, replicas, labels=None
+):
     deployment_name = f"{pool_name}-placeholder"
     deployment = deepcopy(template)
     deployment["metadata"]["name"] = deployment_name
+    if labels:
+        deployment["metadata"].setdefault("labels", {}).update(labels)
     deployment["spec"]["replicas"] = replicas
     deployment["spec"]["template"]["spec"]["nodeSelector"] = node_selector
     deployment["spec"]["template"]["spec"]["containers"][0]["resources"] = resources
@@ -250,6 +549,71 @@ def make_deployment(pool_name, template, node_selector, resources, replicas):
     return deployment
 
 
+def apply_deployment(deployment, namespace):
+    """Server-side apply a placeholder deployment.
+
+    Creates the deployment if it does not exist, otherwise updates the fields
+    the scaler owns.  Returns the applied V1Deployment, or None on API error.
+    The generated client has no apply method, so the PATCH is issued through
+    its ApiClient with the apply-patch content type.
+    """
+    apps_v1 = _get_apps_v1_client()
+    name = deployment["metadata"]["name"]
+
+    try:
+        return apps_v1.api_client.call_api(
+            "/apis/apps/v1/namespaces/{namespace}/deployments/{name}",
+            "PATCH",
+            path_params={"namespace": namespace, "name": name},
+            query_params=[("fieldManager", FIELD_MANAGER), ("force", "true")],
+            header_params={
+                "Accept": "application/json",
+                "Content-Type": "application/apply-patch+yaml",
+            },
+            body=deployment,
+            response_type="V1Deployment",
+            auth_settings=["BearerToken"],
+            _return_http_data_only=True,
+        )
+
+    except client.exceptions.ApiException as e:
+        log.error(f"Kubernetes API error applying deployment {name}: {e}")
+        return None
+
+
+def get_pool_deployments(namespace, pool_name):
+    """Returns {name: deployment dict} of a pool's per-zone and per-shape deployments.
+
+    Returns None on API error.
+    """
+    apps_v1 = _get_apps_v1_client()
+
+    try:
+        deployments = apps_v1.list_namespaced_deployment(
+            namespace=namespace, label_selector=f"{POOL_LABEL}={pool_name}"
+        ).items
+    except client.exceptions.ApiException as e:
+        log.error(f"Kubernetes API error: {e}")
+        return None
+    return {
+        d.metadata.name: apps_v1.api_client.sanitize_for_serialization(d)
+        for d in deployments
+    }
+
+
+def get_deployment(namespace, name):
+    """Returns a deployment as a dict, or None if it doesn't exist or on API error."""
+    apps_v1 = _get_apps_v1_client()
+
+    try:
+        deployment = apps_v1.read_namespaced_deployment(name, namespace)
+    except client.exceptions.ApiException as e:
+        if e.status != 404:
+            log.error(f"Kubernetes API error reading deployment {name}: {e}")
+        return None
+    return apps_v1.api_client.sanitize_for_serialization(deployment)
+
+
 def update_node_first_seen(node: str, node_first_seen: dict, now: float) -> float:
     """Record the first time a node is observed and return its observed age in seconds.
 
@@ -261,6 +625,20 @@ def update_node_first_seen(node: str, node_first_seen: dict, now: float) -> floa
     return now - node_first_seen[node]
 
 
+def node_age(node, ready_since, node_first_seen, now, wall_now):
+    """Return a node's age in seconds for the new-node grace period.
+
+    When the cluster says when the node became Ready (ready_since, wall-clock
+    seconds), the age is measured from then, so nodes are neither new again
+    after a scaler restart nor protected long after they joined.  Otherwise
+    it falls back to when the scaler first observed the node.  Either way
+    node_first_seen is updated (on the `now` clock) to match.
+    """
+    if ready_since is not None:
+        node_first_seen[node] = now - max(wall_now - ready_since, 0.0)
+    return update_node_first_seen(node, node_first_seen, now)
+
+
 def update_node_last_above_threshold(
     node: str, node_last_above_threshold: dict, now: float
 ) -> None:
@@ -280,71 +658,174 @@ def get_replica_counts(events):
     replica_counts = {}
     for ev in events:
         log.info(f"Found event {_event_repr(ev)}")
-        if ev.description:
-            pools_replica_config = None
-            try:
-                pools_replica_config = yaml.load(ev.description)
-            except Exception as e:
-                log.error(f"Caught unhandled exception parsing event description:\n{e}")
-                log.error(f"Error in parsing description of {_event_repr(ev)}")
-                log.error(f"{ev.description=}")
-            if pools_replica_config is None:
-                log.error(f"No description in event {_event_repr(ev)}")
-                continue
-            elif isinstance(pools_replica_config, str):
-                log.error("Event description not parsed as dictionary.")
-                log.error(f"{ev.description=}")
-                continue
-            for pool_name, count in pools_replica_config.items():
-                if not isinstance(count, int):
-                    log.info(f"Count {count} for pool {pool_name} not an integer.")
-                    continue
-                if count < 0:
-                    log.error(
-                        f"Count {count} for pool {pool_name} is negative; skipping."
-                    )
-                    continue
-                if pool_name not in replica_counts:
-                    replica_counts[pool_name] = count
-                else:
-                    replica_counts[pool_name] = max(replica_counts[pool_name], count)
-        else:
-            log.error(f"Event has no description: {_event_repr(ev)}")
+        _merge_replica_counts(replica_counts, event_replica_counts(ev))
     return replica_counts
 
 
-def _process_pool(
+def _merge_replica_counts(replica_counts, counts):
+    """Raise replica_counts in place to at least counts, pool by pool."""
+    for pool_name, count in counts.items():
+        replica_counts[pool_name] = max(replica_counts.get(pool_name, count), count)
+
+
+def calendar_replica_counts(calendars, url):
+    """Replica counts from the events now on at url, or None if unavailable.
+
+    calendars is the CalendarCache to read the calendar through; a calendar
+    that can't be refreshed is still used, with a warning.
+    """
+    calendar = calendars.get(url)
+    if not calendar:
+        return None
+    age = calendars.ages().get(url, 0)
+    if age > 2 * calendars.ttl:
+        log.warning(f"Calendar {url} could not be refreshed for {age:.0f}s")
+    occurrences = calendar.at()
+    log.info(f"Found {len(occurrences)} events at {url}.")
+    replica_counts = {}
+    for occurrence in occurrences:
+        log.info(f"Found event {occurrence.label}")
+        _merge_replica_counts(replica_counts, occurrence.counts)
+    return replica_counts
+
+
+def validate_scaling_resources(pool_name, pool_config):
+    """Raise ValueError if a pool's scalingResources is malformed."""
+    scaling_resources = pool_config.get("scalingResources")
+    if scaling_resources is None:
+        return
+    if not isinstance(scaling_resources, list) or not scaling_resources:
+        raise ValueError(
+            f"scalingResources for pool {pool_name} must be a non-empty list"
+        )
+    for r in scaling_resources:
+        if (
+            not isinstance(r, dict)
+            or not isinstance(r.get("name"), str)
+            or not isinstance(r.get("threshold"), (int, float))
+            or isinstance(r.get("threshold"), bool)
+        ):
+            raise ValueError(
+                f"scalingResources entries for pool {pool_name} need a name and a numeric threshold, got {r!r}"
+            )
+
+
+STRATEGIES = ("cpu", "mem", "balanced")
+
+
+def validate_pool_settings(pool_name, pool_config):
+    """Raise ValueError if a pool's strategy, threshold or grace period overrides are malformed."""
+    strategy = pool_config.get("strategy")
+    if strategy is not None and strategy not in STRATEGIES:
+        raise ValueError(
+            f"strategy for pool {pool_name} must be one of {', '.join(STRATEGIES)}, got {strategy!r}"
+        )
+    for key in ("cpuThreshold", "memoryThreshold"):
+        value = pool_config.get(key)
+        if value is not None and (
+            not isinstance(value, (int, float))
+            or isinstance(value, bool)
+            or not 0 <= value <= 1
+        ):
+            raise ValueError(
+                f"{key} for pool {pool_name} must be a number between 0 and 1, got {value!r}"
+            )
+    grace = pool_config.get("nodeGracePeriod")
+    if grace is not None and (
+        not isinstance(grace, int) or isinstance(grace, bool) or grace < 0
+    ):
+        raise ValueError(
+            f"nodeGracePeriod for pool {pool_name} must be a non-negative integer, got {grace!r}"
+        )
+
+
+def node_is_free(
+    resources, strategy, cpu_threshold, memory_threshold, scaling_resources=None
+):
+    """Whether a node has enough free capacity to count toward reduction.
+
+    scaling_resources, a pool's list of {"name": ..., "threshold": ...},
+    replaces the strategy: the node is free if every listed resource has a
+    free ratio above its threshold.  Resources the node doesn't have count as
+    fully used.
+    """
+    if scaling_resources:
+        usage = resources.get("resources", {})
+        return all(
+            usage.get(r["name"], {}).get("free_ratio", 0.0) > r["threshold"]
+            for r in scaling_resources
+        )
+    cpu_free_ratio = resources["cpu_free_ratio"]
+    mem_free_ratio = resources["mem_free_ratio"]
+    return (
+        (strategy == "cpu" and cpu_free_ratio > cpu_threshold)
+        or (strategy == "mem" and mem_free_ratio > memory_threshold)
+        or (
+            strategy == "balanced"
+            and (cpu_free_ratio > cpu_threshold and mem_free_ratio > memory_threshold)
+        )
+    )
+
+
+def plan_pool(
     pool_name,
     pool_config,
     pool_usable_resources,
     replica_count_overrides,
     calendar_override_enabled,
-    placeholder_template,
-    namespace,
-    label_selector,
     strategy,
     cpu_threshold,
     memory_threshold,
     node_grace_period,
     node_first_seen,
     node_last_above_threshold,
+    placeholder_nodes,
+    unschedulable_nodes,
+    has_pending_placeholder,
+    now,
+    forecast_replica_count=None,
+    wall_now=None,
+    pending_boost=0,
 ):
-    """Compute and apply the placeholder deployment replica count for one pool."""
+    """Return the placeholder replica count for one pool.
+
+    This is the decision logic of _process_pool with the cluster state passed
+    in rather than read from the API, so it can be replayed offline (see
+    scaler/simulate.py).  placeholder_nodes and unschedulable_nodes are sets
+    of node names; now is a monotonic time in seconds and wall_now (default:
+    the current time) the wall-clock time nodes' ready_since is compared to.
+    Mutates node_first_seen and node_last_above_threshold in place.
+
+    strategy, cpu_threshold, memory_threshold and node_grace_period are the
+    defaults; the pool's strategy, cpuThreshold, memoryThreshold and
+    nodeGracePeriod config keys take precedence.
+    """
     log.info(f"Processing the node pool: {pool_name} ... ")
+    if wall_now is None:
+        wall_now = time.time()
+    strategy = pool_config.get("strategy", strategy)
+    cpu_threshold = pool_config.get("cpuThreshold", cpu_threshold)
+    memory_threshold = pool_config.get("memoryThreshold", memory_threshold)
+    node_grace_period = pool_config.get("nodeGracePeriod", node_grace_period)
     node_placeholder_deployment_reduction = 0
-    now = time.perf_counter()
+    # (free cpu, free memory) of the nodes counted for reduction, for the
+    # bin-packing model when the pool has userPodProfiles.
+    free_capacities = []
+    scaling_resources = pool_config.get("scalingResources")
+    if scaling_resources:
+        strategy_name = ", ".join(
+            f"{r['name']} > {r['threshold']}" for r in scaling_resources
+        )
+    else:
+        strategy_name = strategy
 
     for node, resources in pool_usable_resources.items():
         log.info(f"Checking node {node} in pool {pool_name} ...")
         log.info(
             f"Node {node} has {resources['cpu_free_ratio']:.2f} CPU free ratio and {resources['mem_free_ratio']:.2f} Memory free ratio."
         )
-        placeholder_pod_running = placeholder_pod_running_on_node(
-            node, namespace, label_selector
-        )
-        unschedulable_node = is_unschedulable_node(node)
 
-        if placeholder_pod_running:
+        if node in placeholder_nodes:
             # Node hosts the placeholder — mark it above threshold so
             # the recently-freed grace period applies if the placeholder
             # later moves off (e.g., evicted by a user login).
@@ -352,30 +833,28 @@ def _process_pool(
             log.info(
                 f"Placeholder pod is running on {node}. Skipping resource check for this node."
             )
-        elif unschedulable_node:
+        elif node in unschedulable_nodes:
             log.info(
                 f"Node {node} is unschedulable. Skipping resource check for this node."
             )
         else:
-            node_age_seconds = update_node_first_seen(node, node_first_seen, now)
+            node_age_seconds = node_age(
+                node, resources.get("ready_since"), node_first_seen, now, wall_now
+            )
             cpu_free_ratio = resources["cpu_free_ratio"]
             mem_free_ratio = resources["mem_free_ratio"]
-            is_free = (
-                (strategy == "cpu" and cpu_free_ratio > cpu_threshold)
-                or (strategy == "mem" and mem_free_ratio > memory_threshold)
-                or (
-                    strategy == "balanced"
-                    and (
-                        cpu_free_ratio > cpu_threshold
-                        and mem_free_ratio > memory_threshold
-                    )
-                )
+            is_free = node_is_free(
+                resources,
+                strategy,
+                cpu_threshold,
+                memory_threshold,
+                scaling_resources,
             )
             if not is_free:
                 update_node_last_above_threshold(node, node_last_above_threshold, now)
             elif node_age_seconds < node_grace_period:
                 log.info(
-                    f"Node {node} has been observed for {node_age_seconds:.0f}s, "
+                    f"Node {node} is {node_age_seconds:.0f}s old, "
                     f"within {node_grace_period}s grace period. Skipping reduction."
                 )
             elif (
@@ -389,9 +868,28 @@ def _process_pool(
                 )
             else:
                 log.info(
-                    f"Node {node} has sufficient resources (Strategy: {strategy}, CPU free ratio: {cpu_free_ratio:.2f}, Memory free ratio: {mem_free_ratio:.2f})."
+                    f"Node {node} has sufficient resources (Strategy: {strategy_name}, CPU free ratio: {cpu_free_ratio:.2f}, Memory free ratio: {mem_free_ratio:.2f})."
                 )
                 node_placeholder_deployment_reduction += 1
+                free_capacities.append(
+                    (resources["cpu_free_m"], resources["mem_free_mi"])
+                )
+
+    if pool_config.get("userPodProfiles"):
+        unit_cpu_m, unit_mem_mi = placeholder_capacity(
+            pool_config, pool_usable_resources
+        )
+        units = placeholder_units(
+            free_capacities,
+            parse_profiles(pool_config["userPodProfiles"]),
+            unit_cpu_m,
+            unit_mem_mi,
+        )
+        log.info(
+            f"Free capacity on {len(free_capacities)} nodes in pool {pool_name} "
+            f"fits {units:.2f} placeholders' worth of user pods."
+        )
+        node_placeholder_deployment_reduction = int(units)
 
     calendar_replica_count = replica_count_overrides.get(pool_name, None)
     config_replica_count = pool_config["replicas"]
@@ -399,14 +897,19 @@ def _process_pool(
         pool_name, pool_config["replicas"]
     )
     modified_replica = override_replica_count - node_placeholder_deployment_reduction
-    has_pending_placeholder = any_placeholder_pod_pending(
-        namespace, label_selector, pool_config["nodeSelector"]
-    )
     log.info(f"Calendar replica count for pool {pool_name}: {calendar_replica_count}")
     log.info(f"Config replica count for pool {pool_name}: {config_replica_count}")
     log.info(
         f"Pending placeholder pod detected for pool {pool_name}: {has_pending_placeholder}"
     )
+    if forecast_replica_count is not None:
+        log.info(
+            f"Forecast replica floor for pool {pool_name}: {forecast_replica_count}"
+        )
+    if pending_boost:
+        log.info(
+            f"Extra replicas for unschedulable user pods in pool {pool_name}: {pending_boost}"
+        )
     if calendar_replica_count is not None and calendar_override_enabled:
         log.info(
             f"Overriding replica count for pool {pool_name} with calendar replica count {calendar_replica_count} instead of modified replica count {modified_replica}."
@@ -426,34 +929,291 @@ def _process_pool(
         calendar_replica_count,
         calendar_override_enabled,
         has_pending_placeholder,
+        forecast_replica_count,
+        pending_boost,
     )
     log.info(f"Final replica count for pool {pool_name}: {replica_count}")
+    return replica_count
+
+
+def _process_pool(
+    pool_name,
+    pool_config,
+    pool_usable_resources,
+    replica_count_overrides,
+    calendar_override_enabled,
+    placeholder_template,
+    namespace,
+    label_selector,
+    strategy,
+    cpu_threshold,
+    memory_threshold,
+    node_grace_period,
+    node_first_seen,
+    node_last_above_threshold,
+    apply=True,
+    now=None,
+    forecast_replica_count=None,
+    pending_boost=0,
+    sizer=None,
+    placeholder_pods=None,
+    unschedulable_nodes=None,
+):
+    """Compute and apply the placeholder deployment replica count for one pool.
+
+    Reads placeholder and node state from the API, decides with plan_pool and
+    applies the deployment.  placeholder_pods (from get_placeholder_pods)
+    and unschedulable_nodes, if given, are used instead of reading them
+    node by node.  With apply=False (a leader-election follower) the
+    replica count is computed and the grace-period state updated, but nothing
+    is written.  A pool with zones is planned zone by zone, each with its
+    own deployment (see scaler/zones.py), and one with shapes has its
+    replicas split over one deployment per shape (see scaler/shapes.py),
+    sized by sizer.
+
+    Returns a dict with the chosen "replicas" and the "placeholder_nodes",
+    "unschedulable_nodes" and "has_pending_placeholder" the decision was
+    based on, and "write_failed" if any of the pool's deployments could not
+    be read or applied.
+    """
+    if now is None:
+        now = time.perf_counter()
+    if placeholder_pods is not None:
+        placeholder_nodes = {
+            pod["node"]
+            for pod in placeholder_pods
+            if pod["phase"] == "Running" and pod["node"] in pool_usable_resources
+        }
+    else:
+        placeholder_nodes = {
+            node
+            for node in pool_usable_resources
+            if placeholder_pod_running_on_node(node, namespace, label_selector)
+        }
+    if unschedulable_nodes is not None:
+        unschedulable_nodes = {
+            node for node in unschedulable_nodes if node in pool_usable_resources
+        }
+    else:
+        unschedulable_nodes = {
+            node for node in pool_usable_resources if is_unschedulable_node(node)
+        }
+
+    def pending(node_selector):
+        if placeholder_pods is None:
+            return any_placeholder_pod_pending(namespace, label_selector, node_selector)
+        return any(
+            pod["phase"] == "Pending"
+            and _selects_pool(pod["nodeSelector"], node_selector)
+            for pod in placeholder_pods
+        )
 
-    deployment = make_deployment(
-        pool_name,
-        placeholder_template,
-        pool_config["nodeSelector"],
-        pool_config["resources"],
-        replica_count,
+    plan = dict(
+        pool_name=pool_name,
+        replica_count_overrides=replica_count_overrides,
+        calendar_override_enabled=calendar_override_enabled,
+        strategy=strategy,
+        cpu_threshold=cpu_threshold,
+        memory_threshold=memory_threshold,
+        node_grace_period=node_grace_period,
+        node_first_seen=node_first_seen,
+        node_last_above_threshold=node_last_above_threshold,
+        placeholder_nodes=placeholder_nodes,
+        unschedulable_nodes=unschedulable_nodes,
+        now=now,
     )
+    if sizer is None:
+        sizer = PlaceholderSizer()
+    zones = None
+    if "zones" in pool_config:
+        zones = nodes_by_zone(pool_config["zones"], pool_usable_resources)
+
+    if zones:
+        replica_count = 0
+        has_pending_placeholder = False
+        parts = []
+        for zone, zone_nodes in zones.items():
+            log.info(f"Planning zone {zone} of pool {pool_name} ...")
+            zone_config = zone_pool_config(pool_config, zone)
+            zone_pending = pending(zone_config["nodeSelector"])
+            zone_replicas = plan_pool(
+                pool_config=zone_config,
+                pool_usable_resources=zone_nodes,
+                has_pending_placeholder=zone_pending,
+                forecast_replica_count=zone_share(forecast_replica_count, len(zones)),
+                pending_boost=zone_share(pending_boost, len(zones)),
+                **plan,
+            )
+            replica_count += zone_replicas
+            has_pending_placeholder = has_pending_placeholder or zone_pending
+            parts += _placeholder_parts(
+                zone_deployment_name(pool_name, zone),
+                zone_config,
+                zone_nodes,
+                placeholder_nodes & zone_nodes.keys(),
+                zone_replicas,
+                sizer,
+                {POOL_LABEL: pool_name, ZONE_LABEL: zone},
+            )
+    else:
+        has_pending_placeholder = pending(pool_config["nodeSelector"])
+        replica_count = plan_pool(
+            pool_config=pool_config,
+            pool_usable_resources=pool_usable_resources,
+            has_pending_placeholder=has_pending_placeholder,
+            forecast_replica_count=forecast_replica_count,
+            pending_boost=pending_boost,
+            **plan,
+        )
+        labels = None
+        if "shapes" in pool_config:
+            labels = {POOL_LABEL: pool_name}
+        parts = _placeholder_parts(
+            pool_name,
+            pool_config,
+            pool_usable_resources,
+            placeholder_nodes,
+            replica_count,
+            sizer,
+            labels,
+        )
+
+    result = {
+        "replicas": replica_count,
+        "placeholder_nodes": placeholder_nodes,
+        "unschedulable_nodes": unschedulable_nodes,
+        "has_pending_placeholder": has_pending_placeholder,
+        "write_failed": False,
+    }
+    if not apply:
+        log.info(
+            f"Not the leader; would set {pool_name} to have {replica_count} replicas"
+        )
+        return result
+    deployments = [
+        make_deployment(
+            part["name"],
+            placeholder_template,
+            part["nodeSelector"],
+            part["resources"],
+            part["replicas"],
+            labels=part["labels"],
+        )
+        for part in parts
+    ]
+    if "shapes" in pool_config or "zones" in pool_config:
+        retired = _retired_deployments(
+            pool_name, pool_config, placeholder_template, namespace, deployments
+        )
+        if retired is None:
+            result["write_failed"] = True
+        else:
+            deployments += retired
     log.info(f"Setting {pool_name} to have {replica_count} replicas")
-    with tempfile.NamedTemporaryFile(mode="r+") as f:
-        yaml.dump(deployment, f)
-        f.flush()
-        proc = subprocess.run(
-            ["kubectl", "apply", "-f", f.name],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+    for deployment in deployments:
+        if apply_deployment(deployment, namespace) is not None:
+            log.info(
+                f"deployment.apps/{deployment['metadata']['name']} applied "
+                f"with {deployment['spec']['replicas']} replicas"
+            )
+        else:
+            result["write_failed"] = True
+    return result
+
+
+def _placeholder_parts(
+    name, pool_config, pool_usable_resources, placeholder_nodes, replicas, sizer, labels
+):
+    """The placeholder deployments for some of a pool's nodes, as dicts.
+
+    One deployment named after name, or one per shape if the pool has shapes
+    and any is known (see scaler/shapes.py).
+    """
+    if "shapes" in pool_config:
+        shaped = shape_deployments(
+            name, pool_config, pool_usable_resources, placeholder_nodes, replicas, sizer
         )
-        log.info(proc.stdout.strip())
+        if shaped is not None:
+            return [
+                dict(part, labels={**labels, SHAPE_LABEL: part["shape"]})
+                for part in shaped
+            ]
+    return [
+        {
+            "name": name,
+            "nodeSelector": pool_config["nodeSelector"],
+            "resources": pool_config["resources"],
+            "replicas": replicas,
+            "labels": labels,
+        }
+    ]
 
 
-def main():
-    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+def _retired_deployments(
+    pool_name, pool_config, placeholder_template, namespace, deployments
+):
+    """A pool's deployments that are no longer in use, scaled to 0.
 
+    These are the pool-wide deployment and any per-zone or per-shape one
+    whose zone or shape has left the pool.  Returns None if the pool's
+    deployments could not be listed.
+    """
+    current = {d["metadata"]["name"] for d in deployments}
+    existing_deployments = get_pool_deployments(namespace, pool_name)
+    if existing_deployments is None:
+        return None
+    # The pool-wide deployment predates the labels, so is looked up by name;
+    # it is only scaled down if it exists, never created at 0.
+    pool_wide_name = f"{pool_name}-placeholder"
+    if pool_wide_name not in current and pool_wide_name not in existing_deployments:
+        pool_wide = get_deployment(namespace, pool_wide_name)
+        if pool_wide is not None:
+            existing_deployments[pool_wide_name] = pool_wide
+    retired = []
+    for name, existing in existing_deployments.items():
+        if name in current or not existing["spec"].get("replicas"):
+            continue
+        log.info(f"{name} is no longer used by pool {pool_name}; scaling it down")
+        pod_spec = existing["spec"]["template"]["spec"]
+        retired.append(
+            make_deployment(
+                name.removesuffix("-placeholder"),
+                placeholder_template,
+                pod_spec.get("nodeSelector", pool_config["nodeSelector"]),
+                pod_spec["containers"][0].get("resources", pool_config["resources"]),
+                0,
+                labels=existing["metadata"].get("labels"),
+            )
+        )
+    return retired
+
+
+def _argparser():
     argparser = argparse.ArgumentParser()
     argparser.add_argument("--config-file", default="config.yaml")
+    argparser.add_argument(
+        "--clusters-file",
+        default=None,
+        help=(
+            "Manage several clusters from this process, as listed in this "
+            "YAML file; see README.md."
+        ),
+    )
+    argparser.add_argument(
+        "--calendar-cache-seconds",
+        type=float,
+        default=60,
+        help=(
+            "Refresh each calendar in the background this often; cycles use "
+            "the last good copy meanwhile."
+        ),
+    )
+    argparser.add_argument(
+        "--calendar-timeout",
+        type=float,
+        default=30,
+        help="Give up on an HTTP calendar fetch after this many seconds.",
+    )
     argparser.add_argument(
         "--placeholder-template-file", default="placeholder-template.yaml"
     )
@@ -465,10 +1225,23 @@ def main():
         "--placeholder-pod-label-selector",
         default="app=node-placeholder-scaler,component=placeholder",
     )
-    argparser.add_argument("--cpu-threshold", type=float, default=0.2)
-    argparser.add_argument("--memory-threshold", type=float, default=0.2)
     argparser.add_argument(
-        "--strategy", choices=["cpu", "mem", "balanced"], default="balanced"
+        "--cpu-threshold",
+        type=float,
+        default=0.2,
+        help="Default for pools without cpuThreshold in the config.",
+    )
+    argparser.add_argument(
+        "--memory-threshold",
+        type=float,
+        default=0.2,
+        help="Default for pools without memoryThreshold in the config.",
+    )
+    argparser.add_argument(
+        "--strategy",
+        choices=STRATEGIES,
+        default="balanced",
+        help="Default for pools without strategy in the config.",
     )
     argparser.add_argument(
         "--node-grace-period",
@@ -478,13 +1251,302 @@ def main():
             "Seconds a node is protected from placeholder reduction: "
             "(1) after the scaler first observes it (new-node grace period) and "
             "(2) after it drops below the utilization threshold or loses its "
-            "placeholder pod (recently-freed grace period)."
+            "placeholder pod (recently-freed grace period). "
+            "Default for pools without nodeGracePeriod in the config."
+        ),
+    )
+    argparser.add_argument(
+        "--grace-state-file",
+        default=None,
+        help=(
+            "Save the grace-period state to this file each cycle and load it "
+            "at startup, so a restart doesn't restart every node's grace period."
+        ),
+    )
+    argparser.add_argument(
+        "--interval",
+        type=float,
+        default=60,
+        help="Seconds between cycles once the cluster is quiet.",
+    )
+    argparser.add_argument(
+        "--min-interval",
+        type=float,
+        default=15,
+        help=(
+            "Seconds between cycles while a calendar event or forecast surge "
+            "is on, or placeholder or user pods are pending."
+        ),
+    )
+    argparser.add_argument(
+        "--max-interval",
+        type=float,
+        default=300,
+        help=(
+            "Longest time between cycles; quiet cycles back off exponentially "
+            "from --interval up to this."
+        ),
+    )
+    argparser.add_argument(
+        "--interval-jitter",
+        type=float,
+        default=0.1,
+        help="Randomly lengthen or shorten each interval by up to this fraction.",
+    )
+    argparser.add_argument(
+        "--health-port",
+        type=int,
+        default=None,
+        help="Serve /healthz and /readyz on this port.",
+    )
+    argparser.add_argument(
+        "--watchdog-multiple",
+        type=float,
+        default=5,
+        help=(
+            "Consider a cycle stuck once it has run for this many times "
+            "--interval: fail /healthz, log all stacks and exit. 0 disables "
+            "the exit."
+        ),
+    )
+    argparser.add_argument(
+        "--watch-placeholders",
+        action="store_true",
+        help=(
+            "Watch placeholder pods and reconcile as soon as one is evicted or "
+            "goes Pending, instead of at the next 60 second tick."
+        ),
+    )
+    argparser.add_argument(
+        "--watch-debounce",
+        type=float,
+        default=2.0,
+        help="Seconds to collect placeholder evictions before reconciling.",
+    )
+    argparser.add_argument(
+        "--resync-interval",
+        type=int,
+        default=600,
+        help=(
+            "Seconds between reprocessing every pool. In between, only pools "
+            "whose nodes, pods, placeholders or config changed, or whose grace "
+            "periods ran out, are processed. 0 processes every pool every cycle."
+        ),
+    )
+    argparser.add_argument(
+        "--leader-elect",
+        action="store_true",
+        help=(
+            "Run with Lease-based leader election so several replicas can be "
+            "deployed; only the leader writes placeholder deployments."
+        ),
+    )
+    argparser.add_argument(
+        "--leader-election-lease-name", default="node-placeholder-scaler"
+    )
+    argparser.add_argument(
+        "--leader-election-namespace",
+        default=None,
+        help="Namespace of the Lease object (default: --namespace).",
+    )
+    argparser.add_argument("--leader-election-lease-duration", type=int, default=15)
+    argparser.add_argument("--leader-election-renew-deadline", type=int, default=10)
+    argparser.add_argument("--leader-election-retry-period", type=int, default=2)
+    argparser.add_argument(
+        "--forecast-history-file",
+        default=None,
+        help=(
+            "Enable forecasting of user pod arrivals, keeping the history in "
+            "this file. Pools opt in with a `forecast` section in the config."
+        ),
+    )
+    argparser.add_argument(
+        "--forecast-horizon",
+        type=int,
+        default=1200,
+        help="Seconds ahead to forecast; roughly the time to bring up a node.",
+    )
+    argparser.add_argument("--forecast-bucket-minutes", type=int, default=15)
+    argparser.add_argument(
+        "--user-pod-label-selector",
+        default="component=singleuser-server",
+        help="Selects user pods, for forecasting and pools' pendingBoost.",
+    )
+    argparser.add_argument(
+        "--record-dir",
+        default=None,
+        help=(
+            "Record each cycle's node state, overrides and chosen replica "
+            "counts to this directory (see scaler/recorder.py)."
         ),
     )
+    argparser.add_argument(
+        "--record-max-segment-bytes", type=int, default=16 * 1024 * 1024
+    )
+    argparser.add_argument("--record-max-segments", type=int, default=8)
+    return argparser
+
+
+def main():
+    args = _argparser().parse_args()
+
+    # Exit through atexit on SIGTERM, so the lease is released and buffered
+    # recordings are flushed when the pod is stopped.
+    def _terminate(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, _terminate)
+
+    if args.clusters_file:
+        logging.basicConfig(
+            level=logging.INFO, format="%(asctime)s [%(threadName)s] %(message)s"
+        )
+        with open(args.clusters_file) as f:
+            clusters = yaml.load(f)["clusters"]
+    else:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        clusters = [{}]
+
+    # Set to cut each cluster's sleep between iterations short, e.g. when
+    # this replica has just become leader and should reconcile straight away.
+    wakes = [threading.Event() for _ in clusters]
+
+    def _wake_all():
+        for wake in wakes:
+            wake.set()
+
+    elector = None
+    if args.leader_elect:
+        identity = os.environ.get("POD_NAME") or socket.gethostname()
+        elector = LeaderElector(
+            _get_coordination_v1_client(),
+            name=args.leader_election_lease_name,
+            namespace=args.leader_election_namespace or args.namespace,
+            identity=identity,
+            lease_duration=args.leader_election_lease_duration,
+            renew_deadline=args.leader_election_renew_deadline,
+            retry_period=args.leader_election_retry_period,
+            on_started_leading=_wake_all,
+        ).start()
+
+        # Release the lease on shutdown so a follower takes over immediately
+        # instead of waiting for it to expire.
+        atexit.register(elector.stop)
+
+    # Calendars are fetched and parsed once for all clusters that use them.
+    calendar_reader = OccurrenceReader(timeout=args.calendar_timeout)
+    atexit.register(calendar_reader.shutdown)
+    calendars = CalendarCache(
+        args.calendar_cache_seconds, fetch=calendar_reader
+    ).start()
+    calendar_fetcher = CalendarFetcher(
+        lambda url: calendar_replica_counts(calendars, url)
+    )
 
-    args = argparser.parse_args()
+    healths = {
+        cluster.get("name"): Health(
+            stall_after=(args.watchdog_multiple or 5) * args.interval,
+            max_sleep=args.max_interval * (1 + args.interval_jitter),
+        )
+        for cluster in clusters
+    }
+    health = HealthGroup(healths)
+    if args.health_port is not None:
+        serve_health(health, args.health_port, metrics=calendars.metrics)
+    if args.watchdog_multiple > 0:
+        Watchdog(health).start()
+
+    if not args.clusters_file:
+        run_cluster(args, healths[None], wakes[0], calendar_fetcher, elector)
+        return
+
+    threads = []
+    for cluster, wake in zip(clusters, wakes):
+        api_client = None
+        if cluster.get("kubeconfig") or cluster.get("context"):
+            api_client = config.new_client_from_config(
+                config_file=cluster.get("kubeconfig"), context=cluster.get("context")
+            )
+        thread = threading.Thread(
+            target=run_cluster,
+            name=cluster["name"],
+            args=(args, healths[cluster["name"]], wake, calendar_fetcher, elector),
+            kwargs=dict(
+                name=cluster["name"],
+                api_client=api_client,
+                namespace=cluster.get("namespace"),
+                config_file=cluster["configFile"],
+                placeholder_template_file=cluster.get("placeholderTemplateFile"),
+            ),
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
+    # A cluster whose cycles fail keeps retrying with backoff and fails
+    # /readyz meanwhile; the other clusters carry on.
+    for thread in threads:
+        thread.join()
+
+
+def _cluster_path(path, name):
+    """A per-cluster variant of a path given on the command line."""
+    if path is None or name is None:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}-{name}{ext}"
+
+
+def _cluster_dir(path, name):
+    """A per-cluster subdirectory of a directory given on the command line."""
+    if path is None or name is None:
+        return path
+    return os.path.join(path, name)
+
+
+def run_cluster(
+    args,
+    health,
+    wake,
+    calendar_fetcher,
+    elector=None,
+    name=None,
+    api_client=None,
+    namespace=None,
+    config_file=None,
+    placeholder_template_file=None,
+):
+    """Reconcile one cluster's placeholders, forever.
 
-    namespace = args.namespace
+    With --clusters-file each cluster runs this in its own thread, talking
+    to its cluster through api_client and keeping its state files apart by
+    name.  Settings left as None come from the command line.  Only the
+    leader applies changes when an elector is given.
+    """
+    with use_cluster(api_client):
+        _run_cluster(
+            args,
+            health,
+            wake,
+            calendar_fetcher,
+            elector,
+            name,
+            namespace or args.namespace,
+            config_file or args.config_file,
+            placeholder_template_file or args.placeholder_template_file,
+        )
+
+
+def _run_cluster(
+    args,
+    health,
+    wake,
+    calendar_fetcher,
+    elector,
+    name,
+    namespace,
+    config_file,
+    placeholder_template_file,
+):
     label_selector = args.placeholder_pod_label_selector
     node_selector_key = args.node_pool_selector_key
     cpu_threshold = args.cpu_threshold
@@ -500,70 +1562,276 @@ def main():
     # enforce the recently-freed grace period.
     node_last_above_threshold: dict[str, float] = {}
 
+    # Maps pool name -> (extra replicas, perf_counter value when last raised)
+    # for pools with a pendingBoost section.
+    pending_boost_state: dict[str, tuple] = {}
+
+    # Set up on the first cycle, inside its error handling, so a cluster
+    # whose state files or recording directory can't be opened retries like
+    # any failed cycle instead of ending its thread.
+    grace_state = None
+    watcher = None
+    forecaster = None
+    recorder = None
+    last_arrivals_poll = time.time()
+
+    interval = AdaptiveInterval(
+        base=args.interval,
+        min_interval=args.min_interval,
+        max_interval=args.max_interval,
+        jitter=args.interval_jitter,
+    )
+
+    # Placeholder requests for pools with autoSize.
+    sizer = PlaceholderSizer()
+
+    dirty_pools = None
+    if args.resync_interval > 0:
+        dirty_pools = DirtyPools(args.resync_interval)
+
     while True:
-        usable_resources_result = get_usable_resources()
-        # Reload all config files on each iteration, so we can change config
-        # without needing to bounce the pod
-        with open(args.config_file) as f:
-            cfg = yaml.load(f)
+        health.cycle_started()
+        try:
+            if args.grace_state_file and grace_state is None:
+                grace_state = GraceStateFile(_cluster_path(args.grace_state_file, name))
+                node_first_seen, node_last_above_threshold = grace_state.load()
+
+            if args.watch_placeholders and watcher is None:
+                watcher = PlaceholderWatcher(
+                    _get_v1_client(),
+                    namespace,
+                    label_selector,
+                    on_eviction=wake.set,
+                    debounce=args.watch_debounce,
+                ).start()
+                atexit.register(watcher.stop)
+
+            if args.forecast_history_file and forecaster is None:
+                forecaster = ArrivalForecaster(
+                    _cluster_path(args.forecast_history_file, name),
+                    bucket_minutes=args.forecast_bucket_minutes,
+                    horizon=args.forecast_horizon,
+                )
 
-        with open(args.placeholder_template_file) as f:
-            placeholder_template = yaml.load(f)
+            if args.record_dir and recorder is None:
+                recorder = Recorder(
+                    _cluster_dir(args.record_dir, name),
+                    max_segment_bytes=args.record_max_segment_bytes,
+                    max_segments=args.record_max_segments,
+                )
+                atexit.register(recorder.close)
 
-        if "calendarUrl" in cfg:
-            calendar = get_calendar(cfg["calendarUrl"])
-        else:
-            log.info(
-                "No calendarUrl in config; skipping calendar processing and using config replica counts only."
-            )
-            calendar = None
+            if dirty_pools is not None:
+                now = dirty_pools.start_cycle()
+            else:
+                now = time.perf_counter()
+            # Placeholder pods for all pools in one list call; None on API error,
+            # when _process_pool falls back to reading them node by node.
+            placeholder_pods = get_placeholder_pods(namespace, label_selector)
+            if placeholder_pods is None and dirty_pools is not None:
+                dirty_pools.invalidate()
+            usable_resources_result = get_usable_resources()
+            health.cluster_synced()
+            unschedulable_nodes = {
+                node
+                for pool_nodes in usable_resources_result.values()
+                for node, resources in pool_nodes.items()
+                if resources["unschedulable"]
+            }
+            # Reload all config files on each iteration, so we can change config
+            # without needing to bounce the pod
+            with open(config_file) as f:
+                cfg = yaml.load(f)
+
+            with open(placeholder_template_file) as f:
+                placeholder_template = yaml.load(f)
+
+            sources = calendar_sources(cfg)
+            if sources:
+                replica_count_overrides = calendar_fetcher.replica_counts(sources)
+                log.info(f"Overrides: {replica_count_overrides}")
+            else:
+                log.info(
+                    "No calendars in config; skipping calendar processing and using config replica counts only."
+                )
+                replica_count_overrides = {}
 
-        if calendar:
-            events = get_events(calendar)
-            log.info(f"Found {len(events)} events at {cfg['calendarUrl']}.")
-            replica_count_overrides = get_replica_counts(events)
-            log.info(f"Overrides: {replica_count_overrides}")
-        else:
-            log.info("No calendar available; using config replica counts only.")
-            replica_count_overrides = {}
+            calendar_override_enabled = cfg.get("calendarOverrideEnabled", False)
+            if not isinstance(calendar_override_enabled, bool):
+                raise ValueError(
+                    f"calendarOverrideEnabled must be a boolean, got {type(calendar_override_enabled).__name__}: {calendar_override_enabled!r}"
+                )
 
-        calendar_override_enabled = cfg.get("calendarOverrideEnabled", False)
-        if not isinstance(calendar_override_enabled, bool):
-            raise ValueError(
-                f"calendarOverrideEnabled must be a boolean, got {type(calendar_override_enabled).__name__}: {calendar_override_enabled!r}"
-            )
+            for pool_name, pool_config in cfg["nodePools"].items():
+                validate_scaling_resources(pool_name, pool_config)
+                validate_pool_settings(pool_name, pool_config)
+                validate_pending_boost(pool_name, pool_config)
+                validate_auto_size(pool_name, pool_config)
+                validate_user_pod_profiles(pool_name, pool_config)
+                validate_shapes(pool_name, pool_config)
+                validate_zones(pool_name, pool_config)
+                validate_forecast(pool_name, pool_config)
+
+            forecast_floors = {}
+            if forecaster is not None:
+                wall_now = time.time()
+                node_to_pool = {
+                    node: pool
+                    for pool, pool_nodes in usable_resources_result.items()
+                    for node in pool_nodes
+                }
+                arrivals = get_user_pod_arrivals(
+                    last_arrivals_poll,
+                    wall_now,
+                    args.user_pod_label_selector,
+                    node_selector_key,
+                    node_to_pool,
+                )
+                last_arrivals_poll = wall_now
+                forecaster.observe(arrivals, wall_now)
+                forecast_floors = forecaster.replica_floors(
+                    cfg["nodePools"], node_selector_key, wall_now
+                )
 
-        for pool_name, pool_config in cfg["nodePools"].items():
-            pool_usable_resources = usable_resources_result.get(
-                pool_config["nodeSelector"][node_selector_key], {}
-            )
-            _process_pool(
-                pool_name=pool_name,
-                pool_config=pool_config,
-                pool_usable_resources=pool_usable_resources,
-                replica_count_overrides=replica_count_overrides,
-                calendar_override_enabled=calendar_override_enabled,
-                placeholder_template=placeholder_template,
-                namespace=namespace,
-                label_selector=label_selector,
-                strategy=strategy,
-                cpu_threshold=cpu_threshold,
-                memory_threshold=memory_threshold,
-                node_grace_period=node_grace_period,
-                node_first_seen=node_first_seen,
-                node_last_above_threshold=node_last_above_threshold,
-            )
+            pool_results = {}
 
-        # Evict tracking entries for nodes no longer present in the cluster.
-        all_seen_nodes = {
-            node
-            for pool_nodes in usable_resources_result.values()
-            for node in pool_nodes
-        }
-        node_first_seen = {
-            n: t for n, t in node_first_seen.items() if n in all_seen_nodes
-        }
-        node_last_above_threshold = {
-            n: t for n, t in node_last_above_threshold.items() if n in all_seen_nodes
-        }
-        time.sleep(60)
+            pending_boosts = {}
+            pending_counts = {}
+            boosted_pools = {
+                name: config
+                for name, config in cfg["nodePools"].items()
+                if "pendingBoost" in config
+            }
+            if boosted_pools:
+                pending_counts = pending_by_pool(
+                    get_pending_user_pods(args.user_pod_label_selector),
+                    node_selector_key,
+                )
+                for pool_name, pool_config in boosted_pools.items():
+                    pending_boosts[pool_name] = update_pending_boost(
+                        pool_name,
+                        pool_config["pendingBoost"],
+                        pending_counts.get(
+                            pool_config["nodeSelector"][node_selector_key], 0
+                        ),
+                        pending_boost_state,
+                        now,
+                    )
+
+            for pool_name, pool_config in cfg["nodePools"].items():
+                pool_usable_resources = usable_resources_result.get(
+                    pool_config["nodeSelector"][node_selector_key], {}
+                )
+                pool_config = sizer.pool_config(
+                    pool_name, pool_config, pool_usable_resources
+                )
+                apply = elector is None or elector.is_leader
+                if dirty_pools is not None:
+                    pool_fingerprint = fingerprint(
+                        pool_config,
+                        pool_usable_resources,
+                        replica_count_overrides.get(pool_name),
+                        calendar_override_enabled,
+                        forecast_floors.get(pool_name),
+                        pending_boosts.get(pool_name, 0),
+                        placeholder_template,
+                        apply,
+                        [
+                            pod
+                            for pod in placeholder_pods or []
+                            if pod["node"] in pool_usable_resources
+                            or _selects_pool(
+                                pod["nodeSelector"], pool_config["nodeSelector"]
+                            )
+                        ],
+                        {n for n in unschedulable_nodes if n in pool_usable_resources},
+                    )
+                    if not dirty_pools.is_dirty(pool_name, pool_fingerprint, now):
+                        log.info(f"Nothing changed in pool {pool_name}; skipping it.")
+                        pool_results[pool_name] = dirty_pools.skip(
+                            pool_name, now, node_last_above_threshold
+                        )
+                        continue
+                pool_results[pool_name] = _process_pool(
+                    pool_name=pool_name,
+                    pool_config=pool_config,
+                    pool_usable_resources=pool_usable_resources,
+                    replica_count_overrides=replica_count_overrides,
+                    calendar_override_enabled=calendar_override_enabled,
+                    placeholder_template=placeholder_template,
+                    namespace=namespace,
+                    label_selector=label_selector,
+                    strategy=strategy,
+                    cpu_threshold=cpu_threshold,
+                    memory_threshold=memory_threshold,
+                    node_grace_period=node_grace_period,
+                    node_first_seen=node_first_seen,
+                    node_last_above_threshold=node_last_above_threshold,
+                    apply=apply,
+                    now=now,
+                    forecast_replica_count=forecast_floors.get(pool_name),
+                    pending_boost=pending_boosts.get(pool_name, 0),
+                    sizer=sizer,
+                    placeholder_pods=placeholder_pods,
+                    unschedulable_nodes=unschedulable_nodes,
+                )
+                if dirty_pools is not None and pool_results[pool_name]["write_failed"]:
+                    # Processed again next cycle, not just at the next resync.
+                    dirty_pools.forget(pool_name)
+                elif dirty_pools is not None:
+                    dirty_pools.processed(
+                        pool_name,
+                        pool_fingerprint,
+                        pool_results[pool_name],
+                        now,
+                        pool_usable_resources,
+                        node_first_seen,
+                        node_last_above_threshold,
+                        pool_config.get("nodeGracePeriod", node_grace_period),
+                    )
+
+            if recorder is not None:
+                recorder.record(
+                    time.time(),
+                    usable_resources_result,
+                    pool_results,
+                    replica_count_overrides,
+                )
+
+            # Evict tracking entries for nodes no longer present in the cluster.
+            all_seen_nodes = {
+                node
+                for pool_nodes in usable_resources_result.values()
+                for node in pool_nodes
+            }
+            node_first_seen = {
+                n: t for n, t in node_first_seen.items() if n in all_seen_nodes
+            }
+            node_last_above_threshold = {
+                n: t
+                for n, t in node_last_above_threshold.items()
+                if n in all_seen_nodes
+            }
+            if grace_state is not None:
+                grace_state.save(node_first_seen, node_last_above_threshold)
+
+            busy = (
+                bool(replica_count_overrides)
+                or any(forecast_floors.values())
+                or any(pending_counts.values())
+                or any(r["has_pending_placeholder"] for r in pool_results.values())
+            )
+        except Exception as e:
+            # An API error or bad config in this cluster must not end the loop,
+            # nor, with --clusters-file, take the other clusters down with it.
+            log.exception("Reconcile cycle failed; retrying")
+            health.cycle_failed(type(e).__name__)
+            if dirty_pools is not None:
+                dirty_pools.invalidate()
+            sleep = interval.after_failure()
+        else:
+            health.cycle_finished()
+            sleep = interval.next(busy)
+        log.info(f"Next cycle in {sleep:.0f}s")
+        wake.wait(sleep)
+        wake.clear()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+One placeholder deployment per node shape in a pool.
+
+When the autoscaler falls back to another machine type, a pool ends up with
+nodes of different sizes, and a placeholder sized for the large ones never
+schedules on the small ones.  A pool with a `shapes` section gets one
+deployment per shape instead, each sized to and pinned on its own nodes:
+
+    nodePools:
+      user-pool:
+        shapes:
+          labelKey: node.kubernetes.io/instance-type # default
+          provision: n2-highmem-8 # optional
+
+A node's shape is the value of its `labelKey` label.  Nodes without the
+label are grouped by allocatable (e.g. `8cpu-57gi`); their placeholders are
+sized to them but can't be pinned to them.  Each shape's placeholders are
+sized the same way as `autoSize` (with its settings, or the defaults).
+
+The pool's replica count is split between the shapes: placeholders that are
+already running stay where they are, and the rest go to the shape the
+autoscaler will provision next, which is `provision` if set and otherwise
+the shape of the pool's newest node.  Reductions take placeholders off the
+other shapes first.  Until the pool has nodes and no `provision` is set,
+the pool's usual `{pool}-placeholder` deployment is used.
+"""
+
+import logging
+import re
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LABEL_KEY = "node.kubernetes.io/instance-type"
+# Labels on each shape's deployment, so shapes that have left the pool can
+# be found and scaled down after a restart.
+POOL_LABEL = "node-placeholder-scaler/pool"
+SHAPE_LABEL = "node-placeholder-scaler/shape"
+
+
+def validate_shapes(pool_name, pool_config):
+    """Raise ValueError if a pool's shapes section is malformed."""
+    shapes = pool_config.get("shapes")
+    if shapes is None:
+        return
+    if not isinstance(shapes, dict):
+        raise ValueError(
+            f"shapes for pool {pool_name} must be a mapping, got {shapes!r}"
+        )
+    label_key = shapes.get("labelKey", DEFAULT_LABEL_KEY)
+    if not isinstance(label_key, str) or not label_key:
+        raise ValueError(
+            f"shapes.labelKey for pool {pool_name} must be a label name, got {label_key!r}"
+        )
+    provision = shapes.get("provision")
+    if provision is not None and (not isinstance(provision, str) or not provision):
+        raise ValueError(
+            f"shapes.provision for pool {pool_name} must be a shape name, got {provision!r}"
+        )
+
+
+def shape_name(value):
+    """A shape as it may appear in a deployment name and label value."""
+    return re.sub(r"[^a-z0-9-]+", "-", value.lower()).strip("-")[:40] or "unknown"
+
+
+def node_shape(resources, label_key):
+    """(shape, pinned) of a node; pinned if the shape came from its label."""
+    value = resources.get("labels", {}).get(label_key)
+    if value:
+        return shape_name(value), True
+    cpu = resources["cpu_alloc_m"] // 1000
+    mem = resources["mem_alloc_mi"] // 1024
+    return f"{cpu}cpu-{mem}gi", False
+
+
+def provisioning_shape(shapes_config, pool_usable_resources, node_shapes):
+    """The shape new placeholders should be made for, or None if unknown."""
+    if shapes_config.get("provision"):
+        return shape_name(shapes_config["provision"])
+    if not node_shapes:
+        return None
+    newest = max(
+        node_shapes,
+        key=lambda node: (pool_usable_resources[node].get("ready_since") or 0, node),
+    )
+    return node_shapes[newest]
+
+
+def split_replicas(total, running, provisioning):
+    """Split a pool's total replicas into {shape: replicas}.
+
+    running maps each shape to its running placeholders, which are kept up
+    to the total, the provisioning shape's first; what is left over goes to
+    the provisioning shape.
+    """
+    split = {shape: 0 for shape in running}
+    split[provisioning] = 0
+    remaining = total
+    others = sorted(shape for shape in running if shape != provisioning)
+    for shape in [provisioning] + others:
+        split[shape] = min(running.get(shape, 0), remaining)
+        remaining -= split[shape]
+    split[provisioning] += remaining
+    return split
+
+
+def shape_deployments(
+    pool_name, pool_config, pool_usable_resources, placeholder_nodes, replicas, sizer
+):
+    """The placeholder deployments of a pool with shapes.
+
+    Returns a list of {"name", "shape", "nodeSelector", "resources",
+    "replicas"} with "name" as passed to make_deployment, or None if no
+    shape is known yet.  Shapes that have since left the pool are not
+    listed; the caller scales those down.
+    """
+    shapes_config = pool_config["shapes"]
+    label_key = shapes_config.get("labelKey", DEFAULT_LABEL_KEY)
+    node_shapes = {}
+    pinned = set()
+    for node, resources in pool_usable_resources.items():
+        shape, is_pinned = node_shape(resources, label_key)
+        node_shapes[node] = shape
+        if is_pinned:
+            pinned.add(shape)
+    provisioning = provisioning_shape(shapes_config, pool_usable_resources, node_shapes)
+    if provisioning is None:
+        return None
+    if shapes_config.get("provision"):
+        # Only a label value can be configured, so pin it like one.
+        pinned.add(provisioning)
+
+    running = {shape: 0 for shape in node_shapes.values()}
+    for node in placeholder_nodes:
+        if node in node_shapes:
+            running[node_shapes[node]] += 1
+    split = split_replicas(replicas, running, provisioning)
+    log.info(
+        f"Placeholders for pool {pool_name} by shape: {split} "
+        f"(new ones for {provisioning})"
+    )
+
+    # Each shape is sized like autoSize, defaulting to memory only.
+    shape_config = dict(pool_config, autoSize=pool_config.get("autoSize") or {})
+    deployments = []
+    for shape, shape_replicas in sorted(split.items()):
+        node_selector = dict(pool_config["nodeSelector"])
+        if shape in pinned:
+            # The label value, not its sanitised form, is what nodes carry.
+            node_selector[label_key] = next(
+                (
+                    pool_usable_resources[node]["labels"][label_key]
+                    for node, s in node_shapes.items()
+                    if s == shape
+                ),
+                shapes_config.get("provision"),
+            )
+        sized = sizer.pool_config(
+            f"{pool_name}/{shape}",
+            shape_config,
+            {n: r for n, r in pool_usable_resources.items() if node_shapes[n] == shape},
+        )
+        deployments.append(
+            {
+                "name": f"{pool_name}-{shape}",
+                "shape": shape,
+                "nodeSelector": node_selector,
+                "resources": sized["resources"],
+                "replicas": shape_replicas,
+            }
+        )
+    return deployments
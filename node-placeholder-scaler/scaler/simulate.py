@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+Offline simulation of the placeholder scaler.
+
+Replays a recorded timeline of cluster snapshots (and optionally a calendar)
+through the real decision logic (scaler.plan_pool / compute_replica_count)
+with the clock taken from the snapshots, for one or more scaler
+configurations, and reports for each:
+
+- placeholder node-hours: time placeholder pods held (or were waiting for) a
+  node of their own, i.e. the cost of the headroom
+- unabsorbed pending pod-minutes: time user pods spent Pending with no
+  running placeholder to preempt, i.e. logins that waited for a scale-up
+
+Record a timeline from a live cluster, then replay it:
+
+    python -m scaler.simulate record --output timeline.jsonl --interval 60
+    python -m scaler.simulate replay --snapshots timeline.jsonl \\
+        --config-file config.yaml --calendar calendar.ics \\
+        --cpu-threshold 0.1,0.2,0.4 --strategy mem,balanced
+
+Snapshots are JSON lines:
+
+    {"time": "2025-09-02T09:00:00+00:00",
+     "nodes": {"node-a": {"pool": "pool-0", "cpu_alloc_m": 7910,
+                          "mem_alloc_mi": 59000, "cpu_requested_m": 1200,
+                          "mem_requested_mi": 20000, "unschedulable": false,
+                          "placeholder": false}},
+     "pending_user_pods": {"pool-0": 3}}
+
+The swept values are defaults: pools that set strategy, cpuThreshold,
+memoryThreshold or nodeGracePeriod in the config keep their own.
+
+--snapshots may also name a directory recorded by the scaler itself with
+--record-dir (see scaler/recorder.py).
+
+Requests exclude placeholder pods.  Nodes that were hosting a placeholder
+when recorded are dropped on replay, since the simulation models its own
+placeholders: each placeholder replica owns a node, a pending user pod in a
+pool evicts one running placeholder (whose replacement then waits
+--node-startup-seconds for a new node), and pending user pods with no
+placeholder to evict count as unabsorbed.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import logging
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from ruamel.yaml import YAML
+
+from . import scaler
+from .calendar_parser import get_calendar, get_events
+from .recorder import iter_cycles
+from .utils import parse_cpu, parse_memory
+
+yaml = YAML(typ="safe")
+log = logging.getLogger(__name__)
+
+
+def _pod_requests(pod):
+    cpu_m = mem_mi = 0
+    for container in pod.spec.containers:
+        requests = (container.resources and container.resources.requests) or {}
+        try:
+            cpu_m += parse_cpu(requests.get("cpu", "0"))
+        except ValueError:
+            pass
+        try:
+            mem_mi += parse_memory(requests.get("memory", "0"))
+        except ValueError:
+            pass
+    return cpu_m, mem_mi
+
+
+def _is_unschedulable_pod(pod):
+    for condition in pod.status.conditions or []:
+        if (
+            condition.type == "PodScheduled"
+            and condition.status == "False"
+            and condition.reason == "Unschedulable"
+        ):
+            return True
+    return False
+
+
+def take_snapshot(namespace, label_selector, node_selector_key, now=None):
+    """Record the current cluster state as a snapshot dict."""
+    v1 = scaler._get_v1_client()
+    node_to_pool = scaler.get_node_pool_mapping(node_selector_key)
+    alloc = scaler.get_allocatable_resources_by_pool(node_to_pool)
+    placeholder_uids = {
+        pod.metadata.uid
+        for pod in v1.list_namespaced_pod(
+            namespace=namespace, label_selector=label_selector
+        ).items
+    }
+    unschedulable = {
+        node.metadata.name for node in v1.list_node().items if node.spec.unschedulable
+    }
+
+    nodes = {}
+    for pool, pool_nodes in alloc.items():
+        for name, info in pool_nodes.items():
+            nodes[name] = {
+                "pool": pool,
+                "cpu_alloc_m": info["cpu_m"],
+                "mem_alloc_mi": info["mem_mi"],
+                "cpu_requested_m": 0,
+                "mem_requested_mi": 0,
+                "unschedulable": name in unschedulable,
+                "placeholder": False,
+            }
+
+    pending = defaultdict(int)
+    for pod in v1.list_pod_for_all_namespaces().items:
+        node = pod.spec.node_name
+        if pod.metadata.uid in placeholder_uids:
+            if node in nodes and pod.status.phase == "Running":
+                nodes[node]["placeholder"] = True
+        elif node in nodes:
+            cpu_m, mem_mi = _pod_requests(pod)
+            nodes[node]["cpu_requested_m"] += cpu_m
+            nodes[node]["mem_requested_mi"] += mem_mi
+        elif not node and pod.status.phase == "Pending":
+            pool = (pod.spec.node_selector or {}).get(node_selector_key)
+            if pool and _is_unschedulable_pod(pod):
+                pending[pool] += 1
+
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc)
+    return {
+        "time": now.isoformat(),
+        "nodes": nodes,
+        "pending_user_pods": dict(pending),
+    }
+
+
+def load_snapshots(path):
+    """Read a JSON-lines snapshot file, sorted by time.
+
+    path may also be a directory written by the scaler's --record-dir
+    (scaler/recorder.py); such recordings have no pending user pods.
+    """
+    if Path(path).is_dir():
+        return [
+            {
+                "time": datetime.datetime.fromtimestamp(
+                    cycle["time"], datetime.timezone.utc
+                ),
+                "nodes": cycle["nodes"],
+                "pending_user_pods": {},
+            }
+            for cycle in iter_cycles(path)
+        ]
+    snapshots = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                snapshot = json.loads(line)
+                snapshot["time"] = datetime.datetime.fromisoformat(snapshot["time"])
+                snapshots.append(snapshot)
+    snapshots.sort(key=lambda s: s["time"])
+    return snapshots
+
+
+def calendar_overrides(snapshots, calendar):
+    """Calendar replica counts at each snapshot time.
+
+    Calendar lookups don't depend on the scaler configuration, so they are
+    done once per timeline rather than once per simulated configuration.
+    """
+    if calendar is None:
+        return [{} for _ in snapshots]
+    return [
+        scaler.get_replica_counts(get_events(calendar, time=s["time"]))
+        for s in snapshots
+    ]
+
+
+def _pool_usable_resources(snapshots):
+    """Per snapshot: {pool: (usable_resources, unschedulable_nodes)}."""
+    result = []
+    for snapshot in snapshots:
+        pools = defaultdict(lambda: ({}, set()))
+        for name, node in snapshot["nodes"].items():
+            if node.get("placeholder"):
+                continue
+            usable, unschedulable = pools[node["pool"]]
+            usable[name] = scaler.node_usable_resources(
+                node["pool"],
+                node["cpu_alloc_m"],
+                node["cpu_requested_m"],
+                node["mem_alloc_mi"],
+                node["mem_requested_mi"],
+            )
+            if node.get("unschedulable"):
+                unschedulable.add(name)
+        result.append(dict(pools))
+    return result
+
+
+def simulate(
+    snapshots,
+    overrides,
+    pool_configs,
+    node_selector_key,
+    calendar_override_enabled,
+    strategy,
+    cpu_threshold,
+    memory_threshold,
+    node_grace_period,
+    node_startup_seconds=600,
+    pool_resources=None,
+):
+    """Replay a timeline for one scaler configuration and return its metrics.
+
+    pool_resources is the output of _pool_usable_resources(snapshots); pass
+    it in to share the work across configurations.
+    """
+    if pool_resources is None:
+        pool_resources = _pool_usable_resources(snapshots)
+    node_first_seen = {}
+    node_last_above_threshold = {}
+    # Per pool: placeholders with a node, and ready times of those waiting
+    # for one.
+    running = defaultdict(int)
+    booting = defaultdict(list)
+    placeholder_node_seconds = 0.0
+    unabsorbed_pod_seconds = 0.0
+    absorbed = 0
+    previous = None
+
+    for snapshot, replica_count_overrides, pools in zip(
+        snapshots, overrides, pool_resources
+    ):
+        now = snapshot["time"].timestamp()
+        dt = now - previous if previous is not None else 0.0
+        previous = now
+        pending_user_pods = snapshot.get("pending_user_pods", {})
+
+        for pool_name, pool_config in pool_configs.items():
+            pool = pool_config["nodeSelector"][node_selector_key]
+            placeholder_node_seconds += (
+                running[pool_name] + len(booting[pool_name])
+            ) * dt
+
+            ready = [t for t in booting[pool_name] if t <= now]
+            booting[pool_name] = [t for t in booting[pool_name] if t > now]
+            running[pool_name] += len(ready)
+
+            pending = pending_user_pods.get(pool, 0)
+            if pending:
+                if running[pool_name]:
+                    # The pending pods preempt a placeholder and take its
+                    # node; the placeholder is recreated and waits for a
+                    # new node.
+                    running[pool_name] -= 1
+                    booting[pool_name].append(now + node_startup_seconds)
+                    absorbed += 1
+                else:
+                    unabsorbed_pod_seconds += pending * dt
+
+            usable, unschedulable = pools.get(pool, ({}, set()))
+            replica_count = scaler.plan_pool(
+                pool_name=pool_name,
+                pool_config=pool_config,
+                pool_usable_resources=usable,
+                replica_count_overrides=replica_count_overrides,
+                calendar_override_enabled=calendar_override_enabled,
+                strategy=strategy,
+                cpu_threshold=cpu_threshold,
+                memory_threshold=memory_threshold,
+                node_grace_period=node_grace_period,
+                node_first_seen=node_first_seen,
+                node_last_above_threshold=node_last_above_threshold,
+                placeholder_nodes=set(),
+                unschedulable_nodes=unschedulable,
+                has_pending_placeholder=bool(booting[pool_name]),
+                now=now,
+                wall_now=now,
+            )
+
+            current = running[pool_name] + len(booting[pool_name])
+            if replica_count > current:
+                booting[pool_name].extend(
+                    [now + node_startup_seconds] * (replica_count - current)
+                )
+            elif replica_count < current:
+                # Scale-down removes pods still waiting for a node first.
+                surplus = current - replica_count
+                booting[pool_name].sort()
+                while surplus and booting[pool_name]:
+                    booting[pool_name].pop()
+                    surplus -= 1
+                running[pool_name] -= surplus
+
+    return {
+        "placeholder_node_hours": round(placeholder_node_seconds / 3600, 3),
+        "unabsorbed_pending_pod_minutes": round(unabsorbed_pod_seconds / 60, 3),
+        "absorbed_scale_ups": absorbed,
+    }
+
+
+def _csv(type_):
+    return lambda value: [type_(v) for v in value.split(",")]
+
+
+def replay(args):
+    snapshots = load_snapshots(args.snapshots)
+    if not snapshots:
+        log.error(f"No snapshots in {args.snapshots}")
+        return 1
+    with open(args.config_file) as f:
+        cfg = yaml.load(f)
+    calendar = get_calendar(args.calendar) if args.calendar else None
+    overrides = calendar_overrides(snapshots, calendar)
+    pool_resources = _pool_usable_resources(snapshots)
+    calendar_override_enabled = cfg.get("calendarOverrideEnabled", False)
+    for pool_name, pool_config in cfg["nodePools"].items():
+        scaler.validate_pool_settings(pool_name, pool_config)
+
+    results = []
+    for strategy, cpu_threshold, memory_threshold, grace in itertools.product(
+        args.strategy, args.cpu_threshold, args.memory_threshold, args.node_grace_period
+    ):
+        start = time.perf_counter()
+        metrics = simulate(
+            snapshots,
+            overrides,
+            cfg["nodePools"],
+            args.node_pool_selector_key,
+            calendar_override_enabled,
+            strategy,
+            cpu_threshold,
+            memory_threshold,
+            grace,
+            node_startup_seconds=args.node_startup_seconds,
+            pool_resources=pool_resources,
+        )
+        elapsed = time.perf_counter() - start
+        results.append(
+            {
+                "strategy": strategy,
+                "cpu_threshold": cpu_threshold,
+                "memory_threshold": memory_threshold,
+                "node_grace_period": grace,
+                **metrics,
+                "cycles_per_second": round(len(snapshots) / elapsed, 1),
+            }
+        )
+
+    columns = list(results[0])
+    print("  ".join(columns))
+    for row in results:
+        print("  ".join(str(row[c]) for c in columns))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+def record(args):
+    recorded = 0
+    with open(args.output, "a") as f:
+        while True:
+            snapshot = take_snapshot(
+                args.namespace,
+                args.placeholder_pod_label_selector,
+                args.node_pool_selector_key,
+            )
+            f.write(json.dumps(snapshot) + "\n")
+            f.flush()
+            log.info(f"Recorded snapshot of {len(snapshot['nodes'])} nodes")
+            recorded += 1
+            if args.count is not None and recorded >= args.count:
+                return 0
+            time.sleep(args.interval)
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description="Record cluster timelines and replay them through the scaler."
+    )
+    argparser.add_argument(
+        "--node-pool-selector-key", default="hub.jupyter.org/pool-name"
+    )
+    subparsers = argparser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record snapshots.")
+    record_parser.add_argument("--output", required=True)
+    record_parser.add_argument("--interval", type=float, default=60)
+    record_parser.add_argument(
+        "--count", type=int, default=None, help="Stop after this many snapshots."
+    )
+    record_parser.add_argument("--namespace", default="node-placeholder")
+    record_parser.add_argument(
+        "--placeholder-pod-label-selector",
+        default="app=node-placeholder-scaler,component=placeholder",
+    )
+
+    replay_parser = subparsers.add_parser("replay", help="Replay snapshots.")
+    replay_parser.add_argument("--snapshots", required=True)
+    replay_parser.add_argument("--config-file", default="config.yaml")
+    replay_parser.add_argument("--calendar", help="ICS file or URL to replay.")
+    replay_parser.add_argument("--cpu-threshold", type=_csv(float), default=[0.2])
+    replay_parser.add_argument("--memory-threshold", type=_csv(float), default=[0.2])
+    replay_parser.add_argument("--strategy", type=_csv(str), default=["balanced"])
+    replay_parser.add_argument("--node-grace-period", type=_csv(int), default=[600])
+    replay_parser.add_argument(
+        "--node-startup-seconds",
+        type=int,
+        default=600,
+        help="Time for a new node to become ready for a placeholder.",
+    )
+    replay_parser.add_argument("--output", help="Write results as JSON here.")
+
+    args = argparser.parse_args()
+
+    if args.command == "replay":
+        for strategy in args.strategy:
+            if strategy not in scaler.STRATEGIES:
+                argparser.error(f"invalid strategy: {strategy!r}")
+
+    if args.command == "record":
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+        return record(args)
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s %(message)s")
+    return replay(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Size placeholder pods from the nodes they run on.
+
+A placeholder should fill a node, less what the node's DaemonSet and static
+pods request, so hand-computed `resources` go stale whenever those requests
+change: too big and the placeholder never fits, so the autoscaler adds a
+node for nothing; too small and a user pod fits beside it.  Pools with an
+`autoSize` section instead get requests worked out each cycle from their
+nodes, the same way tools/determine_placeholder_pod_memory.py does:
+
+    nodePools:
+      user-pool:
+        resources:
+          requests:
+            memory: 60Gi # used until the pool has nodes
+        autoSize:
+          resources: [memory, cpu] # default [memory]
+          reserve: {memory: 265Mi, cpu: 100m}
+          tolerance: 0.05
+
+Each sized request is the smallest `allocatable - overhead - reserve` over
+the pool's nodes, so a placeholder fits on any of them.  To keep the
+deployment from being re-rolled for every small change, a size only grows
+once it is more than `tolerance` larger than the current one; it shrinks
+straight away, since a placeholder that no longer fits is the costly case.
+"""
+
+import logging
+from copy import deepcopy
+
+from .utils import cpu_millicores, memory_mib
+
+log = logging.getLogger(__name__)
+
+SIZED_RESOURCES = ("memory", "cpu")
+# tools/determine_placeholder_pod_memory.py's UNUSED_MEMORY_BYTES, rounded up.
+DEFAULT_RESERVE = {"memory": "265Mi", "cpu": "100m"}
+DEFAULT_TOLERANCE = 0.05
+
+
+def validate_auto_size(pool_name, pool_config):
+    """Raise ValueError if a pool's autoSize is malformed."""
+    auto_size = pool_config.get("autoSize")
+    if auto_size is None:
+        return
+    if not isinstance(auto_size, dict):
+        raise ValueError(
+            f"autoSize for pool {pool_name} must be a mapping, got {auto_size!r}"
+        )
+    resources = auto_size.get("resources", ["memory"])
+    if (
+        not isinstance(resources, list)
+        or not resources
+        or any(r not in SIZED_RESOURCES for r in resources)
+    ):
+        raise ValueError(
+            f"autoSize.resources for pool {pool_name} must be a list of {SIZED_RESOURCES}, got {resources!r}"
+        )
+    reserve = auto_size.get("reserve", {})
+    if not isinstance(reserve, dict) or any(r not in SIZED_RESOURCES for r in reserve):
+        raise ValueError(
+            f"autoSize.reserve for pool {pool_name} must map {SIZED_RESOURCES} to quantities, got {reserve!r}"
+        )
+    try:
+        for name, parse in (("memory", memory_mib), ("cpu", cpu_millicores)):
+            if name in reserve:
+                parse(reserve[name])
+    except ValueError as e:
+        raise ValueError(f"autoSize.reserve for pool {pool_name}: {e}") from e
+    tolerance = auto_size.get("tolerance", DEFAULT_TOLERANCE)
+    if (
+        not isinstance(tolerance, (int, float))
+        or isinstance(tolerance, bool)
+        or tolerance < 0
+    ):
+        raise ValueError(
+            f"autoSize.tolerance for pool {pool_name} must be a non-negative number, got {tolerance!r}"
+        )
+
+
+def fitting_requests(pool_usable_resources, reserve):
+    """The largest {"memory": Mi, "cpu": millicores} that fits on every node.
+
+    Returns None for a pool without nodes.
+    """
+    if not pool_usable_resources:
+        return None
+    reserve_mem_mi = memory_mib(reserve.get("memory", DEFAULT_RESERVE["memory"]))
+    reserve_cpu_m = cpu_millicores(reserve.get("cpu", DEFAULT_RESERVE["cpu"]))
+    nodes = pool_usable_resources.values()
+    return {
+        "memory": min(
+            n["mem_alloc_mi"] - n["overhead"]["mem_mi"] - reserve_mem_mi for n in nodes
+        ),
+        "cpu": min(
+            n["cpu_alloc_m"] - n["overhead"]["cpu_m"] - reserve_cpu_m for n in nodes
+        ),
+    }
+
+
+def _render(name, amount):
+    return f"{amount}Mi" if name == "memory" else f"{amount}m"
+
+
+class PlaceholderSizer:
+    """Work out each autoSize pool's placeholder requests, with hysteresis."""
+
+    def __init__(self):
+        # pool -> {"memory": Mi, "cpu": millicores} currently rendered.
+        self.sizes = {}
+
+    def _settle(self, pool_name, name, current, wanted, tolerance):
+        if current is None or wanted < current or wanted > current * (1 + tolerance):
+            if current is not None and wanted != current:
+                log.info(
+                    f"Placeholder {name} request for pool {pool_name} "
+                    f"changed from {_render(name, current)} to {_render(name, wanted)}"
+                )
+            return wanted
+        return current
+
+    def pool_config(self, pool_name, pool_config, pool_usable_resources):
+        """pool_config with its requests sized to its nodes, if it has autoSize."""
+        auto_size = pool_config.get("autoSize")
+        if auto_size is None:
+            return pool_config
+        fitting = fitting_requests(pool_usable_resources, auto_size.get("reserve", {}))
+        sizes = self.sizes.setdefault(pool_name, {})
+        if fitting is not None:
+            tolerance = auto_size.get("tolerance", DEFAULT_TOLERANCE)
+            for name in auto_size.get("resources", ["memory"]):
+                sizes[name] = self._settle(
+                    pool_name, name, sizes.get(name), fitting[name], tolerance
+                )
+        names = [n for n in auto_size.get("resources", ["memory"]) if n in sizes]
+        if not names:
+            return pool_config
+        sized = deepcopy(pool_config)
+        resources = sized.setdefault("resources", {})
+        requests = resources.setdefault("requests", {})
+        limits = resources.get("limits") or {}
+        for name in names:
+            requests[name] = _render(name, sizes[name])
+            # A limit below the request would be rejected.
+            if name in limits:
+                limits[name] = requests[name]
+        return sized
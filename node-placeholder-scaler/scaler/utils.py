@@ -1,3 +1,6 @@
+from kubernetes.utils import parse_quantity as _parse_quantity
+
+
 def parse_cpu(q):
     """Parse CPU quantity string and return value in millicores."""
     if q.endswith("m"):
@@ -18,3 +21,22 @@ def parse_memory(q):
         return int(q) * 1e6 // (1024 * 1024)
     else:  # Assume it is in Bytes
         return int(q) // (1024 * 1024)  # Convert Bytes to MiB
+
+
+def parse_quantity(q):
+    """Parse any Kubernetes resource quantity (e.g. "2", "500m", "100Gi") to a float.
+
+    Used for resources other than CPU and memory, such as nvidia.com/gpu or
+    ephemeral-storage, which are compared as plain numbers.
+    """
+    return float(_parse_quantity(q))
+
+
+def cpu_millicores(quantity):
+    """Millicores in any Kubernetes CPU quantity, e.g. 500m, 0.5 or "2"."""
+    return round(parse_quantity(str(quantity)) * 1000)
+
+
+def memory_mib(quantity):
+    """Whole MiB in any Kubernetes memory quantity, e.g. 2Gi, 2G or 2048M."""
+    return int(parse_quantity(str(quantity)) // (1024 * 1024))
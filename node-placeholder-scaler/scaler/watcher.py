@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+import logging
+import threading
+
+from kubernetes import client, watch
+
+log = logging.getLogger(__name__)
+
+
+def is_eviction_event(event):
+    """Whether a placeholder pod watch event means a pool lost headroom.
+
+    A user pod that preempts a placeholder deletes it, and its replacement
+    sits Pending until a node is free; either is worth reacting to at once.
+    """
+    if event["type"] == "DELETED":
+        return True
+    pod = event["object"]
+    return event["type"] in ("ADDED", "MODIFIED") and pod.status.phase == "Pending"
+
+
+class PlaceholderWatcher:
+    """Watch placeholder pods and call on_eviction soon after one is evicted.
+
+    Events within `debounce` seconds of the first are coalesced into one
+    call, so a surge that preempts several placeholders at once triggers a
+    single reconcile.  The watch is restarted from the last seen
+    resourceVersion, and from a fresh list if that has expired.
+    """
+
+    def __init__(
+        self,
+        api: client.CoreV1Api,
+        namespace,
+        label_selector,
+        on_eviction,
+        debounce=2.0,
+        timeout_seconds=300,
+        retry_period=5,
+    ):
+        self.api = api
+        self.namespace = namespace
+        self.label_selector = label_selector
+        self.on_eviction = on_eviction
+        self.debounce = debounce
+        self.timeout_seconds = timeout_seconds
+        self.retry_period = retry_period
+        self._resource_version = None
+        self._timer = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watch = None
+        self._thread = None
+
+    def _fire(self):
+        with self._lock:
+            self._timer = None
+        log.info("Placeholder pod evicted; reconciling now")
+        self.on_eviction()
+
+    def trigger(self):
+        """Schedule on_eviction in `debounce` seconds unless already scheduled."""
+        with self._lock:
+            if self._timer is not None:
+                return
+            self._timer = threading.Timer(self.debounce, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def handle(self, event):
+        self._resource_version = event["object"].metadata.resource_version
+        if is_eviction_event(event):
+            pod = event["object"]
+            log.info(
+                f"Placeholder pod {pod.metadata.name} {event['type'].lower()} "
+                f"(phase {pod.status.phase})"
+            )
+            self.trigger()
+
+    def step(self):
+        """List if needed, then follow one watch request to its end."""
+        if self._resource_version is None:
+            pods = self.api.list_namespaced_pod(
+                self.namespace, label_selector=self.label_selector
+            )
+            self._resource_version = pods.metadata.resource_version
+        self._watch = watch.Watch()
+        for event in self._watch.stream(
+            self.api.list_namespaced_pod,
+            self.namespace,
+            label_selector=self.label_selector,
+            resource_version=self._resource_version,
+            timeout_seconds=self.timeout_seconds,
+        ):
+            if self._stop.is_set():
+                break
+            self.handle(event)
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.step()
+            except client.exceptions.ApiException as e:
+                if e.status == 410:
+                    log.info("Placeholder pod watch expired; relisting")
+                    self._resource_version = None
+                    continue
+                log.error(f"Kubernetes API error watching placeholder pods: {e}")
+                self._stop.wait(self.retry_period)
+            except Exception:
+                log.exception("Unexpected error watching placeholder pods")
+                self._stop.wait(self.retry_period)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.run, name="placeholder-watch", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._watch is not None:
+            self._watch.stop()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Keep a pool's headroom in every zone.
+
+User pods whose storage is pinned to a zone can only use headroom in that
+zone, but a pool's placeholders land wherever the scheduler puts them.  A
+pool with a `zones` section is instead planned zone by zone:
+
+    nodePools:
+      user-pool:
+        replicas: 1 # per zone
+        zones:
+          labelKey: topology.kubernetes.io/zone # default
+          names: [us-central1-a, us-central1-b] # default: the nodes' zones
+
+Each zone gets its own `{pool}-{zone}-placeholder` deployment pinned to it,
+and its replica count is worked out by plan_pool from that zone's nodes
+alone: `replicas` (or the calendar's count) less the zone's free nodes.  So
+free capacity in one zone no longer cancels out headroom in another.  The
+pool's forecast floor and pending boost are not known per zone and are
+shared out evenly, rounding up.  Listing `names` keeps headroom in zones the
+pool has no nodes in yet; nodes without the label are left out.  With
+`shapes` as well, each zone has a deployment per shape.
+"""
+
+import logging
+
+from .shapes import shape_name
+
+log = logging.getLogger(__name__)
+
+DEFAULT_LABEL_KEY = "topology.kubernetes.io/zone"
+# Label on each zone's deployment, alongside shapes.POOL_LABEL.
+ZONE_LABEL = "node-placeholder-scaler/zone"
+
+
+def validate_zones(pool_name, pool_config):
+    """Raise ValueError if a pool's zones section is malformed."""
+    zones = pool_config.get("zones")
+    if zones is None:
+        return
+    if not isinstance(zones, dict):
+        raise ValueError(f"zones for pool {pool_name} must be a mapping, got {zones!r}")
+    label_key = zones.get("labelKey", DEFAULT_LABEL_KEY)
+    if not isinstance(label_key, str) or not label_key:
+        raise ValueError(
+            f"zones.labelKey for pool {pool_name} must be a label name, got {label_key!r}"
+        )
+    names = zones.get("names", [])
+    if (
+        not isinstance(names, list)
+        or not all(isinstance(n, str) and n for n in names)
+        or len(set(names)) != len(names)
+    ):
+        raise ValueError(
+            f"zones.names for pool {pool_name} must be a list of distinct zone names, got {names!r}"
+        )
+
+
+def nodes_by_zone(zones_config, pool_usable_resources):
+    """{zone: {node: resources}} for the configured zones and the nodes' zones.
+
+    Sorted by zone; zones from `names` without nodes map to {}.
+    """
+    label_key = zones_config.get("labelKey", DEFAULT_LABEL_KEY)
+    by_zone = {zone: {} for zone in zones_config.get("names", [])}
+    for node, resources in pool_usable_resources.items():
+        zone = resources.get("labels", {}).get(label_key)
+        if zone:
+            by_zone.setdefault(zone, {})[node] = resources
+        else:
+            log.info(f"Node {node} has no {label_key} label; leaving it out of zones")
+    return dict(sorted(by_zone.items()))
+
+
+def zone_pool_config(pool_config, zone):
+    """pool_config with its nodeSelector narrowed to one zone."""
+    label_key = pool_config["zones"].get("labelKey", DEFAULT_LABEL_KEY)
+    return dict(
+        pool_config, nodeSelector={**pool_config["nodeSelector"], label_key: zone}
+    )
+
+
+def zone_deployment_name(pool_name, zone):
+    """The name passed to make_deployment for a zone's placeholders."""
+    return f"{pool_name}-{shape_name(zone)}"
+
+
+def zone_share(amount, zones):
+    """Each of `zones` zones' share of a pool-wide amount, rounded up."""
+    if amount is None:
+        return None
+    return -(-amount // zones)
@@ -21,6 +21,22 @@ if __name__ == "__main__":
         [
             str(tests_dir / "test_scaler.py"),
             str(tests_dir / "test_calendar_parser.py"),
+            str(tests_dir / "test_e2e.py"),
+            str(tests_dir / "test_leader.py"),
+            str(tests_dir / "test_simulate.py"),
+            str(tests_dir / "test_recorder.py"),
+            str(tests_dir / "test_forecast.py"),
+            str(tests_dir / "test_capacity.py"),
+            str(tests_dir / "test_reconcile.py"),
+            str(tests_dir / "test_grace_state.py"),
+            str(tests_dir / "test_watcher.py"),
+            str(tests_dir / "test_pressure.py"),
+            str(tests_dir / "test_interval.py"),
+            str(tests_dir / "test_health.py"),
+            str(tests_dir / "test_calendars.py"),
+            str(tests_dir / "test_sizing.py"),
+            str(tests_dir / "test_shapes.py"),
+            str(tests_dir / "test_zones.py"),
             "-v",
         ]
     )
@@ -3,16 +3,21 @@ Tests for scaler/calendar_parser.py
 """
 
 import datetime
+import pickle
+import threading
 import zoneinfo
 from unittest.mock import MagicMock, patch
 
 import pytest
 from ical.calendar_stream import IcsCalendarStream
 from scaler.calendar_parser import (
+    CalendarCache,
+    OccurrenceReader,
     _event_repr,
     _get_cal_tz,
     get_calendar,
     get_events,
+    parse_occurrences,
 )
 
 UTC = zoneinfo.ZoneInfo("UTC")
@@ -272,8 +277,8 @@ class TestGetCalendar:
         resp.text = ICS_ONE_EVENT
         mock_get.return_value = resp
         url = "https://example.com/calendar.ics"
-        get_calendar(url)
-        mock_get.assert_called_once_with(url)
+        get_calendar(url, timeout=30)
+        mock_get.assert_called_once_with(url, timeout=30)
 
     def test_file_url_with_events_parseable(self, tmp_path):
         """Confirm that the returned calendar has queryable events."""
@@ -285,6 +290,145 @@ class TestGetCalendar:
         assert len(events) == 2
 
 
+# ---------------------------------------------------------------------------
+# CalendarCache
+# ---------------------------------------------------------------------------
+
+
+class TestCalendarCache:
+    def _cache(self, results):
+        self.fetched = []
+        self.now = 0.0
+
+        def fetch(url):
+            self.fetched.append(url)
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return CalendarCache(ttl=60, fetch=fetch, clock=lambda: self.now)
+
+    def _settle(self, cache):
+        for done in list(cache._refreshing.values()):
+            done.wait(5)
+
+    def test_reuses_calendar_within_ttl(self):
+        cache = self._cache(["cal1", "cal2"])
+        assert cache.get("https://example.com/a.ics") == "cal1"
+        self.now = 59
+        assert cache.get("https://example.com/a.ics") == "cal1"
+        assert len(self.fetched) == 1
+
+    def test_stale_served_while_refreshing(self):
+        cache = self._cache(["cal1", "cal2"])
+        cache.get("https://example.com/a.ics")
+        self.now = 60
+        assert cache.get("https://example.com/a.ics") == "cal1"
+        self._settle(cache)
+        assert cache.get("https://example.com/a.ics") == "cal2"
+        assert len(self.fetched) == 2
+
+    def test_hanging_refresh_does_not_block(self):
+        release = threading.Event()
+
+        def fetch(url):
+            if fetch.calls:
+                release.wait(5)
+            fetch.calls += 1
+            return f"cal{fetch.calls}"
+
+        fetch.calls = 0
+        now = [0.0]
+        cache = CalendarCache(ttl=60, fetch=fetch, clock=lambda: now[0])
+        assert cache.get("u") == "cal1"
+        now[0] = 120
+        assert cache.get("u") == "cal1"
+        assert cache.get("u") == "cal1"
+        release.set()
+
+    def test_urls_cached_separately(self):
+        cache = self._cache(["cal1", "cal2"])
+        assert cache.get("https://example.com/a.ics") == "cal1"
+        assert cache.get("https://example.com/b.ics") == "cal2"
+
+    def test_failure_keeps_last_good_calendar(self):
+        cache = self._cache(["cal1", None, RuntimeError("boom"), "cal2"])
+        cache.get("u")
+        for _ in range(2):
+            self.now += 60
+            assert cache.get("u") == "cal1"
+            self._settle(cache)
+        assert cache._failures == {"u": 2}
+        self.now += 60
+        cache.get("u")
+        self._settle(cache)
+        assert cache.get("u") == "cal2"
+
+    def test_first_failure_returns_none(self):
+        cache = self._cache([None, "cal1"])
+        assert cache.get("u") is None
+        assert cache.get("u") == "cal1"
+
+    def test_concurrent_first_gets_fetch_once(self):
+        started = threading.Event()
+        release = threading.Event()
+        fetched = []
+
+        def fetch(url):
+            fetched.append(url)
+            started.set()
+            release.wait(5)
+            return "cal"
+
+        cache = CalendarCache(ttl=60, fetch=fetch)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get("u")))
+            for _ in range(3)
+        ]
+        threads[0].start()
+        started.wait(5)
+        for t in threads[1:]:
+            t.start()
+        release.set()
+        for t in threads:
+            t.join(5)
+        assert results == ["cal"] * 3
+        assert fetched == ["u"]
+
+    def test_refresh_stale_and_forget(self):
+        cache = self._cache(["cal1", "cal2"])
+        cache.forget_after = 600
+        cache.get("u")
+        self.now = 30
+        cache.refresh_stale()
+        assert len(self.fetched) == 1
+        self.now = 60
+        cache.refresh_stale()
+        self._settle(cache)
+        assert cache.ages() == {"u": 0}
+        self.now = 601
+        cache.refresh_stale()
+        assert cache.ages() == {}
+
+    def test_metrics(self):
+        cache = self._cache(["cal1", None])
+        cache.get('https://example.com/"a".ics')
+        self.now = 75
+        cache.get('https://example.com/"a".ics')
+        self._settle(cache)
+        metrics = cache.metrics()
+        assert (
+            'node_placeholder_calendar_age_seconds{url="https://example.com/\\"a\\".ics"} 75.0'
+            in metrics
+        )
+        assert (
+            'node_placeholder_calendar_refresh_failures_total{url="https://example.com/\\"a\\".ics"} 1'
+            in metrics
+        )
+
+
 # ---------------------------------------------------------------------------
 # get_events
 # ---------------------------------------------------------------------------
@@ -384,3 +528,84 @@ class TestGetEvents:
         t = datetime.datetime(2023, 4, 27, 17, 30, tzinfo=UTC)
         result = get_events(cal, time=t)
         assert isinstance(result, list)
+
+
+# ---------------------------------------------------------------------------
+# parse_occurrences / OccurrenceReader
+# ---------------------------------------------------------------------------
+
+# A weekly lecture on Mondays 10:00-11:00 UTC, starting 2023-04-24.
+ICS_WEEKLY = _vcal(
+    "BEGIN:VEVENT\n"
+    "UID:weekly@test\n"
+    "DTSTART:20230424T100000Z\n"
+    "DTEND:20230424T110000Z\n"
+    "RRULE:FREQ=WEEKLY\n"
+    "SUMMARY:Lecture\n"
+    "DESCRIPTION:pool-a: 4\n"
+    "END:VEVENT"
+)
+
+WINDOW_START = datetime.datetime(2023, 4, 27, tzinfo=UTC)
+WINDOW_END = WINDOW_START + datetime.timedelta(days=7)
+
+
+class TestParseOccurrences:
+    def test_counts_and_labels(self):
+        parsed = parse_occurrences(ICS_HTML_DESC, WINDOW_START, WINDOW_END)
+        assert len(parsed.occurrences) == 1
+        occurrence = parsed.occurrences[0]
+        assert occurrence.counts == {"pool-a": 3}
+        assert occurrence.label.startswith("HTML Event 2023-04-27 17:00")
+
+    def test_at_matches_get_events(self):
+        parsed = parse_occurrences(ICS_TWO_EVENTS, WINDOW_START, WINDOW_END)
+        t = datetime.datetime(2023, 4, 27, 17, 30, tzinfo=UTC)
+        cal = IcsCalendarStream.calendar_from_ics(ICS_TWO_EVENTS)
+        assert sorted(o.label for o in parsed.at(t)) == sorted(
+            _event_repr(ev) for ev in get_events(cal, time=t)
+        )
+        assert [o.counts for o in parsed.at(t)] == [{"pool-a": 3}, {"pool-b": 5}]
+        assert parsed.at(datetime.datetime(2023, 4, 27, 18, tzinfo=UTC)) == []
+
+    def test_recurring_event_expanded_within_window(self):
+        parsed = parse_occurrences(ICS_WEEKLY, WINDOW_START, WINDOW_END)
+        # Only the Monday 2023-05-01 lecture falls in the window.
+        assert len(parsed.occurrences) == 1
+        monday = datetime.datetime(2023, 5, 1, 10, 30, tzinfo=UTC)
+        assert [o.counts for o in parsed.at(monday)] == [{"pool-a": 4}]
+
+    def test_event_started_before_window_included(self):
+        start = datetime.datetime(2023, 4, 28, 12, tzinfo=UTC)
+        parsed = parse_occurrences(
+            ICS_ALL_DAY, start, start + datetime.timedelta(days=1)
+        )
+        assert [o.counts for o in parsed.at(start)] == [{"pool-c": 2}]
+
+    def test_picklable(self):
+        parsed = parse_occurrences(ICS_TWO_EVENTS, WINDOW_START, WINDOW_END)
+        assert pickle.loads(pickle.dumps(parsed)) == parsed
+
+
+class TestOccurrenceReader:
+    def test_parses_in_worker_process(self, tmp_path):
+        ics_file = tmp_path / "cal.ics"
+        now = datetime.datetime.now(UTC).replace(microsecond=0)
+        stamp = "%Y%m%dT%H%M%SZ"
+        ics_file.write_text(
+            _vcal(
+                _vevent(
+                    "now@test",
+                    (now - datetime.timedelta(hours=1)).strftime(stamp),
+                    (now + datetime.timedelta(hours=1)).strftime(stamp),
+                    "Now",
+                    "pool-a: 2",
+                )
+            )
+        )
+        reader = OccurrenceReader(days=1)
+        try:
+            parsed = reader(str(ics_file))
+        finally:
+            reader.shutdown()
+        assert [o.counts for o in parsed.at()] == [{"pool-a": 2}]
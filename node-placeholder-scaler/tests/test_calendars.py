@@ -0,0 +1,117 @@
+"""
+Tests for scaler/calendars.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_calendars.py
+"""
+
+import threading
+
+import pytest
+from scaler.calendars import CalendarFetcher, calendar_sources, merge_replica_counts
+
+# ---------------------------------------------------------------------------
+# calendar_sources
+# ---------------------------------------------------------------------------
+
+
+class TestCalendarSources:
+    def test_legacy_url_and_list(self):
+        cfg = {
+            "calendarUrl": "https://example.com/a.ics",
+            "calendars": [{"url": "labs.ics", "pools": ["gpu"], "priority": 5}],
+        }
+        assert calendar_sources(cfg) == [
+            {"url": "https://example.com/a.ics"},
+            {"url": "labs.ics", "pools": ["gpu"], "priority": 5},
+        ]
+
+    def test_no_calendars(self):
+        assert calendar_sources({"nodePools": {}}) == []
+
+    @pytest.mark.parametrize(
+        "calendars",
+        [
+            "a.ics",
+            [{"pools": ["gpu"]}],
+            [{"url": "a.ics", "pools": "gpu"}],
+            [{"url": "a.ics", "priority": "high"}],
+            [{"url": "a.ics", "timeout": 0}],
+        ],
+    )
+    def test_invalid(self, calendars):
+        with pytest.raises(ValueError):
+            calendar_sources({"calendars": calendars})
+
+
+# ---------------------------------------------------------------------------
+# merge_replica_counts
+# ---------------------------------------------------------------------------
+
+
+class TestMergeReplicaCounts:
+    def test_max_across_sources(self):
+        results = [
+            ({"url": "a"}, {"user": 2, "gpu": 1}),
+            ({"url": "b"}, {"user": 5}),
+        ]
+        assert merge_replica_counts(results) == {"user": 5, "gpu": 1}
+
+    def test_pool_scope(self):
+        results = [
+            ({"url": "a", "pools": ["gpu"]}, {"user": 9, "gpu": 3}),
+            ({"url": "b"}, {"user": 1}),
+        ]
+        assert merge_replica_counts(results) == {"user": 1, "gpu": 3}
+
+    def test_priority_wins_over_larger_count(self):
+        results = [
+            ({"url": "a"}, {"user": 8}),
+            ({"url": "closed", "priority": 10}, {"user": 0}),
+        ]
+        assert merge_replica_counts(results) == {"user": 0}
+
+
+# ---------------------------------------------------------------------------
+# CalendarFetcher
+# ---------------------------------------------------------------------------
+
+
+class TestCalendarFetcher:
+    def test_merges_sources(self):
+        counts = {"a": {"user": 2}, "b": {"user": 3, "gpu": 1}, "c": None}
+        fetcher = CalendarFetcher(counts.get)
+        sources = [{"url": "a"}, {"url": "b"}, {"url": "c"}]
+        assert fetcher.replica_counts(sources) == {"user": 3, "gpu": 1}
+
+    def test_failing_source_skipped(self):
+        def get_counts(url):
+            if url == "bad":
+                raise RuntimeError("boom")
+            return {"user": 1}
+
+        fetcher = CalendarFetcher(get_counts)
+        assert fetcher.replica_counts([{"url": "bad"}, {"url": "good"}]) == {"user": 1}
+
+    def test_slow_source_does_not_hold_up_others(self):
+        release = threading.Event()
+        calls = []
+
+        def get_counts(url):
+            calls.append(url)
+            if url == "slow":
+                release.wait(5)
+                return {"user": 7}
+            return {"user": 1}
+
+        fetcher = CalendarFetcher(get_counts)
+        sources = [{"url": "slow", "timeout": 0.1}, {"url": "fast"}]
+        assert fetcher.replica_counts(sources) == {"user": 1}
+        # Still running, so not started a second time.
+        assert fetcher.replica_counts(sources) == {"user": 1}
+        assert calls.count("slow") == 1
+        release.set()
+        fetcher._running["slow"].result(5)
+        # A finished read is not reused; the next cycle reads afresh.
+        assert fetcher.replica_counts(sources) == {"user": 7}
+        assert calls.count("slow") == 2
@@ -0,0 +1,145 @@
+"""
+Tests for scaler/capacity.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_capacity.py
+"""
+
+import pytest
+from scaler.capacity import (
+    _demand_sequence,
+    parse_profiles,
+    placeholder_capacity,
+    placeholder_units,
+    pods_that_fit,
+    validate_user_pod_profiles,
+)
+
+SMALL = {"cpu": "500m", "memory": "2Gi"}
+LARGE = {"cpu": "2", "memory": "8Gi"}
+
+# ---------------------------------------------------------------------------
+# parse_profiles
+# ---------------------------------------------------------------------------
+
+
+class TestParseProfiles:
+    def test_parses_quantities_and_weights(self):
+        assert parse_profiles([SMALL, dict(LARGE, weight=3)]) == (
+            (500, 2048, 1),
+            (2000, 8192, 3),
+        )
+
+    @pytest.mark.parametrize(
+        "profile, parsed",
+        [
+            ({"cpu": 0.5, "memory": "2G"}, (500, 1907, 1)),
+            ({"cpu": "1.5", "memory": "2048M"}, (1500, 1953, 1)),
+        ],
+    )
+    def test_decimal_quantities(self, profile, parsed):
+        assert parse_profiles([profile]) == (parsed,)
+
+    def test_invalid_quantity(self):
+        with pytest.raises(ValueError):
+            parse_profiles([{"cpu": "lots"}])
+
+    def test_invalid_weight(self):
+        with pytest.raises(ValueError):
+            parse_profiles([dict(SMALL, weight=0)])
+
+    def test_empty_profile(self):
+        with pytest.raises(ValueError):
+            parse_profiles([{"weight": 1}])
+
+
+# ---------------------------------------------------------------------------
+# packing
+# ---------------------------------------------------------------------------
+
+
+class TestPacking:
+    def test_demand_sequence_interleaves_by_weight(self):
+        profiles = parse_profiles([dict(SMALL, weight=3), LARGE])
+        assert _demand_sequence(profiles) == (
+            (500, 2048),
+            (500, 2048),
+            (2000, 8192),
+            (500, 2048),
+        )
+
+    def test_single_profile_limited_by_tightest_resource(self):
+        profiles = parse_profiles([SMALL])
+        # 4 CPUs fit 8 pods, 10Gi fits 5.
+        assert pods_that_fit(4000, 10 * 1024, profiles) == 5
+
+    def test_fragmented_space_is_filled_by_smaller_profile(self):
+        profiles = parse_profiles([SMALL, LARGE])
+        # One large and one small use 2.5 CPU / 10Gi; the remaining 1 CPU
+        # and 5Gi only fit small pods.
+        assert pods_that_fit(3500, 15 * 1024, profiles) == 4
+
+    def test_nothing_fits(self):
+        assert pods_that_fit(100, 100, parse_profiles([SMALL])) == 0
+
+    def test_placeholder_units(self):
+        profiles = parse_profiles([SMALL])
+        # A placeholder reserves room for 16 small pods; the free space on
+        # three nodes fits 8 + 4 + 0.
+        free = [(8000, 16 * 1024), (2000, 60 * 1024), (300, 60 * 1024)]
+        assert placeholder_units(free, profiles, 8000, 32 * 1024) == 0.75
+
+    def test_placeholder_units_when_nothing_fits_a_placeholder(self):
+        assert placeholder_units([(8000, 8000)], parse_profiles([LARGE]), 1000, 1) == 0
+
+
+class TestPlaceholderCapacity:
+    def test_from_requests(self):
+        pool_config = {"resources": {"requests": {"cpu": "7", "memory": "60Gi"}}}
+        assert placeholder_capacity(pool_config, {}) == (7000, 60 * 1024)
+
+    def test_decimal_cpu_request(self):
+        pool_config = {"resources": {"requests": {"cpu": "7.5", "memory": "60G"}}}
+        assert placeholder_capacity(pool_config, {}) == (7500, 57220)
+
+    def test_missing_dimension_is_whole_node(self):
+        pool_config = {"resources": {"requests": {"memory": 64424509440}}}
+        nodes = {
+            "a": {"cpu_alloc_m": 3920, "mem_alloc_mi": 1},
+            "b": {"cpu_alloc_m": 7910, "mem_alloc_mi": 1},
+        }
+        assert placeholder_capacity(pool_config, nodes) == (7910, 61440)
+
+
+# ---------------------------------------------------------------------------
+# validate_user_pod_profiles
+# ---------------------------------------------------------------------------
+
+
+class TestValidateUserPodProfiles:
+    def test_valid(self):
+        validate_user_pod_profiles("a", {})
+        validate_user_pod_profiles(
+            "a",
+            {
+                "userPodProfiles": [SMALL, dict(LARGE, weight=2)],
+                "resources": {"requests": {"cpu": "7.5", "memory": "60Gi"}},
+            },
+        )
+
+    @pytest.mark.parametrize(
+        "pool_config",
+        [
+            {"userPodProfiles": SMALL},
+            {"userPodProfiles": ["500m"]},
+            {"userPodProfiles": [dict(SMALL, weight=0)]},
+            {"userPodProfiles": [{"memory": "two gigs"}]},
+            {
+                "userPodProfiles": [SMALL],
+                "resources": {"requests": {"cpu": "most"}},
+            },
+        ],
+    )
+    def test_invalid(self, pool_config):
+        with pytest.raises(ValueError, match="pool a"):
+            validate_user_pod_profiles("a", pool_config)
@@ -0,0 +1,741 @@
+"""
+End-to-end tests for scaler/scaler.py against the in-process fake apiserver.
+
+Unlike test_scaler.py, nothing here is mocked: the scaler loads a kubeconfig
+that points at benchmarks/fake_apiserver.py and talks to it over HTTP.
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_e2e.py
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from benchmarks.fake_apiserver import FakeApiServer
+from benchmarks.fake_cluster import (
+    PLACEHOLDER_LABELS,
+    PLACEHOLDER_NAMESPACE,
+    POOL_LABEL_KEY,
+    ClusterSpec,
+    make_cluster,
+)
+from kubernetes import client, config, watch
+from kubernetes.config import kube_config
+from ruamel.yaml import YAML
+from scaler import scaler
+from scaler.calendars import CalendarFetcher
+from scaler.health import Health, HealthGroup
+from scaler.leader import LeaderElector
+from scaler.recorder import load_columns
+from scaler.scaler import (
+    _argparser,
+    _get_apps_v1_client,
+    _get_coordination_v1_client,
+    _get_v1_client,
+    _process_pool,
+    any_placeholder_pod_pending,
+    apply_deployment,
+    get_placeholder_pods,
+    get_usable_resources,
+    is_unschedulable_node,
+    make_deployment,
+    placeholder_pod_running_on_node,
+    run_cluster,
+    use_cluster,
+)
+from scaler.watcher import PlaceholderWatcher
+
+INSTANCE_TYPE = "node.kubernetes.io/instance-type"
+ZONE_LABEL_KEY = "topology.kubernetes.io/zone"
+LABEL_SELECTOR = ",".join(f"{k}={v}" for k, v in PLACEHOLDER_LABELS.items())
+
+_TEMPLATE = {
+    "apiVersion": "apps/v1",
+    "kind": "Deployment",
+    "metadata": {"labels": dict(PLACEHOLDER_LABELS)},
+    "spec": {
+        "replicas": 0,
+        "selector": {"matchLabels": dict(PLACEHOLDER_LABELS)},
+        "template": {
+            "metadata": {"labels": dict(PLACEHOLDER_LABELS)},
+            "spec": {"nodeSelector": {}, "containers": [{"name": "pause"}]},
+        },
+    },
+}
+
+
+@pytest.fixture
+def apiserver(tmp_path, monkeypatch):
+    cluster = make_cluster(
+        ClusterSpec(nodes=6, pods_per_node=3, pools=2, unschedulable_fraction=0)
+    )
+    with FakeApiServer(cluster) as server:
+        kubeconfig = server.write_kubeconfig(tmp_path / "kubeconfig")
+        monkeypatch.delenv("KUBERNETES_SERVICE_HOST", raising=False)
+        # KUBECONFIG is read at import time, so patch the resolved default.
+        monkeypatch.setattr(
+            kube_config, "KUBE_CONFIG_DEFAULT_LOCATION", str(kubeconfig)
+        )
+        yield server
+
+
+def _process(pool_name, replicas, **overrides):
+    pool_config = {
+        "nodeSelector": {POOL_LABEL_KEY: pool_name},
+        "resources": {"requests": {"memory": "1Gi"}},
+        "replicas": replicas,
+    }
+    kwargs = dict(
+        pool_name=pool_name,
+        pool_config=pool_config,
+        replica_count_overrides={},
+        calendar_override_enabled=False,
+        placeholder_template=_TEMPLATE,
+        namespace=PLACEHOLDER_NAMESPACE,
+        label_selector=LABEL_SELECTOR,
+        strategy="balanced",
+        cpu_threshold=0.2,
+        memory_threshold=0.2,
+        node_grace_period=0,
+        node_first_seen={},
+        node_last_above_threshold={},
+    )
+    kwargs.update(overrides)
+    if "pool_usable_resources" not in kwargs:
+        kwargs["pool_usable_resources"] = get_usable_resources().get(pool_name, {})
+    return _process_pool(**kwargs)
+
+
+class _Stopped(BaseException):
+    """Raised past the loop's error handling to end its thread."""
+
+
+class _CountingHealth(Health):
+    """Counts finished cycles, and ends the loop once stop is set."""
+
+    def __init__(self, stop):
+        super().__init__(stall_after=1, max_sleep=1)
+        self.stop = stop
+        self.finished = 0
+
+    def cycle_started(self):
+        if self.stop.is_set():
+            raise _Stopped
+        super().cycle_started()
+
+    def cycle_finished(self):
+        self.finished += 1
+        super().cycle_finished()
+
+
+def _loop_argv(tmp_path, pool_name, replicas, *extra):
+    yaml = YAML(typ="safe")
+    config_file = tmp_path / "config.yaml"
+    pool_config = {
+        "nodeSelector": {POOL_LABEL_KEY: pool_name},
+        "resources": {"requests": {"memory": "1Gi"}},
+        "replicas": replicas,
+    }
+    yaml.dump({"nodePools": {pool_name: pool_config}}, config_file)
+    template_file = tmp_path / "template.yaml"
+    yaml.dump(_TEMPLATE, template_file)
+    return [
+        f"--config-file={config_file}",
+        f"--placeholder-template-file={template_file}",
+        "--interval=0.1",
+        "--min-interval=0.05",
+        "--max-interval=0.2",
+        *extra,
+    ]
+
+
+def _loop_args(tmp_path, pool_name, replicas, *extra):
+    return _argparser().parse_args(_loop_argv(tmp_path, pool_name, replicas, *extra))
+
+
+def _run_loop(args, health, **kwargs):
+    """run_cluster until health's stop is set."""
+    try:
+        run_cluster(
+            args,
+            health,
+            threading.Event(),
+            CalendarFetcher(lambda url: None),
+            namespace=PLACEHOLDER_NAMESPACE,
+            **kwargs,
+        )
+    except _Stopped:
+        pass
+
+
+class TestReadPath:
+    def test_usable_resources_cover_all_nodes(self, apiserver):
+        result = get_usable_resources()
+        assert set(result) == {"pool-0", "pool-1"}
+        assert sum(len(nodes) for nodes in result.values()) == 6
+        node = result["pool-0"]["node-00000"]
+        assert node["cpu_alloc_m"] == 7910
+        assert node["cpu_requested_m"] >= 200  # two system pods
+        # Ready a minute after the fake cluster's 2025-01-06T08:00:00Z epoch.
+        assert node["ready_since"] == 1736150460.0
+        # kube-proxy and fluentbit are DaemonSet pods.
+        assert node["overhead"] == {"cpu_m": 200, "mem_mi": 328}
+        assert node["labels"]["node.kubernetes.io/instance-type"] == "n2-highmem-8"
+
+    def test_placeholder_running_on_node(self, apiserver):
+        assert placeholder_pod_running_on_node(
+            "node-00000", PLACEHOLDER_NAMESPACE, LABEL_SELECTOR
+        )
+        assert not placeholder_pod_running_on_node(
+            "node-00002", PLACEHOLDER_NAMESPACE, LABEL_SELECTOR
+        )
+
+    def test_pending_placeholder_detected(self, apiserver):
+        selector = {POOL_LABEL_KEY: "pool-0"}
+        assert not any_placeholder_pod_pending(
+            PLACEHOLDER_NAMESPACE, LABEL_SELECTOR, selector
+        )
+        apiserver.set_pod_phase(
+            PLACEHOLDER_NAMESPACE, "pool-0-placeholder-0", "Pending"
+        )
+        assert any_placeholder_pod_pending(
+            PLACEHOLDER_NAMESPACE, LABEL_SELECTOR, selector
+        )
+
+    def test_cordoned_node(self, apiserver):
+        node = apiserver.store.get("nodes", None, "node-00001")
+        node["spec"]["unschedulable"] = True
+        apiserver.add_node(node)
+        assert is_unschedulable_node("node-00001") is True
+        assert is_unschedulable_node("node-00003") is False
+        usable = get_usable_resources()
+        assert usable["pool-1"]["node-00001"]["unschedulable"] is True
+        assert usable["pool-1"]["node-00003"]["unschedulable"] is False
+
+    def test_placeholder_pods_listed_once_for_all_pools(self, apiserver):
+        pods = get_placeholder_pods(PLACEHOLDER_NAMESPACE, LABEL_SELECTOR)
+        assert {
+            "node": "node-00000",
+            "phase": "Running",
+            "nodeSelector": {POOL_LABEL_KEY: "pool-0"},
+        } in pods
+
+    def test_list_pagination(self, apiserver):
+        v1 = _get_v1_client()
+        names = []
+        page = v1.list_node(limit=4)
+        names.extend(n.metadata.name for n in page.items)
+        assert page.metadata._continue
+        page = v1.list_node(limit=4, _continue=page.metadata._continue)
+        names.extend(n.metadata.name for n in page.items)
+        assert not page.metadata._continue
+        assert sorted(names) == [f"node-{i:05d}" for i in range(6)]
+
+    def test_watch_lists_existing_objects(self, apiserver):
+        v1 = _get_v1_client()
+        events = [
+            (e["type"], e["object"].metadata.name)
+            for e in watch.Watch().stream(
+                v1.list_namespaced_pod,
+                PLACEHOLDER_NAMESPACE,
+                label_selector=LABEL_SELECTOR,
+                timeout_seconds=1,
+            )
+        ]
+        assert events == [
+            ("ADDED", "pool-0-placeholder-0"),
+            ("ADDED", "pool-1-placeholder-0"),
+        ]
+
+    def test_placeholder_watcher_sees_eviction(self, apiserver):
+        evicted = []
+        watcher = PlaceholderWatcher(
+            _get_v1_client(),
+            PLACEHOLDER_NAMESPACE,
+            LABEL_SELECTOR,
+            on_eviction=lambda: None,
+            timeout_seconds=1,
+        )
+        watcher.trigger = lambda: evicted.append(True)
+        watcher.step()
+        assert evicted == []
+        apiserver.delete_pod(PLACEHOLDER_NAMESPACE, "pool-1-placeholder-0")
+        watcher.step()
+        assert evicted == [True]
+
+    def test_watch_resumes_from_resource_version(self, apiserver):
+        v1 = _get_v1_client()
+        pods = v1.list_namespaced_pod(
+            PLACEHOLDER_NAMESPACE, label_selector=LABEL_SELECTOR
+        )
+        apiserver.delete_pod(PLACEHOLDER_NAMESPACE, "pool-1-placeholder-0")
+        apiserver.add_node(apiserver.store.get("nodes", None, "node-00000"))
+        events = [
+            (e["type"], e["object"].metadata.name)
+            for e in watch.Watch().stream(
+                v1.list_namespaced_pod,
+                PLACEHOLDER_NAMESPACE,
+                label_selector=LABEL_SELECTOR,
+                resource_version=pods.metadata.resource_version,
+                timeout_seconds=1,
+            )
+        ]
+        # The node update is a different resource and is not delivered.
+        assert events == [("DELETED", "pool-1-placeholder-0")]
+
+
+class TestWritePath:
+    def test_apply_creates_then_updates(self, apiserver):
+        deployment = make_deployment(
+            "pool-0", _TEMPLATE, {POOL_LABEL_KEY: "pool-0"}, {}, 1
+        )
+        created = apply_deployment(deployment, PLACEHOLDER_NAMESPACE)
+        assert created.spec.replicas == 1
+        deployment["spec"]["replicas"] = 2
+        updated = apply_deployment(deployment, PLACEHOLDER_NAMESPACE)
+        assert updated.spec.replicas == 2
+        assert updated.metadata.generation == 2
+
+    def test_scale_subresource(self, apiserver):
+        deployment = make_deployment("pool-1", _TEMPLATE, {}, {}, 1)
+        apply_deployment(deployment, PLACEHOLDER_NAMESPACE)
+        apps_v1 = _get_apps_v1_client()
+        apps_v1.patch_namespaced_deployment_scale(
+            "pool-1-placeholder", PLACEHOLDER_NAMESPACE, {"spec": {"replicas": 3}}
+        )
+        scale = apps_v1.read_namespaced_deployment_scale(
+            "pool-1-placeholder", PLACEHOLDER_NAMESPACE
+        )
+        assert scale.spec.replicas == 3
+
+    def test_missing_deployment_is_api_error(self, apiserver):
+        with pytest.raises(client.exceptions.ApiException) as e:
+            _get_apps_v1_client().read_namespaced_deployment(
+                "nope", PLACEHOLDER_NAMESPACE
+            )
+        assert e.value.status == 404
+
+    def test_process_pool_applies_replica_count(self, apiserver):
+        _process("pool-0", replicas=2)
+        stored = apiserver.store.get(
+            "deployments", PLACEHOLDER_NAMESPACE, "pool-0-placeholder"
+        )
+        assert stored is not None
+        assert stored["spec"]["template"]["spec"]["nodeSelector"] == {
+            POOL_LABEL_KEY: "pool-0"
+        }
+        # Some pool-0 nodes are nearly empty, so the reduction is reflected
+        # in the applied count, which never exceeds the configured replicas.
+        assert 0 <= stored["spec"]["replicas"] <= 2
+
+    def test_process_pool_with_prefetched_state_reads_no_nodes(self, apiserver):
+        placeholder_pods = get_placeholder_pods(PLACEHOLDER_NAMESPACE, LABEL_SELECTOR)
+        pool_usable_resources = get_usable_resources()["pool-0"]
+        apiserver.request_log.clear()
+        _process(
+            "pool-0",
+            replicas=2,
+            pool_usable_resources=pool_usable_resources,
+            placeholder_pods=placeholder_pods,
+            unschedulable_nodes=set(),
+        )
+        # No per-node pod lists or node reads, only the deployment apply.
+        assert not [
+            path
+            for _, path, *_ in apiserver.request_log
+            if "/pods" in path or "/nodes" in path
+        ]
+        stored = apiserver.store.get(
+            "deployments", PLACEHOLDER_NAMESPACE, "pool-0-placeholder"
+        )
+        assert 0 <= stored["spec"]["replicas"] <= 2
+
+    def test_failed_apply_retried_next_cycle(self, apiserver, tmp_path, monkeypatch):
+        stop = threading.Event()
+        health = _CountingHealth(stop)
+        # The cycle each apply was made in.
+        applied = []
+
+        def apply_failing_once(deployment, namespace):
+            applied.append(health.finished)
+            if len(applied) == 1:
+                return None
+            return apply_deployment(deployment, namespace)
+
+        monkeypatch.setattr(scaler, "apply_deployment", apply_failing_once)
+        thread = threading.Thread(
+            target=_run_loop, args=(_loop_args(tmp_path, "pool-0", 2), health)
+        )
+        thread.start()
+        try:
+            started = time.monotonic()
+            while health.finished < 4 and time.monotonic() - started < 20:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join(10)
+        assert health.finished >= 4
+        # Retried on the cycle after the failure, not at the next resync.
+        assert applied[:2] == [0, 1]
+        assert apiserver.store.get(
+            "deployments", PLACEHOLDER_NAMESPACE, "pool-0-placeholder"
+        )
+
+    def test_process_pool_calendar_override(self, apiserver):
+        _process(
+            "pool-1",
+            replicas=0,
+            replica_count_overrides={"pool-1": 4},
+            calendar_override_enabled=True,
+        )
+        stored = apiserver.store.get(
+            "deployments", PLACEHOLDER_NAMESPACE, "pool-1-placeholder"
+        )
+        assert stored["spec"]["replicas"] == 4
+
+    def test_process_pool_splits_replicas_by_shape(self, apiserver):
+        def relabel(name, instance_type):
+            node = apiserver.store.get("nodes", None, name)
+            node["metadata"]["labels"][INSTANCE_TYPE] = instance_type
+            apiserver.add_node(node)
+
+        def replicas(name):
+            stored = apiserver.store.get("deployments", PLACEHOLDER_NAMESPACE, name)
+            return stored["spec"]["replicas"]
+
+        pool_config = {
+            "nodeSelector": {POOL_LABEL_KEY: "pool-0"},
+            "resources": {"requests": {"memory": "1Gi"}},
+            "replicas": 0,
+            "shapes": {},
+        }
+        # node-00004 is pool-0's newest node, so the autoscaler's fallback.
+        relabel("node-00004", "e2-highmem-4")
+        _process(
+            "pool-0",
+            replicas=0,
+            pool_config=pool_config,
+            replica_count_overrides={"pool-0": 3},
+            calendar_override_enabled=True,
+        )
+        # The running placeholder on node-00000 stays; the rest go to the
+        # newest shape, and only nodes of that shape are selected.
+        assert replicas("pool-0-n2-highmem-8-placeholder") == 1
+        assert replicas("pool-0-e2-highmem-4-placeholder") == 2
+        # The pool-wide deployment never existed, so isn't created at 0.
+        assert (
+            apiserver.store.get(
+                "deployments", PLACEHOLDER_NAMESPACE, "pool-0-placeholder"
+            )
+            is None
+        )
+        stored = apiserver.store.get(
+            "deployments", PLACEHOLDER_NAMESPACE, "pool-0-e2-highmem-4-placeholder"
+        )
+        assert stored["spec"]["template"]["spec"]["nodeSelector"] == {
+            POOL_LABEL_KEY: "pool-0",
+            INSTANCE_TYPE: "e2-highmem-4",
+        }
+
+        relabel("node-00004", "n2-highmem-8")
+        _process(
+            "pool-0",
+            replicas=0,
+            pool_config=pool_config,
+            replica_count_overrides={"pool-0": 3},
+            calendar_override_enabled=True,
+        )
+        assert replicas("pool-0-n2-highmem-8-placeholder") == 3
+        assert replicas("pool-0-e2-highmem-4-placeholder") == 0
+
+    def test_process_pool_keeps_headroom_in_each_zone(self, apiserver):
+        def replicas(name):
+            stored = apiserver.store.get("deployments", PLACEHOLDER_NAMESPACE, name)
+            return stored["spec"]["replicas"]
+
+        pool_config = {
+            "nodeSelector": {POOL_LABEL_KEY: "pool-0"},
+            "resources": {"requests": {"memory": "1Gi"}},
+            "replicas": 0,
+            "zones": {"names": ["us-central1-f"]},
+        }
+        # pool-0 has one node in each of us-central1-a, -b and -c.
+        _process(
+            "pool-0",
+            replicas=0,
+            pool_config=pool_config,
+            replica_count_overrides={"pool-0": 2},
+            calendar_override_enabled=True,
+        )
+        for zone in ("a", "b", "c", "f"):
+            assert replicas(f"pool-0-us-central1-{zone}-placeholder") == 2
+        stored = apiserver.store.get(
+            "deployments", PLACEHOLDER_NAMESPACE, "pool-0-us-central1-f-placeholder"
+        )
+        assert stored["spec"]["template"]["spec"]["nodeSelector"] == {
+            POOL_LABEL_KEY: "pool-0",
+            ZONE_LABEL_KEY: "us-central1-f",
+        }
+
+        # A zone dropped from the config has its placeholders scaled down.
+        pool_config["zones"] = {}
+        _process(
+            "pool-0",
+            replicas=0,
+            pool_config=pool_config,
+            replica_count_overrides={"pool-0": 2},
+            calendar_override_enabled=True,
+        )
+        assert replicas("pool-0-us-central1-a-placeholder") == 2
+        assert replicas("pool-0-us-central1-f-placeholder") == 0
+
+    def test_unlisted_retired_deployments_are_a_failed_write(
+        self, apiserver, monkeypatch
+    ):
+        pool_config = {
+            "nodeSelector": {POOL_LABEL_KEY: "pool-0"},
+            "resources": {"requests": {"memory": "1Gi"}},
+            "replicas": 1,
+            "zones": {},
+        }
+        result = _process("pool-0", replicas=1, pool_config=pool_config)
+        assert not result["write_failed"]
+        monkeypatch.setattr(scaler, "get_pool_deployments", lambda *args: None)
+        result = _process("pool-0", replicas=1, pool_config=pool_config)
+        assert result["write_failed"]
+
+    def test_existing_pool_wide_deployment_scaled_down(self, apiserver):
+        _process(
+            "pool-1",
+            replicas=0,
+            replica_count_overrides={"pool-1": 2},
+            calendar_override_enabled=True,
+        )
+        _process(
+            "pool-1",
+            replicas=0,
+            pool_config={
+                "nodeSelector": {POOL_LABEL_KEY: "pool-1"},
+                "resources": {"requests": {"memory": "1Gi"}},
+                "replicas": 0,
+                "zones": {},
+            },
+        )
+        stored = apiserver.store.get(
+            "deployments", PLACEHOLDER_NAMESPACE, "pool-1-placeholder"
+        )
+        assert stored["spec"]["replicas"] == 0
+
+    def test_zone_reductions_count_only_that_zones_nodes(self, apiserver):
+        pool_config = {
+            "nodeSelector": {POOL_LABEL_KEY: "pool-0"},
+            "resources": {"requests": {"memory": "1Gi"}},
+            "replicas": 1,
+            "zones": {"names": ["us-central1-f"]},
+        }
+        _process("pool-0", replicas=1, pool_config=pool_config)
+        # Free nodes in the other zones don't take us-central1-f's headroom.
+        stored = apiserver.store.get(
+            "deployments", PLACEHOLDER_NAMESPACE, "pool-0-us-central1-f-placeholder"
+        )
+        assert stored["spec"]["replicas"] == 1
+
+
+class TestLeaderElection:
+    def test_single_leader_and_handover(self, apiserver):
+        electors = [
+            LeaderElector(
+                _get_coordination_v1_client(),
+                "scaler",
+                PLACEHOLDER_NAMESPACE,
+                identity,
+            )
+            for identity in ("a", "b")
+        ]
+        for elector in electors:
+            elector.step()
+        assert [e.is_leader for e in electors] == [True, False]
+
+        electors[0].stop()
+        electors[1].step()
+        assert [e.is_leader for e in electors] == [False, True]
+        lease = apiserver.store.get("leases", PLACEHOLDER_NAMESPACE, "scaler")
+        assert lease["spec"]["holderIdentity"] == "b"
+
+    def test_stale_lease_update_conflicts(self, apiserver):
+        api = _get_coordination_v1_client()
+        LeaderElector(api, "scaler", PLACEHOLDER_NAMESPACE, "a").step()
+        lease = api.read_namespaced_lease("scaler", PLACEHOLDER_NAMESPACE)
+        api.replace_namespaced_lease("scaler", PLACEHOLDER_NAMESPACE, lease)
+        with pytest.raises(client.exceptions.ApiException) as e:
+            api.replace_namespaced_lease("scaler", PLACEHOLDER_NAMESPACE, lease)
+        assert e.value.status == 409
+
+
+class TestMultiCluster:
+    @pytest.fixture
+    def other_cluster(self, apiserver, tmp_path):
+        cluster = make_cluster(ClusterSpec(nodes=3, pools=3))
+        with FakeApiServer(cluster) as server:
+            kubeconfig = server.write_kubeconfig(tmp_path / "other-kubeconfig")
+            yield config.new_client_from_config(config_file=str(kubeconfig))
+
+    def test_use_cluster_routes_calls(self, other_cluster):
+        with use_cluster(other_cluster):
+            assert set(get_usable_resources()) == {"pool-0", "pool-1", "pool-2"}
+        assert set(get_usable_resources()) == {"pool-0", "pool-1"}
+
+    def test_clusters_in_threads_stay_apart(self, other_cluster):
+        results = {}
+
+        def read(name, api_client):
+            with use_cluster(api_client):
+                for _ in range(5):
+                    results.setdefault(name, set()).update(get_usable_resources())
+
+        threads = [
+            threading.Thread(target=read, args=("default", None)),
+            threading.Thread(target=read, args=("other", other_cluster)),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        assert results == {
+            "default": {"pool-0", "pool-1"},
+            "other": {"pool-0", "pool-1", "pool-2"},
+        }
+
+    def test_failing_cluster_does_not_stop_the_others(self, apiserver, tmp_path):
+        # A cluster whose apiserver has gone away: every call fails.
+        with FakeApiServer(make_cluster(ClusterSpec(nodes=3, pools=1))) as down:
+            kubeconfig = down.write_kubeconfig(tmp_path / "down-kubeconfig")
+        down_client = config.new_client_from_config(config_file=str(kubeconfig))
+
+        args = _loop_args(tmp_path, "pool-0", 1)
+        stop = threading.Event()
+        healths = {name: _CountingHealth(stop) for name in ("up", "down")}
+        threads = [
+            threading.Thread(
+                target=_run_loop,
+                args=(args, healths[name]),
+                kwargs=dict(name=name, api_client=api_client),
+                daemon=True,
+            )
+            for name, api_client in (("up", None), ("down", down_client))
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            started = time.monotonic()
+            while time.monotonic() - started < 20 and (
+                healths["up"].finished < 3 or time.monotonic() - started < 2
+            ):
+                time.sleep(0.05)
+            # Nothing for the shared Watchdog to exit the process over.
+            stalled_for = HealthGroup(healths).stalled_for()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join(10)
+        assert healths["up"].finished >= 3
+        assert healths["down"].finished == 0
+        assert stalled_for == 0
+        assert all(not thread.is_alive() for thread in threads)
+        # The failing cluster's loop is still alive, just not ready.
+        assert healths["down"].live()[0]
+        ok, reason = healths["down"].ready()
+        assert not ok and reason.startswith("last cycle failed")
+        assert apiserver.store.get(
+            "deployments", PLACEHOLDER_NAMESPACE, "pool-0-placeholder"
+        )
+
+    def test_recordings_go_in_a_directory_per_cluster(self, apiserver, tmp_path):
+        # Where the chart mounts the recording volume.
+        record_dir = tmp_path / "recordings"
+        record_dir.mkdir()
+        args = _loop_args(tmp_path, "pool-0", 1, f"--record-dir={record_dir}")
+        stop = threading.Event()
+        health = _CountingHealth(stop)
+        thread = threading.Thread(
+            target=_run_loop, args=(args, health), kwargs=dict(name="east")
+        )
+        thread.start()
+        try:
+            started = time.monotonic()
+            while health.finished < 1 and time.monotonic() - started < 20:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join(10)
+        assert health.finished >= 1
+        assert [p.name for p in tmp_path.iterdir() if "recordings" in p.name] == [
+            "recordings"
+        ]
+        assert (record_dir / "east").is_dir()
+
+    def test_failed_setup_is_retried(self, apiserver, tmp_path):
+        # A recording directory that can't be created.
+        blocker = tmp_path / "recordings"
+        blocker.write_text("")
+        args = _loop_args(tmp_path, "pool-0", 1, f"--record-dir={blocker}")
+        stop = threading.Event()
+        health = _CountingHealth(stop)
+        thread = threading.Thread(
+            target=_run_loop, args=(args, health), kwargs=dict(name="east")
+        )
+        thread.start()
+        try:
+            started = time.monotonic()
+            while time.monotonic() - started < 1:
+                time.sleep(0.05)
+            ok, reason = health.ready()
+            assert thread.is_alive()
+            assert not ok and reason.startswith("last cycle failed")
+            # Once the directory can be created, cycles go through.
+            blocker.unlink()
+            started = time.monotonic()
+            while health.finished < 1 and time.monotonic() - started < 20:
+                time.sleep(0.05)
+        finally:
+            stop.set()
+            thread.join(10)
+        assert health.finished >= 1
+        assert (blocker / "east").is_dir()
+
+
+class TestShutdown:
+    def test_sigterm_flushes_recordings(self, apiserver, tmp_path):
+        record_dir = tmp_path / "recordings"
+        env = dict(os.environ, KUBECONFIG=str(tmp_path / "kubeconfig"))
+        env.pop("KUBERNETES_SERVICE_HOST", None)
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "scaler",
+                *_loop_argv(tmp_path, "pool-0", 1, f"--record-dir={record_dir}"),
+            ],
+            cwd=Path(__file__).parent.parent,
+            env=env,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            # Far fewer cycles than a chunk, so nothing is on disk yet.
+            for line in proc.stderr:
+                if "Next cycle in" in line:
+                    break
+            proc.send_signal(signal.SIGTERM)
+            proc.communicate(timeout=20)
+        finally:
+            proc.kill()
+        assert proc.returncode == 0
+        _, pools = load_columns(record_dir)
+        assert pools["pool"][:1] == ["pool-0"]
@@ -0,0 +1,170 @@
+"""
+Tests for scaler/forecast.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_forecast.py
+"""
+
+import calendar
+import json
+import time
+
+import pytest
+from scaler.forecast import WEEK_SECONDS, ArrivalForecaster, validate_forecast
+
+# Monday 2025-09-01 00:00 UTC
+MONDAY = calendar.timegm((2025, 9, 1, 0, 0, 0))
+LAB = MONDAY + 10 * 3600  # Monday 10:00
+
+POOL_CONFIGS = {
+    "user-pool": {
+        "nodeSelector": {"hub.jupyter.org/pool-name": "pool-a"},
+        "replicas": 0,
+        "forecast": {"usersPerNode": 10},
+    },
+    "other-pool": {
+        "nodeSelector": {"hub.jupyter.org/pool-name": "pool-b"},
+        "replicas": 0,
+    },
+}
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _forecaster(path=None, **kwargs):
+    return ArrivalForecaster(path, localtime=time.gmtime, **kwargs)
+
+
+def _observe_weeks(forecaster, weeks, arrivals_at_lab=30):
+    """Poll once a minute through the 10:00-10:30 lab for several Mondays."""
+    for week in range(weeks):
+        start = LAB + week * WEEK_SECONDS - 15 * 60
+        for minute in range(60):
+            now = start + minute * 60
+            in_lab = LAB + week * WEEK_SECONDS <= now < LAB + week * WEEK_SECONDS + 900
+            arrivals = {"pool-a": arrivals_at_lab // 15} if in_lab else {}
+            forecaster.observe(arrivals, now)
+
+
+# ---------------------------------------------------------------------------
+# ArrivalForecaster
+# ---------------------------------------------------------------------------
+
+
+class TestArrivalForecaster:
+    def test_slots(self):
+        forecaster = _forecaster()
+        assert forecaster.slots == 672
+        assert forecaster.slot_of(MONDAY) == 0
+        assert forecaster.slot_of(LAB) == 40
+        assert forecaster.slot_of(MONDAY + WEEK_SECONDS - 1) == 671
+
+    def test_bucket_must_divide_day(self):
+        with pytest.raises(ValueError):
+            _forecaster(bucket_minutes=7)
+
+    def test_needs_min_observations(self):
+        forecaster = _forecaster()
+        _observe_weeks(forecaster, 1)
+        assert forecaster.expected_arrivals("pool-a", LAB + WEEK_SECONDS - 60) == 0
+
+    def test_learns_weekly_surge(self):
+        forecaster = _forecaster()
+        _observe_weeks(forecaster, 2)
+        before_lab = LAB + 2 * WEEK_SECONDS - 600
+        # The next 20 minutes overlap the first 10 minutes of the lab slot.
+        assert forecaster.expected_arrivals("pool-a", before_lab) == pytest.approx(20)
+        # Tuesday at the same time is quiet.
+        assert forecaster.expected_arrivals("pool-a", before_lab + 86400) == 0
+
+    def test_replica_floors(self):
+        forecaster = _forecaster()
+        _observe_weeks(forecaster, 2)
+        floors = forecaster.replica_floors(
+            POOL_CONFIGS, "hub.jupyter.org/pool-name", LAB + 2 * WEEK_SECONDS
+        )
+        assert floors == {"user-pool": 3}
+
+    def test_max_replicas_caps_floor(self):
+        forecaster = _forecaster()
+        _observe_weeks(forecaster, 2)
+        configs = {"user-pool": dict(POOL_CONFIGS["user-pool"])}
+        configs["user-pool"]["forecast"] = {"usersPerNode": 10, "maxReplicas": 1}
+        floors = forecaster.replica_floors(
+            configs, "hub.jupyter.org/pool-name", LAB + 2 * WEEK_SECONDS
+        )
+        assert floors == {"user-pool": 1}
+
+    def test_average_follows_recent_weeks(self):
+        forecaster = _forecaster(alpha=0.5)
+        _observe_weeks(forecaster, 2, arrivals_at_lab=30)
+        slot = forecaster.slot_of(LAB)
+        assert forecaster.history["pool-a"]["mean"][slot] == 30
+        for week in range(2, 4):
+            for minute in range(-15, 45):
+                now = LAB + week * WEEK_SECONDS + minute * 60
+                forecaster.observe({"pool-a": 0}, now)
+        assert forecaster.history["pool-a"]["mean"][slot] == 7.5
+
+    def test_gap_in_polling_is_not_recorded(self):
+        forecaster = _forecaster()
+        forecaster.observe({}, LAB - 60)
+        forecaster.observe({"pool-a": 5}, LAB)
+        # Scaler down for an hour: the 10:00 bucket is incomplete.
+        forecaster.observe({}, LAB + 3600)
+        forecaster.observe({}, LAB + 4500)
+        assert "pool-a" not in forecaster.history
+
+    def test_history_persisted(self, tmp_path):
+        path = tmp_path / "history.json"
+        forecaster = _forecaster(path)
+        _observe_weeks(forecaster, 2)
+        data = json.loads(path.read_text())
+        assert data["bucket_seconds"] == 900
+        restored = _forecaster(path)
+        assert restored.expected_arrivals(
+            "pool-a", LAB + 2 * WEEK_SECONDS
+        ) == forecaster.expected_arrivals("pool-a", LAB + 2 * WEEK_SECONDS)
+
+    def test_unwritable_history_does_not_stop_observing(self, tmp_path):
+        # The directory doesn't exist, so every save fails.
+        forecaster = _forecaster(tmp_path / "missing" / "history.json")
+        _observe_weeks(forecaster, 2)
+        assert forecaster.expected_arrivals("pool-a", LAB + 2 * WEEK_SECONDS) > 0
+
+    def test_history_with_other_bucket_size_ignored(self, tmp_path):
+        path = tmp_path / "history.json"
+        _observe_weeks(_forecaster(path), 2)
+        assert _forecaster(path, bucket_minutes=30).history == {}
+
+
+# ---------------------------------------------------------------------------
+# validate_forecast
+# ---------------------------------------------------------------------------
+
+
+class TestValidateForecast:
+    def test_valid(self):
+        validate_forecast("user-pool", {})
+        validate_forecast("user-pool", {"forecast": {"usersPerNode": 10}})
+        validate_forecast(
+            "user-pool", {"forecast": {"usersPerNode": 10, "maxReplicas": 3}}
+        )
+
+    @pytest.mark.parametrize(
+        "forecast",
+        [
+            [],
+            {},
+            {"usersPerNode": 0},
+            {"usersPerNode": 2.5},
+            {"usersPerNode": True},
+            {"usersPerNode": 10, "maxReplicas": 0},
+            {"usersPerNode": 10, "maxReplicas": "3"},
+        ],
+    )
+    def test_invalid(self, forecast):
+        with pytest.raises(ValueError, match="user-pool"):
+            validate_forecast("user-pool", {"forecast": forecast})
@@ -0,0 +1,57 @@
+"""
+Tests for scaler/grace_state.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_grace_state.py
+"""
+
+from scaler.grace_state import GraceStateFile
+
+
+class _Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+# ---------------------------------------------------------------------------
+# GraceStateFile
+# ---------------------------------------------------------------------------
+
+
+class TestGraceStateFile:
+    def test_missing_file_is_empty(self, tmp_path):
+        state = GraceStateFile(str(tmp_path / "grace.json"))
+        assert state.load() == ({}, {})
+
+    def test_survives_restart(self, tmp_path):
+        path = str(tmp_path / "grace.json")
+        # First process: perf_counter 100 at wall-clock 10000.
+        wall = _Clock(10000.0)
+        before = GraceStateFile(path, clock=_Clock(100.0), wall_clock=wall)
+        before.save({"node-1": 40.0}, {"node-1": 90.0})
+
+        # Restarted 30s later, with a perf_counter starting from 5.
+        wall.now = 10030.0
+        after = GraceStateFile(path, clock=_Clock(5.0), wall_clock=wall)
+        first_seen, last_above = after.load()
+        # Seen 90s before the restart, above the threshold 40s before it.
+        assert first_seen == {"node-1": 5.0 - 90}
+        assert last_above == {"node-1": 5.0 - 40}
+
+    def test_unchanged_state_not_rewritten(self, tmp_path):
+        path = tmp_path / "grace.json"
+        state = GraceStateFile(str(path), clock=_Clock(0.0), wall_clock=_Clock(0.0))
+        state.save({"node-1": 0.0}, {})
+        path.unlink()
+        state.save({"node-1": 0.0}, {})
+        assert not path.exists()
+        state.save({"node-1": 0.0, "node-2": 0.0}, {})
+        assert path.exists()
+
+    def test_corrupt_file_is_ignored(self, tmp_path):
+        path = tmp_path / "grace.json"
+        path.write_text("{not json")
+        assert GraceStateFile(str(path)).load() == ({}, {})
@@ -0,0 +1,167 @@
+"""
+Tests for scaler/health.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_health.py
+"""
+
+import urllib.error
+import urllib.request
+
+import pytest
+from scaler.health import Health, HealthGroup, Watchdog, serve_health
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _health(clock):
+    return Health(stall_after=300, max_sleep=60, clock=clock)
+
+
+# ---------------------------------------------------------------------------
+# Health
+# ---------------------------------------------------------------------------
+
+
+class TestHealth:
+    def test_live_through_normal_cycles(self):
+        clock = FakeClock()
+        health = _health(clock)
+        assert health.live()[0]
+        health.cycle_started()
+        clock.now = 10
+        health.cycle_finished()
+        clock.now = 70
+        assert health.live()[0]
+
+    def test_stuck_cycle(self):
+        clock = FakeClock()
+        health = _health(clock)
+        health.cycle_started()
+        clock.now = 301
+        ok, reason = health.live()
+        assert not ok
+        assert reason == "cycle running for 301s"
+        assert health.stalled_for() == 1
+
+    def test_loop_not_running(self):
+        clock = FakeClock()
+        health = _health(clock)
+        health.cycle_started()
+        health.cycle_finished()
+        clock.now = 361
+        assert not health.live()[0]
+
+    def test_ready_after_sync(self):
+        clock = FakeClock()
+        health = _health(clock)
+        assert health.ready() == (False, "cluster state not read yet")
+        health.cluster_synced()
+        assert health.ready()[0]
+        clock.now = 361
+        assert not health.ready()[0]
+
+    def test_failed_cycle_is_live_but_not_ready(self):
+        clock = FakeClock()
+        health = _health(clock)
+        health.cycle_started()
+        health.cluster_synced()
+        health.cycle_failed("ApiException")
+        clock.now = 30
+        assert health.live() == (True, "ok")
+        assert health.ready() == (False, "last cycle failed: ApiException")
+        health.cycle_started()
+        health.cluster_synced()
+        health.cycle_finished()
+        assert health.ready() == (True, "ok")
+
+
+class TestWatchdog:
+    def test_exits_when_stuck(self):
+        clock = FakeClock()
+        health = _health(clock)
+        exits = []
+        watchdog = Watchdog(health, exit_process=exits.append)
+        health.cycle_started()
+        watchdog.check()
+        assert exits == []
+        clock.now = 301
+        watchdog.check()
+        assert exits == [1]
+
+
+class TestHealthGroup:
+    def test_fails_with_failing_cluster_named(self):
+        clock = FakeClock()
+        a, b = _health(clock), _health(clock)
+        group = HealthGroup({"east": a, "west": b})
+        a.cluster_synced()
+        assert group.ready() == (False, "west: cluster state not read yet")
+        b.cluster_synced()
+        assert group.ready() == (True, "ok")
+
+    def test_watchdog_exits_when_any_cluster_stuck(self):
+        clock = FakeClock()
+        a, b = _health(clock), _health(clock)
+        exits = []
+        watchdog = Watchdog(
+            HealthGroup({"east": a, "west": b}), exit_process=exits.append
+        )
+        b.cycle_started()
+        clock.now = 301
+        assert not HealthGroup({"east": a, "west": b}).live()[0]
+        watchdog.check()
+        assert exits == [1]
+
+
+# ---------------------------------------------------------------------------
+# HTTP endpoints
+# ---------------------------------------------------------------------------
+
+
+class TestServeHealth:
+    @pytest.fixture
+    def server(self):
+        clock = FakeClock()
+        health = _health(clock)
+        server = serve_health(health, 0, host="127.0.0.1")
+        yield server, health, clock
+        server.shutdown()
+        server.server_close()
+
+    def _get(self, server, path):
+        url = f"http://127.0.0.1:{server.server_address[1]}{path}"
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                return response.status, response.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode()
+
+    def test_endpoints(self, server):
+        server, health, clock = server
+        assert self._get(server, "/healthz") == (200, "ok\n")
+        assert self._get(server, "/readyz") == (503, "cluster state not read yet\n")
+        health.cluster_synced()
+        assert self._get(server, "/readyz") == (200, "ok\n")
+        assert self._get(server, "/metrics")[0] == 404
+
+    def test_metrics(self):
+        health = _health(FakeClock())
+        server = serve_health(
+            health, 0, host="127.0.0.1", metrics=lambda: "some_metric 1\n"
+        )
+        try:
+            assert self._get(server, "/metrics") == (200, "some_metric 1\n")
+        finally:
+            server.shutdown()
+            server.server_close()
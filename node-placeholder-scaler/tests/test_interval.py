@@ -0,0 +1,49 @@
+"""
+Tests for scaler/interval.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_interval.py
+"""
+
+import pytest
+from scaler.interval import AdaptiveInterval
+
+
+def _interval(jitter=0.0, rand=lambda: 0.5):
+    return AdaptiveInterval(
+        base=60, min_interval=15, max_interval=300, jitter=jitter, rand=rand
+    )
+
+
+class TestAdaptiveInterval:
+    def test_quiet_backs_off_to_cap(self):
+        interval = _interval()
+        assert [interval.next(False) for _ in range(5)] == [60, 120, 240, 300, 300]
+
+    def test_busy_uses_min_and_resets_backoff(self):
+        interval = _interval()
+        interval.next(False)
+        interval.next(False)
+        assert interval.next(True) == 15
+        assert interval.next(False) == 60
+
+    def test_failures_back_off_from_min_and_reset(self):
+        interval = _interval()
+        assert [interval.after_failure() for _ in range(6)] == [
+            15,
+            30,
+            60,
+            120,
+            240,
+            300,
+        ]
+        assert interval.next(True) == 15
+        assert interval.after_failure() == 15
+
+    def test_jitter_bounds(self):
+        assert _interval(jitter=0.1, rand=lambda: 0.0).next(False) == pytest.approx(54)
+        assert _interval(jitter=0.1, rand=lambda: 1.0).next(False) == pytest.approx(66)
+
+    def test_invalid_bounds(self):
+        with pytest.raises(ValueError):
+            AdaptiveInterval(base=10, min_interval=15)
@@ -0,0 +1,192 @@
+"""
+Tests for scaler/leader.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_leader.py
+"""
+
+import datetime
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from kubernetes import client
+from kubernetes.client.exceptions import ApiException
+from scaler.leader import LeaderElector
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeLeaseApi:
+    """CoordinationV1Api stand-in holding a single Lease in memory."""
+
+    def __init__(self):
+        self.lease = None
+        self.version = 0
+        self.fail_reads = False
+
+    def read_namespaced_lease(self, name, namespace):
+        if self.fail_reads:
+            raise ApiException(status=500)
+        if self.lease is None:
+            raise ApiException(status=404)
+        return client.ApiClient().deserialize(_Response(self.lease), "V1Lease")
+
+    def create_namespaced_lease(self, namespace, body):
+        if self.lease is not None:
+            raise ApiException(status=409)
+        self._store(body)
+
+    def replace_namespaced_lease(self, name, namespace, body):
+        if body.metadata.resource_version != str(self.version):
+            raise ApiException(status=409)
+        self._store(body)
+
+    def _store(self, body):
+        self.version += 1
+        body.metadata.resource_version = str(self.version)
+        self.lease = json.dumps(client.ApiClient().sanitize_for_serialization(body))
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+def _elector(api, identity, clock, **kwargs):
+    return LeaderElector(
+        api,
+        name="scaler",
+        namespace="ns",
+        identity=identity,
+        lease_duration=15,
+        renew_deadline=10,
+        retry_period=2,
+        clock=clock,
+        **kwargs,
+    )
+
+
+def _holder(api):
+    return client.ApiClient().deserialize(_Response(api.lease), "V1Lease").spec
+
+
+# ---------------------------------------------------------------------------
+# LeaderElector
+# ---------------------------------------------------------------------------
+
+
+class TestLeaderElector:
+    def test_invalid_timings_rejected(self):
+        with pytest.raises(ValueError):
+            LeaderElector(
+                MagicMock(), "l", "ns", "a", lease_duration=10, renew_deadline=10
+            )
+
+    def test_first_replica_creates_lease_and_leads(self):
+        api, clock = FakeLeaseApi(), FakeClock()
+        started = MagicMock()
+        a = _elector(api, "a", clock, on_started_leading=started)
+        a.step()
+        assert a.is_leader
+        started.assert_called_once()
+        assert _holder(api).holder_identity == "a"
+
+    def test_second_replica_follows_while_lease_is_fresh(self):
+        api, clock = FakeLeaseApi(), FakeClock()
+        a, b = _elector(api, "a", clock), _elector(api, "b", clock)
+        a.step()
+        b.step()
+        clock.now += 10
+        a.step()
+        clock.now += 10
+        b.step()
+        assert a.is_leader
+        assert not b.is_leader
+
+    def test_follower_takes_over_after_lease_expires(self):
+        api, clock = FakeLeaseApi(), FakeClock()
+        a, b = _elector(api, "a", clock), _elector(api, "b", clock)
+        a.step()
+        b.step()
+        # "a" stops renewing; "b" must wait a full lease duration from when
+        # it last saw the lease change.
+        clock.now += 14
+        b.step()
+        assert not b.is_leader
+        clock.now += 2
+        b.step()
+        assert b.is_leader
+        spec = _holder(api)
+        assert spec.holder_identity == "b"
+        assert spec.lease_transitions == 1
+
+    def test_renewal_updates_renew_time(self):
+        api, clock = FakeLeaseApi(), FakeClock()
+        a = _elector(api, "a", clock)
+        a.step()
+        first = _holder(api).renew_time
+        a.step()
+        assert _holder(api).renew_time >= first
+        assert api.version == 2
+
+    def test_leader_steps_down_after_renew_deadline(self):
+        api, clock = FakeLeaseApi(), FakeClock()
+        stopped = MagicMock()
+        a = _elector(api, "a", clock, on_stopped_leading=stopped)
+        a.step()
+        api.fail_reads = True
+        clock.now += 5
+        a.step()
+        assert a.is_leader
+        clock.now += 5
+        a.step()
+        assert not a.is_leader
+        stopped.assert_called_once()
+
+    def test_release_allows_immediate_takeover(self):
+        api, clock = FakeLeaseApi(), FakeClock()
+        a, b = _elector(api, "a", clock), _elector(api, "b", clock)
+        a.step()
+        b.step()
+        a.stop()
+        assert not a.is_leader
+        b.step()
+        assert b.is_leader
+
+    def test_conflicting_update_loses(self):
+        """A stale resourceVersion (another replica wrote first) is not leadership."""
+        api, clock = FakeLeaseApi(), FakeClock()
+        a = _elector(api, "a", clock)
+        a.step()
+        real_replace = api.replace_namespaced_lease
+
+        def racing_replace(name, namespace, body):
+            api.version += 1  # someone else updated the lease meanwhile
+            return real_replace(name, namespace, body)
+
+        api.replace_namespaced_lease = racing_replace
+        assert a.try_acquire_or_renew() is False
+
+    def test_read_error_is_not_leadership(self):
+        api = FakeLeaseApi()
+        api.fail_reads = True
+        a = _elector(api, "a", FakeClock())
+        a.step()
+        assert not a.is_leader
+
+    def test_lease_times_are_timezone_aware(self):
+        api, clock = FakeLeaseApi(), FakeClock()
+        _elector(api, "a", clock).step()
+        assert _holder(api).renew_time.tzinfo is not None
+        assert isinstance(_holder(api).acquire_time, datetime.datetime)
@@ -0,0 +1,154 @@
+"""
+Tests for scaler/pressure.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_pressure.py
+"""
+
+import pytest
+from kubernetes import client
+from scaler.pressure import (
+    is_unschedulable,
+    pending_by_pool,
+    pod_pools,
+    update_pending_boost,
+    validate_pending_boost,
+)
+
+POOL_KEY = "hub.jupyter.org/pool-name"
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _pod(
+    phase="Pending",
+    reason="Unschedulable",
+    node_name=None,
+    node_selector=None,
+    affinity_pools=None,
+):
+    affinity = None
+    if affinity_pools is not None:
+        affinity = client.V1Affinity(
+            node_affinity=client.V1NodeAffinity(
+                required_during_scheduling_ignored_during_execution=client.V1NodeSelector(
+                    node_selector_terms=[
+                        client.V1NodeSelectorTerm(
+                            match_expressions=[
+                                client.V1NodeSelectorRequirement(
+                                    key=POOL_KEY, operator="In", values=affinity_pools
+                                )
+                            ]
+                        )
+                    ]
+                )
+            )
+        )
+    conditions = []
+    if reason is not None:
+        conditions.append(
+            client.V1PodCondition(type="PodScheduled", status="False", reason=reason)
+        )
+    return client.V1Pod(
+        spec=client.V1PodSpec(
+            containers=[],
+            node_name=node_name,
+            node_selector=node_selector,
+            affinity=affinity,
+        ),
+        status=client.V1PodStatus(phase=phase, conditions=conditions),
+    )
+
+
+_BOOST = {"usersPerNode": 10, "maxReplicas": 3, "cooldown": 300}
+
+# ---------------------------------------------------------------------------
+# Matching pending pods to pools
+# ---------------------------------------------------------------------------
+
+
+class TestIsUnschedulable:
+    def test_unschedulable(self):
+        assert is_unschedulable(_pod())
+
+    def test_not_yet_considered_by_scheduler(self):
+        assert not is_unschedulable(_pod(reason=None))
+
+    def test_scheduled_but_starting(self):
+        assert not is_unschedulable(_pod(node_name="node-1"))
+        assert not is_unschedulable(_pod(phase="Running"))
+
+
+class TestPodPools:
+    def test_node_selector(self):
+        assert pod_pools(_pod(node_selector={POOL_KEY: "pool-a"}), POOL_KEY) == {
+            "pool-a"
+        }
+
+    def test_required_affinity(self):
+        pod = _pod(affinity_pools=["pool-a", "pool-b"])
+        assert pod_pools(pod, POOL_KEY) == {"pool-a", "pool-b"}
+
+    def test_no_pool(self):
+        assert pod_pools(_pod(node_selector={"other": "x"}), POOL_KEY) == set()
+
+
+class TestPendingByPool:
+    def test_counts(self):
+        pods = [
+            _pod(node_selector={POOL_KEY: "pool-a"}),
+            _pod(node_selector={POOL_KEY: "pool-a"}),
+            _pod(affinity_pools=["pool-a", "pool-b"]),
+            _pod(node_selector={POOL_KEY: "pool-b"}, reason=None),
+        ]
+        assert pending_by_pool(pods, POOL_KEY) == {"pool-a": 3, "pool-b": 1}
+
+
+# ---------------------------------------------------------------------------
+# Boost
+# ---------------------------------------------------------------------------
+
+
+class TestValidatePendingBoost:
+    def test_absent_or_valid(self):
+        validate_pending_boost("pool-a", {})
+        validate_pending_boost("pool-a", {"pendingBoost": _BOOST})
+
+    @pytest.mark.parametrize(
+        "boost",
+        [
+            {"maxReplicas": 3},
+            {"usersPerNode": 0, "maxReplicas": 3},
+            {"usersPerNode": 10, "maxReplicas": 3, "cooldown": -1},
+        ],
+    )
+    def test_invalid(self, boost):
+        with pytest.raises(ValueError):
+            validate_pending_boost("pool-a", {"pendingBoost": boost})
+
+
+class TestUpdatePendingBoost:
+    def test_rounds_up_and_caps(self):
+        assert update_pending_boost("pool-a", _BOOST, 11, {}, 0.0) == 2
+        assert update_pending_boost("pool-a", _BOOST, 100, {}, 0.0) == 3
+
+    def test_no_pending_pods(self):
+        state = {}
+        assert update_pending_boost("pool-a", _BOOST, 0, state, 0.0) == 0
+        assert state == {}
+
+    def test_held_through_cooldown(self):
+        state = {}
+        assert update_pending_boost("pool-a", _BOOST, 25, state, 0.0) == 3
+        assert update_pending_boost("pool-a", _BOOST, 0, state, 299.0) == 3
+        assert update_pending_boost("pool-a", _BOOST, 0, state, 300.0) == 0
+        assert state == {}
+
+    def test_renewed_while_pods_stay_pending(self):
+        state = {}
+        update_pending_boost("pool-a", _BOOST, 25, state, 0.0)
+        update_pending_boost("pool-a", _BOOST, 25, state, 200.0)
+        assert update_pending_boost("pool-a", _BOOST, 5, state, 400.0) == 3
+        assert update_pending_boost("pool-a", _BOOST, 5, state, 500.0) == 1
@@ -0,0 +1,122 @@
+"""
+Tests for scaler/reconcile.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_reconcile.py
+"""
+
+from scaler.reconcile import DirtyPools, fingerprint
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+class _Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _processed(pools, now, fp="a", first_seen=None, last_above=None, grace=600):
+    pools.processed(
+        "pool-a",
+        fp,
+        {"replicas": 1},
+        now,
+        {"node-1": {}, "node-2": {}},
+        first_seen if first_seen is not None else {},
+        last_above if last_above is not None else {},
+        grace,
+    )
+
+
+# ---------------------------------------------------------------------------
+# fingerprint
+# ---------------------------------------------------------------------------
+
+
+class TestFingerprint:
+    def test_order_independent(self):
+        assert fingerprint({"a": 1, "b": {2, 1}}) == fingerprint({"b": {1, 2}, "a": 1})
+
+    def test_changes_with_input(self):
+        assert fingerprint({"node-1": 100}) != fingerprint({"node-1": 200})
+
+
+# ---------------------------------------------------------------------------
+# DirtyPools
+# ---------------------------------------------------------------------------
+
+
+class TestDirtyPools:
+    def test_unknown_pool_is_dirty(self):
+        pools = DirtyPools(clock=_Clock())
+        now = pools.start_cycle()
+        assert pools.is_dirty("pool-a", "a", now)
+
+    def test_unchanged_pool_is_clean(self):
+        clock = _Clock()
+        pools = DirtyPools(clock=clock)
+        _processed(pools, pools.start_cycle())
+        clock.now = 60.0
+        now = pools.start_cycle()
+        assert not pools.is_dirty("pool-a", "a", now)
+        assert pools.is_dirty("pool-a", "b", now)
+
+    def test_grace_expiry_makes_pool_dirty(self):
+        clock = _Clock()
+        pools = DirtyPools(resync_interval=3600, clock=clock)
+        # node-1 is new at 0; node-2 is busy at 0.
+        _processed(
+            pools,
+            pools.start_cycle(),
+            first_seen={"node-1": 0.0, "node-2": 0.0},
+            last_above={"node-2": 0.0},
+        )
+        clock.now = 599.0
+        assert not pools.is_dirty("pool-a", "a", pools.start_cycle())
+        clock.now = 600.0
+        assert pools.is_dirty("pool-a", "a", pools.start_cycle())
+
+    def test_busy_nodes_do_not_expire(self):
+        clock = _Clock()
+        pools = DirtyPools(resync_interval=3600, clock=clock)
+        _processed(pools, pools.start_cycle(), last_above={"node-1": 0.0})
+        clock.now = 1200.0
+        assert not pools.is_dirty("pool-a", "a", pools.start_cycle())
+
+    def test_skip_refreshes_busy_nodes(self):
+        clock = _Clock()
+        pools = DirtyPools(clock=clock)
+        last_above = {"node-1": 0.0, "node-2": -100.0}
+        _processed(pools, pools.start_cycle(), last_above=last_above)
+        clock.now = 60.0
+        assert pools.skip("pool-a", pools.start_cycle(), last_above) == {"replicas": 1}
+        assert last_above == {"node-1": 60.0, "node-2": -100.0}
+
+    def test_periodic_resync(self):
+        clock = _Clock()
+        pools = DirtyPools(resync_interval=600, clock=clock)
+        _processed(pools, pools.start_cycle())
+        clock.now = 600.0
+        assert pools.is_dirty("pool-a", "a", pools.start_cycle())
+
+    def test_invalidate(self):
+        pools = DirtyPools(clock=_Clock())
+        now = pools.start_cycle()
+        _processed(pools, now)
+        pools.invalidate()
+        assert pools.is_dirty("pool-a", "a", now)
+
+    def test_forget_one_pool(self):
+        pools = DirtyPools(clock=_Clock())
+        now = pools.start_cycle()
+        _processed(pools, now)
+        pools.processed("pool-b", "b", {"replicas": 1}, now, {}, {}, {}, 600)
+        pools.forget("pool-a")
+        assert pools.is_dirty("pool-a", "a", now)
+        assert not pools.is_dirty("pool-b", "b", now)
+        pools.forget("pool-c")
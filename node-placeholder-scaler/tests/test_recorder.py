@@ -0,0 +1,146 @@
+"""
+Tests for scaler/recorder.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_recorder.py
+"""
+
+import json
+
+from scaler.recorder import Recorder, iter_cycles, load_columns
+from scaler.scaler import node_usable_resources
+from scaler.simulate import load_snapshots
+
+T0 = 1_756_800_000  # 2025-09-02 08:00:00 UTC
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _usable(nodes=50, mem_requested_mi=1000):
+    return {
+        "pool-a": {
+            f"node-{i:03d}": node_usable_resources(
+                "pool-a", 7910, 500 + i, 59000, mem_requested_mi
+            )
+            for i in range(nodes)
+        }
+    }
+
+
+def _pool_results(replicas=1):
+    return {
+        "user-pool": {
+            "replicas": replicas,
+            "placeholder_nodes": {"node-000"},
+            "unschedulable_nodes": {"node-001"},
+        }
+    }
+
+
+def _record(recorder, cycles, start=T0, **kwargs):
+    for i in range(cycles):
+        recorder.record(
+            start + 60 * i,
+            _usable(**kwargs),
+            _pool_results(replicas=i % 3),
+            {"user-pool": 2} if i % 2 else {},
+        )
+
+
+# ---------------------------------------------------------------------------
+# Recorder
+# ---------------------------------------------------------------------------
+
+
+class TestRecorder:
+    def test_round_trip(self, tmp_path):
+        recorder = Recorder(tmp_path, chunk_cycles=4)
+        _record(recorder, 10)
+        recorder.close()
+
+        cycles = list(iter_cycles(tmp_path))
+        assert [c["time"] for c in cycles] == [T0 + 60 * i for i in range(10)]
+        first = cycles[0]
+        assert len(first["nodes"]) == 50
+        assert first["nodes"]["node-007"] == {
+            "pool": "pool-a",
+            "cpu_alloc_m": 7910,
+            "cpu_requested_m": 507,
+            "mem_alloc_mi": 59000,
+            "mem_requested_mi": 1000,
+            "unschedulable": False,
+            "placeholder": False,
+        }
+        assert first["nodes"]["node-000"]["placeholder"] is True
+        assert first["nodes"]["node-001"]["unschedulable"] is True
+        assert first["pools"] == {"user-pool": {"override": None, "replicas": 0}}
+        assert cycles[1]["pools"] == {"user-pool": {"override": 2, "replicas": 1}}
+
+    def test_much_smaller_than_json(self, tmp_path):
+        recorder = Recorder(tmp_path, chunk_cycles=60)
+        _record(recorder, 60, nodes=200)
+        recorder.close()
+        as_json = len(json.dumps(list(iter_cycles(tmp_path))))
+        on_disk = sum(p.stat().st_size for p in tmp_path.iterdir())
+        assert on_disk * 50 < as_json
+
+    def test_unflushed_cycles_not_visible(self, tmp_path):
+        recorder = Recorder(tmp_path, chunk_cycles=5)
+        _record(recorder, 7)
+        assert len(list(iter_cycles(tmp_path))) == 5
+        recorder.flush()
+        assert len(list(iter_cycles(tmp_path))) == 7
+
+    def test_time_window(self, tmp_path):
+        recorder = Recorder(tmp_path, chunk_cycles=4)
+        _record(recorder, 20)
+        recorder.close()
+        cycles = list(iter_cycles(tmp_path, start=T0 + 300, end=T0 + 600))
+        assert [c["time"] for c in cycles] == [T0 + 60 * i for i in range(5, 11)]
+
+    def test_load_columns(self, tmp_path):
+        recorder = Recorder(tmp_path, chunk_cycles=4)
+        _record(recorder, 6, nodes=3)
+        recorder.close()
+        nodes, pools = load_columns(tmp_path, end=T0 + 60)
+        assert len(nodes["time"]) == 6
+        assert set(nodes["node"]) == {"node-000", "node-001", "node-002"}
+        assert nodes["flags"].count(0) == 2
+        assert pools == {
+            "time": [T0, T0 + 60],
+            "pool": ["user-pool", "user-pool"],
+            "override": [-1, 2],
+            "replicas": [0, 1],
+        }
+
+    def test_rotation_drops_oldest_segments(self, tmp_path):
+        recorder = Recorder(
+            tmp_path, max_segment_bytes=1, max_segments=3, chunk_cycles=1
+        )
+        _record(recorder, 10)
+        recorder.close()
+        assert len(list(tmp_path.glob("*.rec"))) == 3
+        assert len(list(tmp_path.glob("*.idx"))) == 3
+        assert [c["time"] for c in iter_cycles(tmp_path)] == [
+            T0 + 60 * i for i in range(7, 10)
+        ]
+
+    def test_truncated_segment_is_tolerated(self, tmp_path):
+        recorder = Recorder(tmp_path, chunk_cycles=2)
+        _record(recorder, 6)
+        recorder.close()
+        segment = next(tmp_path.glob("*.rec"))
+        data = segment.read_bytes()
+        segment.write_bytes(data[:-10])
+        assert len(list(iter_cycles(tmp_path))) == 4
+
+    def test_replayable_by_simulate(self, tmp_path):
+        recorder = Recorder(tmp_path)
+        _record(recorder, 3)
+        recorder.close()
+        snapshots = load_snapshots(tmp_path)
+        assert len(snapshots) == 3
+        assert snapshots[1]["time"].timestamp() == T0 + 60
+        assert snapshots[0]["pending_user_pods"] == {}
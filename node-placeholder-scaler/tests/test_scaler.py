@@ -5,24 +5,35 @@ Run from node-placeholder-scaler/:
     pytest tests/test_scaler.py
 """
 
+import datetime
 from copy import deepcopy
 from unittest.mock import MagicMock, patch
 
+import pytest
 from kubernetes.client.exceptions import ApiException
 from kubernetes.config import ConfigException
 from scaler.scaler import (
+    _node_ready_since,
     any_placeholder_pod_pending,
+    apply_deployment,
     compute_replica_count,
     get_allocatable_resources_by_pool,
     get_node_pool_mapping,
+    get_pending_user_pods,
     get_replica_counts,
     get_requested_resources_by_pool,
     get_usable_resources,
+    get_user_pod_arrivals,
     is_unschedulable_node,
     make_deployment,
+    node_age,
+    node_is_free,
     placeholder_pod_running_on_node,
+    plan_pool,
     update_node_first_seen,
     update_node_last_above_threshold,
+    validate_pool_settings,
+    validate_scaling_resources,
 )
 
 # ---------------------------------------------------------------------------
@@ -55,7 +66,10 @@ def _alloc_node(name, cpu, memory):
     """Return a mock node with the given allocatable resources."""
     n = MagicMock()
     n.metadata.name = name
+    n.metadata.creation_timestamp = None
     n.status.allocatable = {"cpu": cpu, "memory": memory}
+    n.status.conditions = []
+    n.spec.unschedulable = None
     return n
 
 
@@ -131,6 +145,58 @@ class TestMakeDeployment:
         assert d["metadata"]["name"] == "gpu-pool-placeholder"
 
 
+# ---------------------------------------------------------------------------
+# apply_deployment
+# ---------------------------------------------------------------------------
+
+
+class TestApplyDeployment:
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.AppsV1Api")
+    def test_server_side_apply_request(self, mock_api_cls, mock_incluster, mock_kube):
+        mock_incluster.side_effect = ConfigException()
+        deployment = make_deployment("pool-a", _TEMPLATE, {}, {}, 2)
+        apply_deployment(deployment, "my-ns")
+        call = mock_api_cls.return_value.api_client.call_api.call_args
+        assert call.args == (
+            "/apis/apps/v1/namespaces/{namespace}/deployments/{name}",
+            "PATCH",
+        )
+        assert call.kwargs["path_params"] == {
+            "namespace": "my-ns",
+            "name": "pool-a-placeholder",
+        }
+        assert ("fieldManager", "node-placeholder-scaler") in call.kwargs[
+            "query_params"
+        ]
+        assert ("force", "true") in call.kwargs["query_params"]
+        assert (
+            call.kwargs["header_params"]["Content-Type"]
+            == "application/apply-patch+yaml"
+        )
+        assert call.kwargs["body"] is deployment
+
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.AppsV1Api")
+    def test_returns_applied_deployment(self, mock_api_cls, mock_incluster, mock_kube):
+        mock_incluster.side_effect = ConfigException()
+        applied = MagicMock()
+        mock_api_cls.return_value.api_client.call_api.return_value = applied
+        deployment = make_deployment("pool-a", _TEMPLATE, {}, {}, 1)
+        assert apply_deployment(deployment, "ns") is applied
+
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.AppsV1Api")
+    def test_api_error_returns_none(self, mock_api_cls, mock_incluster, mock_kube):
+        mock_incluster.side_effect = ConfigException()
+        mock_api_cls.return_value.api_client.call_api.side_effect = ApiException()
+        deployment = make_deployment("pool-a", _TEMPLATE, {}, {}, 1)
+        assert apply_deployment(deployment, "ns") is None
+
+
 # ---------------------------------------------------------------------------
 # get_replica_counts
 # ---------------------------------------------------------------------------
@@ -380,6 +446,23 @@ class TestGetAllocatableResourcesByPool:
         result = get_allocatable_resources_by_pool({"node-1": "pool-a"})
         assert result["pool-a"]["node-1"]["mem_mi"] == 0
 
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.CoreV1Api")
+    def test_extended_resources(self, mock_api_cls, mock_incluster, mock_kube):
+        mock_incluster.side_effect = ConfigException()
+        node = _alloc_node("node-1", "8", "32Gi")
+        node.status.allocatable.update(
+            {"nvidia.com/gpu": "4", "ephemeral-storage": "100Gi", "bad": "x"}
+        )
+        mock_api_cls.return_value.list_node.return_value.items = [node]
+        result = get_allocatable_resources_by_pool({"node-1": "pool-a"})
+        assert result["pool-a"]["node-1"]["extended"] == {
+            "nvidia.com/gpu": 4.0,
+            "ephemeral-storage": 100 * 1024**3,
+            "bad": 0.0,
+        }
+
 
 # ---------------------------------------------------------------------------
 # get_requested_resources_by_pool
@@ -432,6 +515,29 @@ class TestGetRequestedResourcesByPool:
         assert result["pool-a"]["node-1"]["cpu_m"] == 2000
         assert result["pool-a"]["node-1"]["mem_mi"] == 2048
 
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.CoreV1Api")
+    def test_daemonset_and_static_pods_are_overhead(
+        self, mock_api_cls, mock_incluster, mock_kube
+    ):
+        mock_incluster.side_effect = ConfigException()
+        daemonset = _pod("node-1", {"cpu": "100m", "memory": "128Mi"})
+        daemonset.metadata.owner_references = [MagicMock(kind="DaemonSet")]
+        static = _pod("node-1", {"cpu": "250m", "memory": "100Mi"})
+        static.metadata.annotations = {"kubernetes.io/config.mirror": "abc"}
+        user = _pod("node-1", {"cpu": "1", "memory": "1Gi"})
+        user.metadata.owner_references = None
+        user.metadata.annotations = None
+        mock_api_cls.return_value.list_pod_for_all_namespaces.return_value.items = [
+            daemonset,
+            static,
+            user,
+        ]
+        result = get_requested_resources_by_pool({"node-1": "pool-a"})
+        assert result["pool-a"]["node-1"]["overhead"] == {"cpu_m": 350, "mem_mi": 228}
+        assert result["pool-a"]["node-1"]["cpu_m"] == 1350
+
     @patch("scaler.scaler.config.load_kube_config")
     @patch("scaler.scaler.config.load_incluster_config")
     @patch("scaler.scaler.client.CoreV1Api")
@@ -481,6 +587,24 @@ class TestGetRequestedResourcesByPool:
         result = get_requested_resources_by_pool({"node-1": "pool-a"})
         assert result == {}
 
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.CoreV1Api")
+    def test_extended_resources_summed(self, mock_api_cls, mock_incluster, mock_kube):
+        mock_incluster.side_effect = ConfigException()
+        mock_api_cls.return_value.list_pod_for_all_namespaces.return_value.items = [
+            _pod(
+                "node-1", {"cpu": "1", "nvidia.com/gpu": "1"}, {"nvidia.com/gpu": "2"}
+            ),
+            _pod("node-1", {"ephemeral-storage": "10Gi"}),
+        ]
+        result = get_requested_resources_by_pool({"node-1": "pool-a"})
+        assert result["pool-a"]["node-1"]["cpu_m"] == 1000
+        assert result["pool-a"]["node-1"]["extended"] == {
+            "nvidia.com/gpu": 3.0,
+            "ephemeral-storage": 10 * 1024**3,
+        }
+
 
 # ---------------------------------------------------------------------------
 # get_usable_resources
@@ -628,6 +752,42 @@ class TestGetUsableResources:
         result = get_usable_resources()
         assert result["pool-a"]["node-1"]["mem_free_ratio"] == 0.0
 
+    @patch("scaler.scaler.get_requested_resources_by_pool")
+    @patch("scaler.scaler.get_allocatable_resources_by_pool")
+    @patch("scaler.scaler.get_node_pool_mapping")
+    def test_resources_by_name(self, mock_mapping, mock_alloc, mock_req):
+        mock_mapping.return_value = {"node-1": "pool-a"}
+        mock_alloc.return_value = {
+            "pool-a": {
+                "node-1": {
+                    "cpu_m": 4000,
+                    "mem_mi": 8192,
+                    "extended": {"nvidia.com/gpu": 4.0},
+                }
+            }
+        }
+        mock_req.return_value = {
+            "pool-a": {
+                "node-1": {
+                    "cpu_m": 1000,
+                    "mem_mi": 0,
+                    "extended": {"nvidia.com/gpu": 3.0, "example.com/dongle": 1.0},
+                }
+            }
+        }
+
+        resources = get_usable_resources()["pool-a"]["node-1"]["resources"]
+        assert resources["cpu"]["free_ratio"] == 0.75
+        assert resources["memory"]["free"] == 8192
+        assert resources["nvidia.com/gpu"] == {
+            "alloc": 4.0,
+            "requested": 3.0,
+            "free": 1.0,
+            "free_ratio": 0.25,
+        }
+        # Requested but not allocatable: never free.
+        assert resources["example.com/dongle"]["free_ratio"] == 0.0
+
 
 # ---------------------------------------------------------------------------
 # placeholder_pod_running_on_node
@@ -884,6 +1044,85 @@ class TestAnyPlaceholderPodPending:
         assert any_placeholder_pod_pending("ns", "app=ph", _NODE_SELECTOR) is True
 
 
+# ---------------------------------------------------------------------------
+# get_user_pod_arrivals
+# ---------------------------------------------------------------------------
+
+
+def _user_pod(created, node_selector=None, node_name=None):
+    p = MagicMock()
+    p.metadata.creation_timestamp = datetime.datetime.fromtimestamp(
+        created, datetime.timezone.utc
+    )
+    p.spec.node_selector = node_selector
+    p.spec.node_name = node_name
+    return p
+
+
+class TestGetPendingUserPods:
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.CoreV1Api")
+    def test_lists_pending_pods_only(self, mock_api_cls, mock_incluster, mock_kube):
+        mock_incluster.side_effect = ConfigException()
+        pods = [_user_pod(0, _NODE_SELECTOR)]
+        mock_api_cls.return_value.list_pod_for_all_namespaces.return_value.items = pods
+        assert get_pending_user_pods("component=singleuser-server") == pods
+        mock_api_cls.return_value.list_pod_for_all_namespaces.assert_called_once_with(
+            label_selector="component=singleuser-server",
+            field_selector="status.phase=Pending",
+        )
+
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.CoreV1Api")
+    def test_api_error(self, mock_api_cls, mock_incluster, mock_kube):
+        mock_incluster.side_effect = ConfigException()
+        mock_api_cls.return_value.list_pod_for_all_namespaces.side_effect = (
+            ApiException(status=500)
+        )
+        assert get_pending_user_pods("component=singleuser-server") == []
+
+
+class TestGetUserPodArrivals:
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.CoreV1Api")
+    def test_counts_pods_created_in_window_by_pool(
+        self, mock_api_cls, mock_incluster, mock_kube
+    ):
+        mock_incluster.side_effect = ConfigException()
+        mock_api_cls.return_value.list_pod_for_all_namespaces.return_value.items = [
+            _user_pod(50, _NODE_SELECTOR),
+            _user_pod(150, _NODE_SELECTOR),
+            _user_pod(200, _NODE_SELECTOR),
+            _user_pod(201, _NODE_SELECTOR),
+            _user_pod(160, None, node_name="node-b1"),
+            _user_pod(170, None, node_name=None),
+        ]
+        arrivals = get_user_pod_arrivals(
+            100,
+            200,
+            "component=singleuser-server",
+            "hub.jupyter.org/pool-name",
+            {"node-b1": "pool-b"},
+        )
+        assert arrivals == {"pool-a": 2, "pool-b": 1}
+        mock_api_cls.return_value.list_pod_for_all_namespaces.assert_called_once_with(
+            label_selector="component=singleuser-server"
+        )
+
+    @patch("scaler.scaler.config.load_kube_config")
+    @patch("scaler.scaler.config.load_incluster_config")
+    @patch("scaler.scaler.client.CoreV1Api")
+    def test_api_error_returns_empty(self, mock_api_cls, mock_incluster, mock_kube):
+        mock_incluster.side_effect = ConfigException()
+        mock_api_cls.return_value.list_pod_for_all_namespaces.side_effect = (
+            ApiException()
+        )
+        assert get_user_pod_arrivals(0, 1, "", "k", {}) == {}
+
+
 # ---------------------------------------------------------------------------
 # compute_replica_count
 # ---------------------------------------------------------------------------
@@ -936,6 +1175,90 @@ class TestComputeReplicaCount:
         """Without pending, result is never negative."""
         assert compute_replica_count(-1, 1, None, False) == 0
 
+    def test_forecast_is_a_floor(self):
+        assert compute_replica_count(0, 1, None, False, forecast_replica_count=2) == 2
+        assert compute_replica_count(3, 3, None, False, forecast_replica_count=2) == 3
+
+    def test_forecast_floor_applies_while_pending(self):
+        assert (
+            compute_replica_count(
+                0,
+                1,
+                None,
+                False,
+                has_pending_placeholder=True,
+                forecast_replica_count=2,
+            )
+            == 2
+        )
+
+    def test_calendar_override_beats_forecast(self):
+        assert compute_replica_count(0, 1, 0, True, forecast_replica_count=2) == 0
+
+    def test_pending_boost_added(self):
+        assert compute_replica_count(0, 1, None, False, pending_boost=2) == 2
+        assert (
+            compute_replica_count(
+                0, 1, None, False, forecast_replica_count=3, pending_boost=2
+            )
+            == 5
+        )
+
+    def test_calendar_override_beats_pending_boost(self):
+        assert compute_replica_count(0, 1, 1, True, pending_boost=2) == 1
+
+
+def _condition_node(conditions, created=None):
+    n = MagicMock()
+    n.metadata.creation_timestamp = created
+    n.status.conditions = [
+        MagicMock(type=t, status=status, last_transition_time=ts)
+        for t, status, ts in conditions
+    ]
+    return n
+
+
+_T0 = datetime.datetime(2025, 9, 1, 9, 0, tzinfo=datetime.timezone.utc)
+_T1 = datetime.datetime(2025, 9, 1, 9, 2, tzinfo=datetime.timezone.utc)
+
+
+class TestNodeReadySince:
+    def test_ready_transition_time(self):
+        node = _condition_node(
+            [("MemoryPressure", "False", _T0), ("Ready", "True", _T1)], _T0
+        )
+        assert _node_ready_since(node) == _T1.timestamp()
+
+    def test_not_ready(self):
+        node = _condition_node([("Ready", "Unknown", _T1)], _T0)
+        assert _node_ready_since(node) is None
+
+    def test_no_ready_condition_uses_creation(self):
+        assert _node_ready_since(_condition_node([], _T0)) == _T0.timestamp()
+
+    def test_no_timestamps(self):
+        assert _node_ready_since(_condition_node([])) is None
+
+
+class TestNodeAge:
+    def test_age_from_cluster(self):
+        first_seen = {}
+        # Scaler just started (now=5) but the node has been Ready for an hour.
+        assert node_age("node-a", 10000.0, first_seen, 5.0, 13600.0) == 3600.0
+        assert first_seen == {"node-a": 5.0 - 3600}
+
+    def test_overrides_observed_age(self):
+        first_seen = {"node-a": 0.0}
+        # Ready again after a reboot 60s ago.
+        assert node_age("node-a", 13540.0, first_seen, 1000.0, 13600.0) == 60.0
+
+    def test_fallback_to_observation(self):
+        first_seen = {"node-a": 100.0}
+        assert node_age("node-a", None, first_seen, 400.0, 13600.0) == 300.0
+
+    def test_clock_skew_not_negative(self):
+        assert node_age("node-a", 13700.0, {}, 5.0, 13600.0) == 0.0
+
 
 class TestUpdateNodeFirstSeen:
     def test_new_node_age_is_zero(self):
@@ -1050,3 +1373,239 @@ class TestUpdateNodeLastAboveThreshold:
         for t in [100.0, 500.0, 900.0, 1000.0]:
             update_node_last_above_threshold("node-a", d, now=t)
         assert d["node-a"] == 1000.0
+
+
+# ---------------------------------------------------------------------------
+# node_is_free / validate_scaling_resources
+# ---------------------------------------------------------------------------
+
+
+def _gpu_node(gpu_free_ratio, mem_free_ratio):
+    return {
+        "cpu_free_ratio": 0.9,
+        "mem_free_ratio": mem_free_ratio,
+        "resources": {
+            "cpu": {"free_ratio": 0.9},
+            "memory": {"free_ratio": mem_free_ratio},
+            "nvidia.com/gpu": {"free_ratio": gpu_free_ratio},
+        },
+    }
+
+
+class TestNodeIsFree:
+    def test_strategies(self):
+        node = _gpu_node(0.0, 0.1)
+        assert node_is_free(node, "cpu", 0.2, 0.2) is True
+        assert node_is_free(node, "mem", 0.2, 0.2) is False
+        assert node_is_free(node, "balanced", 0.2, 0.2) is False
+
+    def test_scaling_resources_replace_strategy(self):
+        rules = [{"name": "nvidia.com/gpu", "threshold": 0.4}]
+        assert node_is_free(_gpu_node(0.5, 0.0), "mem", 0.2, 0.2, rules) is True
+        assert node_is_free(_gpu_node(0.25, 0.9), "mem", 0.2, 0.2, rules) is False
+
+    def test_all_scaling_resources_must_be_free(self):
+        rules = [
+            {"name": "nvidia.com/gpu", "threshold": 0.4},
+            {"name": "memory", "threshold": 0.2},
+        ]
+        assert node_is_free(_gpu_node(0.5, 0.5), "cpu", 0, 0, rules) is True
+        assert node_is_free(_gpu_node(0.5, 0.1), "cpu", 0, 0, rules) is False
+
+    def test_missing_resource_is_not_free(self):
+        rules = [{"name": "ephemeral-storage", "threshold": 0.1}]
+        assert node_is_free(_gpu_node(1.0, 1.0), "cpu", 0, 0, rules) is False
+
+
+class TestValidateScalingResources:
+    def test_absent_is_valid(self):
+        validate_scaling_resources("pool-a", {"replicas": 1})
+
+    def test_valid(self):
+        validate_scaling_resources(
+            "pool-a", {"scalingResources": [{"name": "cpu", "threshold": 0}]}
+        )
+
+    @pytest.mark.parametrize(
+        "rules",
+        [
+            [],
+            {"name": "cpu", "threshold": 0.2},
+            [{"name": "cpu"}],
+            [{"threshold": 0.2}],
+            [{"name": "cpu", "threshold": "0.2"}],
+            [{"name": "cpu", "threshold": True}],
+        ],
+    )
+    def test_invalid(self, rules):
+        with pytest.raises(ValueError):
+            validate_scaling_resources("pool-a", {"scalingResources": rules})
+
+
+class TestValidatePoolSettings:
+    def test_absent_is_valid(self):
+        validate_pool_settings("pool-a", {"replicas": 1})
+
+    def test_valid(self):
+        validate_pool_settings(
+            "pool-a",
+            {
+                "strategy": "mem",
+                "cpuThreshold": 0,
+                "memoryThreshold": 0.4,
+                "nodeGracePeriod": 1800,
+            },
+        )
+
+    @pytest.mark.parametrize(
+        "settings",
+        [
+            {"strategy": "gpu"},
+            {"cpuThreshold": 1.5},
+            {"memoryThreshold": "0.2"},
+            {"memoryThreshold": True},
+            {"nodeGracePeriod": -1},
+            {"nodeGracePeriod": 60.5},
+        ],
+    )
+    def test_invalid(self, settings):
+        with pytest.raises(ValueError):
+            validate_pool_settings("pool-a", settings)
+
+
+# ---------------------------------------------------------------------------
+# plan_pool
+# ---------------------------------------------------------------------------
+
+
+def _usable(cpu_free_ratio, mem_free_ratio, cpu_alloc_m=8000, mem_alloc_mi=64000):
+    return {
+        "cpu_alloc_m": cpu_alloc_m,
+        "cpu_free_m": int(cpu_alloc_m * cpu_free_ratio),
+        "cpu_free_ratio": cpu_free_ratio,
+        "mem_alloc_mi": mem_alloc_mi,
+        "mem_free_mi": int(mem_alloc_mi * mem_free_ratio),
+        "mem_free_ratio": mem_free_ratio,
+    }
+
+
+def _plan(pool_usable_resources, **overrides):
+    kwargs = dict(
+        pool_name="pool-a",
+        pool_config={"replicas": 2},
+        pool_usable_resources=pool_usable_resources,
+        replica_count_overrides={},
+        calendar_override_enabled=False,
+        strategy="balanced",
+        cpu_threshold=0.2,
+        memory_threshold=0.2,
+        node_grace_period=600,
+        node_first_seen={},
+        node_last_above_threshold={},
+        placeholder_nodes=set(),
+        unschedulable_nodes=set(),
+        has_pending_placeholder=False,
+        now=1000.0,
+    )
+    kwargs.update(overrides)
+    return plan_pool(**kwargs)
+
+
+class TestPlanPool:
+    def test_free_node_past_grace_period_reduces(self):
+        resources = {"node-a": _usable(0.9, 0.9), "node-b": _usable(0.1, 0.1)}
+        assert _plan(resources, node_first_seen={"node-a": 0.0}) == 1
+
+    def test_new_node_within_grace_period_not_reduced(self):
+        assert _plan({"node-a": _usable(0.9, 0.9)}) == 2
+
+    def test_placeholder_and_unschedulable_nodes_skipped(self):
+        resources = {"node-a": _usable(0.9, 0.9), "node-b": _usable(0.9, 0.9)}
+        first_seen = {"node-a": 0.0, "node-b": 0.0}
+        last_above = {}
+        count = _plan(
+            resources,
+            node_first_seen=first_seen,
+            node_last_above_threshold=last_above,
+            placeholder_nodes={"node-a"},
+            unschedulable_nodes={"node-b"},
+        )
+        assert count == 2
+        assert last_above == {"node-a": 1000.0}
+
+    def test_injected_clock_drives_grace_state(self):
+        first_seen = {}
+        resources = {"node-a": _usable(0.9, 0.9)}
+        assert _plan(resources, node_first_seen=first_seen, now=0.0) == 2
+        assert _plan(resources, node_first_seen=first_seen, now=599.0) == 2
+        assert _plan(resources, node_first_seen=first_seen, now=600.0) == 1
+
+    def test_user_pod_profiles_count_partial_nodes(self):
+        """Two half-free nodes are one placeholder's worth, not two."""
+        resources = {"node-a": _usable(0.5, 0.5), "node-b": _usable(0.5, 0.5)}
+        first_seen = {"node-a": 0.0, "node-b": 0.0}
+        pool_config = {
+            "replicas": 2,
+            "resources": {"requests": {"memory": "64000Mi"}},
+            "userPodProfiles": [{"cpu": "500m", "memory": "4000Mi"}],
+        }
+        assert (
+            _plan(resources, pool_config=pool_config, node_first_seen=first_seen) == 1
+        )
+        # Without profiles each free node counts as a whole placeholder.
+        del pool_config["userPodProfiles"]
+        assert (
+            _plan(resources, pool_config=pool_config, node_first_seen=first_seen) == 0
+        )
+
+    def test_scaling_resources_gpu(self):
+        """A GPU pool frees a placeholder only when its GPUs are free."""
+        resources = {"node-a": _usable(0.9, 0.9), "node-b": _usable(0.9, 0.9)}
+        resources["node-a"]["resources"] = {"nvidia.com/gpu": {"free_ratio": 1.0}}
+        resources["node-b"]["resources"] = {"nvidia.com/gpu": {"free_ratio": 0.0}}
+        pool_config = {
+            "replicas": 2,
+            "scalingResources": [{"name": "nvidia.com/gpu", "threshold": 0.5}],
+        }
+        first_seen = {"node-a": 0.0, "node-b": 0.0}
+        assert (
+            _plan(resources, pool_config=pool_config, node_first_seen=first_seen) == 1
+        )
+
+    def test_pool_thresholds_override_defaults(self):
+        resources = {"node-a": _usable(0.3, 0.3)}
+        first_seen = {"node-a": 0.0}
+        assert _plan(resources, node_first_seen=first_seen) == 1
+        pool_config = {"replicas": 2, "cpuThreshold": 0.4}
+        assert (
+            _plan(resources, pool_config=pool_config, node_first_seen=first_seen) == 2
+        )
+        pool_config = {"replicas": 2, "strategy": "mem", "cpuThreshold": 0.4}
+        assert (
+            _plan(resources, pool_config=pool_config, node_first_seen=first_seen) == 1
+        )
+
+    def test_pool_grace_period_overrides_default(self):
+        resources = {"node-a": _usable(0.9, 0.9)}
+        pool_config = {"replicas": 2, "nodeGracePeriod": 1800}
+        first_seen = {"node-a": 0.0}
+        assert (
+            _plan(resources, pool_config=pool_config, node_first_seen=first_seen) == 2
+        )
+        assert (
+            _plan(
+                resources,
+                pool_config=pool_config,
+                node_first_seen=first_seen,
+                now=1800.0,
+            )
+            == 1
+        )
+
+    def test_cluster_ready_time_skips_new_node_grace(self):
+        resources = {"node-a": _usable(0.9, 0.9)}
+        resources["node-a"]["ready_since"] = 10000.0
+        # First time this scaler sees the node, but it's been Ready for 20m.
+        assert _plan(resources, wall_now=11200.0) == 1
+        resources["node-a"]["ready_since"] = 11000.0
+        assert _plan(resources, wall_now=11200.0) == 2
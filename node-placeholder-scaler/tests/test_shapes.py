@@ -0,0 +1,181 @@
+"""
+Tests for scaler/shapes.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_shapes.py
+"""
+
+import pytest
+from scaler.scaler import node_usable_resources
+from scaler.shapes import (
+    DEFAULT_LABEL_KEY,
+    node_shape,
+    provisioning_shape,
+    shape_deployments,
+    shape_name,
+    split_replicas,
+    validate_shapes,
+)
+from scaler.sizing import PlaceholderSizer
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _node(instance_type=None, mem_alloc_mi=64000, cpu_alloc_m=8000, ready_since=0):
+    labels = {"pool": "a"}
+    if instance_type:
+        labels[DEFAULT_LABEL_KEY] = instance_type
+    return node_usable_resources(
+        "pool-a",
+        cpu_alloc_m,
+        300,
+        mem_alloc_mi,
+        400,
+        ready_since=ready_since,
+        overhead={"cpu_m": 300, "mem_mi": 400},
+        labels=labels,
+    )
+
+
+def _config(**shapes):
+    return {
+        "nodeSelector": {"pool": "a"},
+        "resources": {"requests": {"memory": "60Gi"}},
+        "replicas": 2,
+        "shapes": shapes,
+    }
+
+
+# ---------------------------------------------------------------------------
+# validate_shapes
+# ---------------------------------------------------------------------------
+
+
+class TestValidateShapes:
+    def test_valid(self):
+        validate_shapes("a", {})
+        validate_shapes("a", _config())
+        validate_shapes("a", _config(labelKey="example.com/shape", provision="big"))
+
+    @pytest.mark.parametrize(
+        "shapes",
+        [[], {"labelKey": ""}, {"labelKey": 3}, {"provision": ""}, {"provision": 4}],
+    )
+    def test_invalid(self, shapes):
+        with pytest.raises(ValueError):
+            validate_shapes("a", {"shapes": shapes})
+
+
+# ---------------------------------------------------------------------------
+# node_shape and provisioning_shape
+# ---------------------------------------------------------------------------
+
+
+class TestNodeShape:
+    def test_from_label(self):
+        assert node_shape(_node("Standard_D8s_v3"), DEFAULT_LABEL_KEY) == (
+            "standard-d8s-v3",
+            True,
+        )
+
+    def test_from_allocatable(self):
+        node = _node(mem_alloc_mi=58648, cpu_alloc_m=7910)
+        assert node_shape(node, DEFAULT_LABEL_KEY) == ("7cpu-57gi", False)
+
+    def test_shape_name_is_never_empty(self):
+        assert shape_name("__") == "unknown"
+
+
+class TestProvisioningShape:
+    def test_configured(self):
+        assert provisioning_shape({"provision": "N2-Highmem-8"}, {}, {}) == (
+            "n2-highmem-8"
+        )
+
+    def test_newest_node(self):
+        nodes = {
+            "n1": _node("big", ready_since=10),
+            "n2": _node("small", ready_since=20),
+        }
+        shapes = {"n1": "big", "n2": "small"}
+        assert provisioning_shape({}, nodes, shapes) == "small"
+
+    def test_unknown_without_nodes(self):
+        assert provisioning_shape({}, {}, {}) is None
+
+
+# ---------------------------------------------------------------------------
+# split_replicas
+# ---------------------------------------------------------------------------
+
+
+class TestSplitReplicas:
+    def test_new_replicas_go_to_provisioning_shape(self):
+        assert split_replicas(4, {"big": 1, "small": 0}, "small") == {
+            "big": 1,
+            "small": 3,
+        }
+
+    def test_reduction_takes_other_shapes_first(self):
+        assert split_replicas(2, {"big": 2, "small": 1}, "small") == {
+            "big": 1,
+            "small": 1,
+        }
+
+    def test_provisioning_shape_without_nodes(self):
+        assert split_replicas(1, {"big": 0}, "small") == {"big": 0, "small": 1}
+
+
+# ---------------------------------------------------------------------------
+# shape_deployments
+# ---------------------------------------------------------------------------
+
+
+class TestShapeDeployments:
+    def test_one_deployment_per_shape(self):
+        nodes = {
+            "n1": _node("big", mem_alloc_mi=128000, ready_since=10),
+            "n2": _node("small", mem_alloc_mi=32000, ready_since=20),
+        }
+        deployments = shape_deployments(
+            "user", _config(), nodes, {"n1"}, 3, PlaceholderSizer()
+        )
+        assert deployments == [
+            {
+                "name": "user-big",
+                "shape": "big",
+                "nodeSelector": {"pool": "a", DEFAULT_LABEL_KEY: "big"},
+                "resources": {"requests": {"memory": f"{128000 - 400 - 265}Mi"}},
+                "replicas": 1,
+            },
+            {
+                "name": "user-small",
+                "shape": "small",
+                "nodeSelector": {"pool": "a", DEFAULT_LABEL_KEY: "small"},
+                "resources": {"requests": {"memory": f"{32000 - 400 - 265}Mi"}},
+                "replicas": 2,
+            },
+        ]
+
+    def test_configured_shape_without_nodes_uses_pool_resources(self):
+        nodes = {"n1": _node("big")}
+        deployments = shape_deployments(
+            "user", _config(provision="small"), nodes, set(), 1, PlaceholderSizer()
+        )
+        small = next(d for d in deployments if d["shape"] == "small")
+        assert small["nodeSelector"] == {"pool": "a", DEFAULT_LABEL_KEY: "small"}
+        assert small["resources"] == {"requests": {"memory": "60Gi"}}
+        assert small["replicas"] == 1
+
+    def test_unlabelled_nodes_are_not_pinned(self):
+        nodes = {"n1": _node(mem_alloc_mi=58648, cpu_alloc_m=7910)}
+        [deployment] = shape_deployments(
+            "user", _config(), nodes, set(), 1, PlaceholderSizer()
+        )
+        assert deployment["name"] == "user-7cpu-57gi"
+        assert deployment["nodeSelector"] == {"pool": "a"}
+
+    def test_no_shape_known(self):
+        assert shape_deployments("user", _config(), {}, set(), 1, None) is None
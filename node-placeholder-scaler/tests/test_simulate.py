@@ -0,0 +1,167 @@
+"""
+Tests for scaler/simulate.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_simulate.py
+"""
+
+import datetime
+import json
+
+from ical.calendar_stream import IcsCalendarStream
+from scaler.simulate import (
+    _pool_usable_resources,
+    calendar_overrides,
+    load_snapshots,
+    simulate,
+)
+
+POOL_KEY = "hub.jupyter.org/pool-name"
+START = datetime.datetime(2025, 9, 2, 9, 0, tzinfo=datetime.timezone.utc)
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _node(pool="pool-a", mem_requested_mi=0, **overrides):
+    node = {
+        "pool": pool,
+        "cpu_alloc_m": 8000,
+        "mem_alloc_mi": 64000,
+        "cpu_requested_m": 0,
+        "mem_requested_mi": mem_requested_mi,
+        "unschedulable": False,
+        "placeholder": False,
+    }
+    node.update(overrides)
+    return node
+
+
+def _timeline(minutes, nodes=None, pending=None):
+    """One snapshot per minute; `pending` maps minute -> pending pod count."""
+    pending = pending or {}
+    return [
+        {
+            "time": START + datetime.timedelta(minutes=m),
+            "nodes": nodes if nodes is not None else {"n1": _node()},
+            "pending_user_pods": {"pool-a": pending[m]} if m in pending else {},
+        }
+        for m in range(minutes)
+    ]
+
+
+def _run(snapshots, replicas=1, overrides=None, **kwargs):
+    pool_configs = {
+        "pool-a": {
+            "nodeSelector": {POOL_KEY: "pool-a"},
+            "resources": {},
+            "replicas": replicas,
+        }
+    }
+    params = dict(
+        calendar_override_enabled=False,
+        strategy="mem",
+        cpu_threshold=0.2,
+        memory_threshold=0.2,
+        node_grace_period=0,
+        node_startup_seconds=600,
+    )
+    params.update(kwargs)
+    return simulate(
+        snapshots,
+        overrides or [{} for _ in snapshots],
+        pool_configs,
+        POOL_KEY,
+        **params,
+    )
+
+
+# ---------------------------------------------------------------------------
+# simulate
+# ---------------------------------------------------------------------------
+
+
+class TestSimulate:
+    def test_busy_pool_keeps_placeholder(self):
+        # 61 snapshots a minute apart: one hour of one placeholder.
+        busy = {"n1": _node(mem_requested_mi=60000)}
+        result = _run(_timeline(61, nodes=busy))
+        assert result["placeholder_node_hours"] == 1.0
+        assert result["unabsorbed_pending_pod_minutes"] == 0
+
+    def test_free_node_removes_placeholder(self):
+        result = _run(_timeline(61))
+        assert result["placeholder_node_hours"] == 0
+
+    def test_grace_period_delays_reduction(self):
+        result = _run(_timeline(61), node_grace_period=1800)
+        assert result["placeholder_node_hours"] == 0.5
+
+    def test_pending_pods_absorbed_by_running_placeholder(self):
+        busy = {"n1": _node(mem_requested_mi=60000)}
+        result = _run(_timeline(30, nodes=busy, pending={20: 4}))
+        assert result["absorbed_scale_ups"] == 1
+        assert result["unabsorbed_pending_pod_minutes"] == 0
+
+    def test_pending_pods_without_placeholder_are_unabsorbed(self):
+        busy = {"n1": _node(mem_requested_mi=60000)}
+        result = _run(_timeline(30, nodes=busy, pending={20: 4, 21: 4}), replicas=0)
+        assert result["absorbed_scale_ups"] == 0
+        assert result["unabsorbed_pending_pod_minutes"] == 8
+
+    def test_placeholder_still_booting_does_not_absorb(self):
+        busy = {"n1": _node(mem_requested_mi=60000)}
+        result = _run(_timeline(5, nodes=busy, pending={2: 1}))
+        assert result["absorbed_scale_ups"] == 0
+        assert result["unabsorbed_pending_pod_minutes"] == 1
+
+    def test_calendar_override(self):
+        overrides = [{"pool-a": 3} for _ in range(61)]
+        result = _run(
+            _timeline(61), overrides=overrides, calendar_override_enabled=True
+        )
+        assert result["placeholder_node_hours"] == 3.0
+
+    def test_recorded_placeholder_and_cordoned_nodes(self):
+        nodes = {
+            "n1": _node(mem_requested_mi=60000),
+            "n2": _node(placeholder=True),
+            "n3": _node(unschedulable=True),
+        }
+        pools = _pool_usable_resources(_timeline(1, nodes=nodes))[0]
+        usable, unschedulable = pools["pool-a"]
+        assert set(usable) == {"n1", "n3"}
+        assert unschedulable == {"n3"}
+        # Neither the recorded placeholder node nor the cordoned one counts
+        # as free capacity.
+        result = _run(_timeline(61, nodes=nodes))
+        assert result["placeholder_node_hours"] == 1.0
+
+
+class TestLoadSnapshots:
+    def test_sorted_by_time(self, tmp_path):
+        path = tmp_path / "timeline.jsonl"
+        lines = [
+            {"time": "2025-09-02T09:01:00+00:00", "nodes": {}},
+            {"time": "2025-09-02T09:00:00+00:00", "nodes": {}},
+        ]
+        path.write_text("\n".join(json.dumps(line) for line in lines) + "\n\n")
+        snapshots = load_snapshots(path)
+        assert [s["time"].minute for s in snapshots] == [0, 1]
+
+
+class TestCalendarOverrides:
+    def test_overrides_at_snapshot_times(self):
+        calendar = IcsCalendarStream.calendar_from_ics(
+            "BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:-//Test//Test//EN\n"
+            "BEGIN:VEVENT\nUID:ev1@test\n"
+            "DTSTART:20250902T091000Z\nDTEND:20250902T092000Z\n"
+            "SUMMARY:Exam\nDESCRIPTION:pool-a: 2\nEND:VEVENT\n"
+            "END:VCALENDAR\n"
+        )
+        snapshots = _timeline(30)
+        overrides = calendar_overrides(snapshots, calendar)
+        assert overrides[5] == {}
+        assert overrides[15] == {"pool-a": 2}
+        assert overrides[25] == {}
@@ -0,0 +1,163 @@
+"""
+Tests for scaler/sizing.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_sizing.py
+"""
+
+import pytest
+from scaler.scaler import node_usable_resources
+from scaler.sizing import PlaceholderSizer, fitting_requests, validate_auto_size
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _node(
+    mem_alloc_mi=64000, cpu_alloc_m=8000, overhead_mem_mi=400, overhead_cpu_m=300
+):
+    return node_usable_resources(
+        "pool-a",
+        cpu_alloc_m,
+        overhead_cpu_m,
+        mem_alloc_mi,
+        overhead_mem_mi,
+        overhead={"cpu_m": overhead_cpu_m, "mem_mi": overhead_mem_mi},
+    )
+
+
+def _config(**auto_size):
+    return {
+        "nodeSelector": {"pool": "a"},
+        "resources": {"requests": {"memory": "60Gi"}},
+        "autoSize": auto_size,
+    }
+
+
+# ---------------------------------------------------------------------------
+# validate_auto_size
+# ---------------------------------------------------------------------------
+
+
+class TestValidateAutoSize:
+    def test_valid(self):
+        validate_auto_size("a", {})
+        validate_auto_size(
+            "a",
+            _config(
+                resources=["memory", "cpu"],
+                reserve={"memory": "300Mi", "cpu": "200m"},
+                tolerance=0.1,
+            ),
+        )
+
+    @pytest.mark.parametrize(
+        "auto_size",
+        [
+            [],
+            {"resources": ["gpu"]},
+            {"resources": []},
+            {"reserve": {"memory": "lots"}},
+            {"reserve": {"disk": "1Gi"}},
+            {"tolerance": -1},
+        ],
+    )
+    def test_invalid(self, auto_size):
+        with pytest.raises(ValueError):
+            validate_auto_size("a", {"autoSize": auto_size})
+
+    @pytest.mark.parametrize(
+        "reserve",
+        [{"cpu": 0.5}, {"cpu": "0.1"}, {"memory": "1G"}, {"memory": "512M"}],
+    )
+    def test_any_quantity_in_reserve(self, reserve):
+        validate_auto_size("a", _config(reserve=reserve))
+
+    def test_bad_reserve_names_pool(self):
+        with pytest.raises(ValueError, match="autoSize.reserve for pool user-pool"):
+            validate_auto_size("user-pool", _config(reserve={"cpu": "lots"}))
+
+
+# ---------------------------------------------------------------------------
+# fitting_requests
+# ---------------------------------------------------------------------------
+
+
+class TestFittingRequests:
+    def test_smallest_over_nodes(self):
+        nodes = {"n1": _node(), "n2": _node(overhead_mem_mi=1000, overhead_cpu_m=100)}
+        assert fitting_requests(nodes, {}) == {
+            "memory": 64000 - 1000 - 265,
+            "cpu": 8000 - 300 - 100,
+        }
+
+    def test_reserve(self):
+        nodes = {"n1": _node()}
+        assert fitting_requests(nodes, {"memory": "1Gi", "cpu": "1"}) == {
+            "memory": 64000 - 400 - 1024,
+            "cpu": 8000 - 300 - 1000,
+        }
+
+    def test_decimal_reserve(self):
+        nodes = {"n1": _node()}
+        assert fitting_requests(nodes, {"memory": "1G", "cpu": 0.5}) == {
+            "memory": 64000 - 400 - 953,
+            "cpu": 8000 - 300 - 500,
+        }
+
+    def test_no_nodes(self):
+        assert fitting_requests({}, {}) is None
+
+
+# ---------------------------------------------------------------------------
+# PlaceholderSizer
+# ---------------------------------------------------------------------------
+
+
+class TestPlaceholderSizer:
+    def test_pool_without_auto_size_unchanged(self):
+        config = {"resources": {"requests": {"memory": "60Gi"}}}
+        assert PlaceholderSizer().pool_config("a", config, {"n1": _node()}) is config
+
+    def test_sizes_requests(self):
+        config = _config(resources=["memory", "cpu"])
+        sized = PlaceholderSizer().pool_config("a", config, {"n1": _node()})
+        assert sized["resources"]["requests"] == {
+            "memory": f"{64000 - 400 - 265}Mi",
+            "cpu": f"{8000 - 300 - 100}m",
+        }
+        assert config["resources"]["requests"] == {"memory": "60Gi"}
+
+    def test_configured_resources_until_pool_has_nodes(self):
+        config = _config()
+        assert PlaceholderSizer().pool_config("a", config, {}) is config
+
+    def test_keeps_last_size_when_pool_empties(self):
+        sizer = PlaceholderSizer()
+        first = sizer.pool_config("a", _config(), {"n1": _node()})
+        assert sizer.pool_config("a", _config(), {}) == first
+
+    def test_grows_only_past_tolerance(self):
+        sizer = PlaceholderSizer()
+        sizer.pool_config("a", _config(), {"n1": _node(overhead_mem_mi=3000)})
+        base = 64000 - 3000 - 265
+        # Freed 2000Mi of overhead is under 5% growth: keep the old size.
+        sized = sizer.pool_config("a", _config(), {"n1": _node(overhead_mem_mi=1000)})
+        assert sized["resources"]["requests"]["memory"] == f"{base}Mi"
+        sized = sizer.pool_config(
+            "a", _config(tolerance=0.01), {"n1": _node(overhead_mem_mi=1000)}
+        )
+        assert sized["resources"]["requests"]["memory"] == f"{64000 - 1000 - 265}Mi"
+
+    def test_shrinks_straight_away(self):
+        sizer = PlaceholderSizer()
+        sizer.pool_config("a", _config(), {"n1": _node()})
+        sized = sizer.pool_config("a", _config(), {"n1": _node(overhead_mem_mi=410)})
+        assert sized["resources"]["requests"]["memory"] == f"{64000 - 410 - 265}Mi"
+
+    def test_limits_follow_requests(self):
+        config = _config()
+        config["resources"]["limits"] = {"memory": "60Gi"}
+        sized = PlaceholderSizer().pool_config("a", config, {"n1": _node()})
+        assert sized["resources"]["limits"]["memory"] == f"{64000 - 400 - 265}Mi"
@@ -0,0 +1,111 @@
+"""
+Tests for scaler/watcher.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_watcher.py
+"""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+from kubernetes.client.exceptions import ApiException
+from scaler.watcher import PlaceholderWatcher, is_eviction_event
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _event(event_type, phase="Running", resource_version="1"):
+    pod = MagicMock()
+    pod.metadata.name = "pool-a-placeholder-abc"
+    pod.metadata.resource_version = resource_version
+    pod.status.phase = phase
+    return {"type": event_type, "object": pod}
+
+
+def _watcher(on_eviction=None, debounce=0.05):
+    return PlaceholderWatcher(
+        MagicMock(),
+        "node-placeholder",
+        "component=placeholder",
+        on_eviction or (lambda: None),
+        debounce=debounce,
+        retry_period=0,
+    )
+
+
+# ---------------------------------------------------------------------------
+# is_eviction_event
+# ---------------------------------------------------------------------------
+
+
+class TestIsEvictionEvent:
+    def test_deleted(self):
+        assert is_eviction_event(_event("DELETED"))
+
+    def test_replacement_pending(self):
+        assert is_eviction_event(_event("ADDED", "Pending"))
+        assert is_eviction_event(_event("MODIFIED", "Pending"))
+
+    def test_running(self):
+        assert not is_eviction_event(_event("MODIFIED", "Running"))
+
+
+# ---------------------------------------------------------------------------
+# PlaceholderWatcher
+# ---------------------------------------------------------------------------
+
+
+class TestPlaceholderWatcher:
+    def test_burst_is_debounced(self):
+        fired = threading.Event()
+        calls = []
+
+        def on_eviction():
+            calls.append(1)
+            fired.set()
+
+        watcher = _watcher(on_eviction)
+        watcher.handle(_event("DELETED"))
+        watcher.handle(_event("ADDED", "Pending"))
+        watcher.handle(_event("DELETED"))
+        assert fired.wait(2)
+        assert calls == [1]
+        # A later eviction schedules another call.
+        fired.clear()
+        watcher.handle(_event("DELETED"))
+        assert fired.wait(2)
+        assert calls == [1, 1]
+
+    def test_running_pod_does_not_trigger(self):
+        calls = []
+        watcher = _watcher(lambda: calls.append(1), debounce=0)
+        watcher.handle(_event("MODIFIED", "Running", resource_version="7"))
+        assert watcher._timer is None
+        assert watcher._resource_version == "7"
+
+    def test_stop_cancels_pending_call(self):
+        calls = []
+        watcher = _watcher(lambda: calls.append(1), debounce=10)
+        watcher.handle(_event("DELETED"))
+        watcher.stop()
+        assert watcher._timer is None
+        assert calls == []
+
+    @patch("scaler.watcher.watch.Watch")
+    def test_expired_watch_relists(self, mock_watch_cls):
+        watcher = _watcher()
+        watcher.api.list_namespaced_pod.return_value.metadata.resource_version = "50"
+        watcher._resource_version = "10"
+
+        def stream(*args, **kwargs):
+            if kwargs["resource_version"] == "10":
+                raise ApiException(status=410)
+            watcher._stop.set()
+            return iter([])
+
+        mock_watch_cls.return_value.stream.side_effect = stream
+        watcher.run()
+        assert watcher._resource_version == "50"
+        watcher.api.list_namespaced_pod.assert_called_once()
@@ -0,0 +1,98 @@
+"""
+Tests for scaler/zones.py
+
+Run from node-placeholder-scaler/:
+    pytest tests/test_zones.py
+"""
+
+import pytest
+from scaler.scaler import node_usable_resources
+from scaler.zones import (
+    DEFAULT_LABEL_KEY,
+    nodes_by_zone,
+    validate_zones,
+    zone_deployment_name,
+    zone_pool_config,
+    zone_share,
+)
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _node(zone=None):
+    labels = {"pool": "a"}
+    if zone:
+        labels[DEFAULT_LABEL_KEY] = zone
+    return node_usable_resources("pool-a", 8000, 300, 64000, 400, labels=labels)
+
+
+# ---------------------------------------------------------------------------
+# validate_zones
+# ---------------------------------------------------------------------------
+
+
+class TestValidateZones:
+    def test_valid(self):
+        validate_zones("a", {})
+        validate_zones("a", {"zones": {}})
+        validate_zones(
+            "a", {"zones": {"labelKey": "example.com/zone", "names": ["z1", "z2"]}}
+        )
+
+    @pytest.mark.parametrize(
+        "zones",
+        [
+            [],
+            {"labelKey": ""},
+            {"names": "z1"},
+            {"names": [""]},
+            {"names": ["z1", "z1"]},
+        ],
+    )
+    def test_invalid(self, zones):
+        with pytest.raises(ValueError):
+            validate_zones("a", {"zones": zones})
+
+
+# ---------------------------------------------------------------------------
+# nodes_by_zone
+# ---------------------------------------------------------------------------
+
+
+class TestNodesByZone:
+    def test_groups_nodes_and_adds_configured_zones(self):
+        nodes = {"n1": _node("z2"), "n2": _node("z1"), "n3": _node("z2")}
+        by_zone = nodes_by_zone({"names": ["z3"]}, nodes)
+        assert list(by_zone) == ["z1", "z2", "z3"]
+        assert set(by_zone["z2"]) == {"n1", "n3"}
+        assert by_zone["z3"] == {}
+
+    def test_unlabelled_nodes_left_out(self):
+        assert nodes_by_zone({}, {"n1": _node()}) == {}
+
+
+# ---------------------------------------------------------------------------
+# zone_pool_config, zone_deployment_name and zone_share
+# ---------------------------------------------------------------------------
+
+
+class TestZonePoolConfig:
+    def test_narrows_node_selector(self):
+        pool_config = {"nodeSelector": {"pool": "a"}, "replicas": 1, "zones": {}}
+        zone_config = zone_pool_config(pool_config, "z1")
+        assert zone_config["nodeSelector"] == {"pool": "a", DEFAULT_LABEL_KEY: "z1"}
+        assert zone_config["replicas"] == 1
+        assert pool_config["nodeSelector"] == {"pool": "a"}
+
+    def test_deployment_name(self):
+        assert zone_deployment_name("user", "eastus_1") == "user-eastus-1"
+
+
+class TestZoneShare:
+    @pytest.mark.parametrize(
+        "amount, zones, share", [(None, 3, None), (0, 3, 0), (3, 3, 1), (4, 3, 2)]
+    )
+    def test_rounds_up(self, amount, zones, share):
+        assert zone_share(amount, zones) == share
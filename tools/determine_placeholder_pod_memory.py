@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 
+import argparse
+import math
 import re
-import sys
+from collections import defaultdict
 
 from kubernetes import client, config
 
@@ -9,6 +11,8 @@ from kubernetes import client, config
 # unschedulable, which can cause issues with cluster autoscaling and other
 # components that need to schedule pods on the node
 UNUSED_MEMORY_BYTES = 277872640
+# likewise for CPU, when sizing placeholder CPU requests in --all-pools mode
+UNUSED_CPU_MILLICORES = 100
 
 
 def k8s_mem_to_bytes(mem: str) -> int:
@@ -33,16 +37,40 @@ def k8s_mem_to_bytes(mem: str) -> int:
     return int(mem)
 
 
-def main():
-    if len(sys.argv) < 2:
-        print(f"Usage: {sys.argv[0]} <node-name>")
-        sys.exit(1)
+def k8s_cpu_to_millicores(cpu: str) -> int:
+    """Convert Kubernetes CPU string (e.g. "250m", "2") to millicores."""
+    if cpu.endswith("m"):
+        return int(float(cpu[:-1]))
+    return int(float(cpu) * 1000)
 
-    node = sys.argv[1]
 
-    config.load_kube_config()
-    v1 = client.CoreV1Api()
+def non_notebook_requests(pods):
+    """Total (memory bytes, CPU millicores) requested by pods, minus notebooks.
+
+    Containers named like pause or notebook are left out: those are what a
+    placeholder makes room for.
+    """
+    mem_bytes = 0
+    cpu_millicores = 0
+    for pod in pods:
+        for container in pod.spec.containers:
+            if re.search(r"pause|notebook", container.name):
+                continue
+            requests = container.resources.requests or {}
+            if requests.get("memory"):
+                mem_bytes += k8s_mem_to_bytes(requests["memory"])
+            if requests.get("cpu"):
+                cpu_millicores += k8s_cpu_to_millicores(requests["cpu"])
+    return mem_bytes, cpu_millicores
 
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(q / 100 * len(ordered)) - 1, 0)]
+
+
+def size_one_node(v1, node):
     # determine node allocatable memory in bytes
     node_obj = v1.read_node(node)
     node_mem = node_obj.status.allocatable["memory"]
@@ -54,16 +82,7 @@ def main():
         label_selector="component!=placeholder",
         field_selector=f"spec.nodeName={node}",
     )
-
-    placeholder_pod_mem = 0
-    for pod in pods.items:
-        for container in pod.spec.containers:
-            if re.search(r"pause|notebook", container.name):
-                continue
-            mem = (container.resources.requests or {}).get("memory")
-            if not mem:
-                continue
-            placeholder_pod_mem += k8s_mem_to_bytes(mem)
+    placeholder_pod_mem, _ = non_notebook_requests(pods.items)
 
     print(f"Total non-notebook memory used by pods: {placeholder_pod_mem} bytes")
 
@@ -71,5 +90,91 @@ def main():
     print(f"\nRecommended placeholder pod size for values.yaml: {pod_size} bytes")
 
 
+def size_all_pools(v1, pool_label):
+    """Size placeholders for every node in every pool from one node and pod list."""
+    nodes = v1.list_node().items
+    pods_by_node = defaultdict(list)
+    for pod in v1.list_pod_for_all_namespaces(
+        label_selector="component!=placeholder"
+    ).items:
+        if pod.spec.node_name:
+            pods_by_node[pod.spec.node_name].append(pod)
+
+    # pool -> [(node, memory bytes, CPU millicores)] of recommended sizes
+    sizes = defaultdict(list)
+    unlabelled = 0
+    for node in nodes:
+        pool = (node.metadata.labels or {}).get(pool_label)
+        if pool is None:
+            unlabelled += 1
+            continue
+        allocatable = node.status.allocatable
+        mem, cpu = non_notebook_requests(pods_by_node[node.metadata.name])
+        sizes[pool].append(
+            (
+                node.metadata.name,
+                k8s_mem_to_bytes(allocatable["memory"]) - mem - UNUSED_MEMORY_BYTES,
+                k8s_cpu_to_millicores(allocatable["cpu"]) - cpu - UNUSED_CPU_MILLICORES,
+            )
+        )
+    if unlabelled:
+        print(f"Skipped {unlabelled} nodes without a {pool_label} label")
+
+    for pool, pool_sizes in sorted(sizes.items()):
+        print(f"\nPool {pool} ({len(pool_sizes)} nodes):")
+        for node, mem, cpu in sorted(pool_sizes):
+            print(f"  {node}: {mem} bytes, {cpu}m CPU")
+        for name, values, unit in (
+            ("memory", [s[1] for s in pool_sizes], " bytes"),
+            ("cpu", [s[2] for s in pool_sizes], "m"),
+        ):
+            print(
+                f"  {name}: min {min(values)}{unit}, "
+                f"p10 {percentile(values, 10)}{unit}, "
+                f"p50 {percentile(values, 50)}{unit}, "
+                f"max {max(values)}{unit}"
+            )
+
+    # The smallest size per pool fits on every node in it.
+    print("\nRecommended nodePools resources for values.yaml:\n")
+    print("nodePools:")
+    for pool, pool_sizes in sorted(sizes.items()):
+        print(f"  {pool}:")
+        print("    nodeSelector:")
+        print(f"      {pool_label}: {pool}")
+        print("    resources:")
+        print("      requests:")
+        print(f"        memory: {min(s[1] for s in pool_sizes)}")
+        print(f"        cpu: {min(s[2] for s in pool_sizes)}m")
+
+
+def main():
+    argparser = argparse.ArgumentParser(
+        description="Recommend placeholder pod sizes from current node usage."
+    )
+    argparser.add_argument("node", nargs="?", help="Size for this one node.")
+    argparser.add_argument(
+        "--all-pools",
+        action="store_true",
+        help="Size for every node in every pool and print a nodePools block.",
+    )
+    argparser.add_argument(
+        "--pool-label",
+        default="hub.jupyter.org/pool-name",
+        help="Node label naming each node's pool, for --all-pools.",
+    )
+    args = argparser.parse_args()
+    if bool(args.node) == args.all_pools:
+        argparser.error("give either a node name or --all-pools")
+
+    config.load_kube_config()
+    v1 = client.CoreV1Api()
+
+    if args.all_pools:
+        size_all_pools(v1, args.pool_label)
+    else:
+        size_one_node(v1, args.node)
+
+
 if __name__ == "__main__":
     main()